@@ -1,24 +1,42 @@
-from flask import Flask, request, jsonify, render_template_string, send_file, abort
+from flask import Flask, request, jsonify, render_template_string, send_file, abort, g
 from flask_cors import CORS
 import os
 import subprocess
-import pandas as pd
 import time
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import json
-import glob
-import shutil
+import math
+import re
+import uuid
+import zipfile
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from utils.batch_upload import LEGACY_XLS_ERROR, extract_workbooks, inspect_workbooks
+from utils.blob_store import get_blob_store
+from utils.config import Config
+from utils.dedup import SharedGradeStore
+from utils.excel_read import parse_question_range, preview_workbook
+from utils.graders import GRADERS
+from utils.janitor import get_janitor, remove_paths, sweep
+from utils.logger import get_logger
+from utils.results_store import ResultsStore, new_run_id
+from utils.static_assets import StaticAssetCache
+from utils.upload_registry import UploadRegistry
+from utils.validation import validate_workbook
+from utils.worker_pool import get_worker_pool
 
 app = Flask(__name__)
 CORS(app)
+logger = get_logger(__name__)
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 OUTPUT_FOLDER = 'output'
 TEMPLATE_FOLDER = 'template'
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+ALLOWED_EXTENSIONS = {'xlsx'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+# Cookie identifying a browser session's uploads
+SESSION_COOKIE = 'uat_session'
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
@@ -31,16 +49,85 @@ os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 os.makedirs(TEMPLATE_FOLDER, exist_ok=True)
 os.makedirs('tests', exist_ok=True)
 
+# Front-end files are read and compressed once, then served from memory
+static_assets = StaticAssetCache()
+
+# Uploaded workbooks per session, shared by all worker processes
+upload_registry = UploadRegistry()
+
+# Every processed row of every run, for run listings, exports and comparisons
+results_store = ResultsStore()
+
+# Deletes run on the janitor's background thread, never in a request
+janitor = get_janitor()
+
+# What the retention sweep keeps of each folder, oldest files are removed first
+RETENTION_POLICIES = [
+    {'directory': UPLOAD_FOLDER, 'max_age': Config.UPLOAD_MAX_AGE,
+     'max_count': Config.UPLOAD_MAX_FILES, 'max_bytes': Config.UPLOAD_MAX_DIR_BYTES},
+    {'directory': OUTPUT_FOLDER, 'max_age': Config.OUTPUT_MAX_AGE,
+     'max_count': Config.OUTPUT_MAX_FILES, 'max_bytes': Config.OUTPUT_MAX_DIR_BYTES},
+    {'directory': Config.RUN_LOGS_DIR, 'max_age': Config.OUTPUT_MAX_AGE, 'pattern': '*.log'},
+    {'directory': Config.STORAGE_STATE_DIR, 'max_age': Config.STORAGE_STATE_TTL, 'pattern': '*.json'},
+] + [
+    {'directory': directory, 'max_age': Config.ARTIFACT_MAX_AGE,
+     'max_count': Config.ARTIFACT_MAX_FILES, 'max_bytes': Config.ARTIFACT_MAX_DIR_BYTES}
+    for directory in (Config.SCREENSHOTS_DIR, Config.SNAPSHOTS_DIR, Config.TRACES_DIR)
+]
+
+def retention_sweep():
+    """
+    Prune every folder to its policy, forget the uploads that were removed,
+    drop expired runs from the results store and the blobs no stored result uses
+    """
+    results = sweep(RETENTION_POLICIES)
+    forgotten = upload_registry.forget_missing()
+    janitor.job_store.remove_older_than(time.time() - Config.OUTPUT_MAX_AGE)
+    expired_runs = 0
+    if Config.RESULTS_MAX_AGE > 0:
+        expired_runs = results_store.remove_runs_older_than(time.time() - Config.RESULTS_MAX_AGE)
+    if Config.DEDUP_SHARED_ENABLED:
+        SharedGradeStore().remove_older_than(time.time() - Config.DEDUP_SHARED_TTL)
+    # State workbooks hold references in memory until they are saved; a run ends
+    # within TEST_RUN_TIMEOUT, so blobs used by one are never that old
+    results[Config.BLOB_DIR] = get_blob_store().collect(
+        results_store.blob_refs(), max(Config.OUTPUT_MAX_AGE, Config.TEST_RUN_TIMEOUT)
+    )
+    return {
+        'removed': sum(result['removed'] for result in results.values()),
+        'freed_bytes': sum(result['freed_bytes'] for result in results.values()),
+        'forgotten_uploads': forgotten,
+        'expired_runs': expired_runs,
+    }
+
+if Config.JANITOR_INTERVAL > 0:
+    janitor.schedule('retention', retention_sweep, Config.JANITOR_INTERVAL)
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def get_session_id():
+    """Get the caller's session ID, creating one if the browser has none yet"""
+    session_id = request.cookies.get(SESSION_COOKIE, '')
+    if not re.fullmatch(r'[0-9a-f]{32}', session_id):
+        if 'new_session_id' not in g:
+            g.new_session_id = uuid.uuid4().hex
+        session_id = g.new_session_id
+    return session_id
+
+@app.after_request
+def set_session_cookie(response):
+    """Hand out the session cookie created during this request"""
+    if 'new_session_id' in g:
+        response.set_cookie(SESSION_COOKIE, g.new_session_id, httponly=True, samesite='Lax')
+    return response
+
 @app.route('/')
 def index():
     """Serve the main HTML page"""
     try:
-        with open('index.html', 'r', encoding='utf-8') as f:
-            return f.read()
+        return static_assets.make_response('index.html', request, app.response_class)
     except FileNotFoundError:
         return "index.html not found. Please ensure the file exists in the same directory.", 404
 
@@ -48,9 +135,7 @@ def index():
 def styles():
     """Serve the CSS file"""
     try:
-        with open('styles.css', 'r', encoding='utf-8') as f:
-            content = f.read()
-        return content, 200, {'Content-Type': 'text/css'}
+        return static_assets.make_response('styles.css', request, app.response_class)
     except FileNotFoundError:
         return "styles.css not found", 404
 
@@ -58,9 +143,7 @@ def styles():
 def script():
     """Serve the JavaScript file"""
     try:
-        with open('script.js', 'r', encoding='utf-8') as f:
-            content = f.read()
-        return content, 200, {'Content-Type': 'application/javascript'}
+        return static_assets.make_response('script.js', request, app.response_class)
     except FileNotFoundError:
         return "script.js not found", 404
 
@@ -79,13 +162,16 @@ def upload_file():
             return jsonify({'error': 'No file selected'}), 400
         
         # Check if file type is allowed
+        if file.filename.lower().endswith('.xls'):
+            return jsonify({'error': LEGACY_XLS_ERROR}), 400
         if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file type. Only .xlsx and .xls files are allowed'}), 400
+            return jsonify({'error': 'Invalid file type. Only .xlsx files are allowed'}), 400
         
-        # Secure the filename
+        # Secure the filename; the upload ID keeps uploads of the same name apart
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_{filename}"
+        upload_id = uuid.uuid4().hex
+        filename = f"{timestamp}_{upload_id}_{filename}"
         
         # Save the file
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -93,26 +179,19 @@ def upload_file():
         
         # Try to read and validate the Excel file
         try:
-            df = pd.read_excel(filepath)
-            preview = {
-                'filename': filename,
-                'rows': len(df),
-                'columns': len(df.columns),
-                'column_names': df.columns.tolist()[:10],  # First 10 columns
-                'sample_data': df.head(3).to_dict('records') if len(df) > 0 else []
-            }
+            preview = {'filename': filename, **preview_workbook(filepath)}
         except Exception as e:
             # Clean up uploaded file if it can't be read
             if os.path.exists(filepath):
                 os.remove(filepath)
             return jsonify({'error': f'Invalid Excel file: {str(e)}'}), 400
         
-        # Store the current file path for testing
-        with open('current_file.txt', 'w') as f:
-            f.write(filepath)
+        # Register the upload so this session (or anyone with the ID) can test it
+        upload_registry.register(get_session_id(), filename, filepath, upload_id)
         
         return jsonify({
             'message': 'File uploaded successfully',
+            'upload_id': upload_id,
             'filename': filename,
             'filepath': filepath,
             'preview': preview
@@ -121,36 +200,180 @@ def upload_file():
     except Exception as e:
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+@app.route('/upload-batch', methods=['POST'])
+def upload_batch():
+    """Handle an upload of many workbooks (and/or zip archives of them) for one combined run"""
+    try:
+        # A batch may be much larger than a single upload
+        request.max_content_length = Config.BATCH_MAX_REQUEST_BYTES
+        files = [file for file in request.files.getlist('files') if file.filename]
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        batch_id = uuid.uuid4().hex  # in every file name, so concurrent batches never collide
+        saved, rejected = [], []
+        for index, file in enumerate(files, 1):
+            name = secure_filename(file.filename)
+            if name.lower().endswith('.zip'):
+                try:
+                    extracted, skipped = extract_workbooks(
+                        file.stream, app.config['UPLOAD_FOLDER'], f"{timestamp}_{batch_id}_{index}_",
+                        Config.BATCH_MAX_FILES - len(saved), MAX_FILE_SIZE
+                    )
+                except zipfile.BadZipFile:
+                    rejected.append({'filename': name, 'error': 'Not a valid zip archive'})
+                    continue
+                saved += extracted
+                rejected += skipped
+            elif name.lower().endswith('.xls'):
+                rejected.append({'filename': name, 'error': LEGACY_XLS_ERROR})
+            elif not allowed_file(name):
+                rejected.append({'filename': name, 'error': 'Invalid file type. Only .xlsx and .zip files are allowed'})
+            elif len(saved) >= Config.BATCH_MAX_FILES:
+                rejected.append({'filename': name, 'error': f'More than {Config.BATCH_MAX_FILES} workbooks in one batch'})
+            else:
+                filename = f"{timestamp}_{batch_id}_{index}_{name}"
+                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                file.save(filepath)
+                saved.append((filename, filepath))
+        
+        # Parse, preview and check every workbook in parallel
+        session_id = get_session_id()
+        uploads = []
+        for (filename, filepath), inspection in zip(saved, inspect_workbooks([path for _, path in saved])):
+            error = inspection.get('error') or '; '.join(inspection['errors'])
+            if error:
+                os.remove(filepath)
+                rejected.append({'filename': filename, 'error': error})
+                continue
+            uploads.append({
+                'upload_id': upload_registry.register(session_id, filename, filepath),
+                'filename': filename,
+                'mentors': inspection['mentors'],
+                'questions': inspection['questions'],
+                'total_mentors': inspection['total_mentors'],
+                'total_questions': inspection['total_questions'],
+                'sheets': inspection['sheets'],
+                'preview': {'filename': filename, **inspection['preview']}
+            })
+        
+        if not uploads:
+            return jsonify({'error': 'No valid workbooks in the batch', 'rejected': rejected}), 400
+        
+        # One ID for testing every accepted workbook in a single run
+        upload_registry.register_batch(session_id, [upload['upload_id'] for upload in uploads], batch_id)
+        
+        return jsonify({
+            'message': f'{len(uploads)} workbooks uploaded successfully',
+            'batch_id': batch_id,
+            'uploads': uploads,
+            'rejected': rejected
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Batch upload failed: {str(e)}'}), 500
+
+@app.route('/validate', methods=['POST'])
+def validate_upload():
+    """Check an uploaded file (by upload ID, or the session's latest upload) and return the report"""
+    try:
+        data = request.get_json(silent=True) or {}
+        upload_id = data.get('upload_id')
+        
+        if upload_id:
+            upload = upload_registry.get(upload_id)
+            if not upload:
+                return jsonify({'error': f'Unknown upload ID: {upload_id}'}), 404
+        else:
+            upload = upload_registry.latest(get_session_id())
+            if not upload:
+                return jsonify({'error': 'No file uploaded. Please upload a file first.'}), 400
+        
+        if not os.path.exists(upload['filepath']):
+            return jsonify({'error': 'Uploaded file not found. Please upload a file again.'}), 400
+        
+        report = validate_workbook(upload['filepath'])
+        return jsonify({**report, 'upload_id': upload['upload_id']}), 200
+    except Exception as e:
+        return jsonify({'error': f'Validation failed: {str(e)}'}), 500
+
 @app.route('/run-tests', methods=['POST'])
 def run_tests():
-    """Run pytest scripts"""
+    """Run pytest scripts against uploaded files (by batch ID, upload ID, or the session's latest upload)"""
     try:
+        data = request.get_json(silent=True) or {}
+        upload_id = data.get('upload_id')
+        batch_id = data.get('batch_id')
+        
         # Check if a file has been uploaded
-        if not os.path.exists('current_file.txt'):
-            return jsonify({'error': 'No file uploaded. Please upload a file first.'}), 400
+        if batch_id:
+            uploads = upload_registry.get_batch(batch_id)
+            if not uploads:
+                return jsonify({'error': f'Unknown or expired batch ID: {batch_id}. Please upload the files again.'}), 404
+            if not all(os.path.exists(upload['filepath']) for upload in uploads):
+                return jsonify({'error': f'Files of batch {batch_id} were removed. Please upload the files again.'}), 410
+        elif upload_id:
+            upload = upload_registry.get(upload_id)
+            if not upload:
+                return jsonify({'error': f'Unknown upload ID: {upload_id}'}), 404
+            uploads = [upload]
+        else:
+            upload = upload_registry.latest(get_session_id())
+            if not upload:
+                return jsonify({'error': 'No file uploaded. Please upload a file first.'}), 400
+            uploads = [upload]
+        
+        if not all(os.path.exists(upload['filepath']) for upload in uploads):
+            return jsonify({'error': 'Uploaded file not found. Please upload a file again.'}), 400
+        tested = describe_tested_files(uploads, batch_id)
         
-        with open('current_file.txt', 'r') as f:
-            current_file = f.read().strip()
+        # Warm mode hands the run to the long-lived browser pool instead of pytest
+        mode = data.get('mode') or Config.RUN_MODE
+        if mode not in ('pytest', 'warm'):
+            return jsonify({'error': "mode must be 'pytest' or 'warm'"}), 400
         
-        if not os.path.exists(current_file):
-            return jsonify({'error': 'Uploaded file not found. Please upload a file again.'}), 400
+        # Reject bad options before the run is recorded
+        try:
+            parse_run_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Every row of this run is recorded in the results store under one ID
+        run_id = new_run_id()
+        if Config.RESULTS_STORE_ENABLED:
+            results_store.start_run(run_id, mode, ', '.join(upload['filename'] for upload in uploads))
+        
+        if mode == 'warm':
+            return run_tests_on_pool(uploads, data, run_id, tested)
         
-        # Create a simple test file if it doesn't exist
+        # Without the grading tests only the data checks can run, and they need no pytest
         test_file = 'tests/test_grading.py'
         if not os.path.exists(test_file):
-            create_sample_test_file(test_file, current_file)
+            return run_validation(uploads, run_id, tested)
+        
+        # Scope the run to this workbook and the requested mentors/questions
+        try:
+            command = build_pytest_command(test_file, [upload['filepath'] for upload in uploads], data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Record start time
         start_time = time.time()
         
-        # Run pytest
+        # Run pytest, its output goes straight to the run's log files
         try:
-            result = subprocess.run(
-                ['python', '-m', 'pytest', test_file, '-v', '--tb=short', '-n=auto'],
-                capture_output=True,
-                text=True,
-                timeout=3600  # 60 minute timeout
-            )
+            os.makedirs(Config.RUN_LOGS_DIR, exist_ok=True)
+            with open(run_log_path(run_id, 'stdout'), 'w', encoding='utf-8') as stdout, \
+                    open(run_log_path(run_id, 'stderr'), 'w', encoding='utf-8') as stderr:
+                result = subprocess.run(
+                    command,
+                    stdout=stdout,
+                    stderr=stderr,
+                    text=True,
+                    timeout=Config.TEST_RUN_TIMEOUT,
+                    env={**os.environ, 'UAT_RUN_ID': run_id}
+                )
             
             end_time = time.time()
             duration = round(end_time - start_time, 2)
@@ -159,134 +382,282 @@ def run_tests():
             success = result.returncode == 0
             
             # Generate summary
-            test_summary = generate_test_summary(result.stdout, result.stderr, success)
+            with open(run_log_path(run_id, 'stdout'), encoding='utf-8', errors='replace') as stdout:
+                test_summary = generate_test_summary(stdout, success)
             
             return jsonify({
                 'success': success,
                 'exit_code': result.returncode,
-                'stdout': result.stdout,
-                'stderr': result.stderr,
+                **run_log_payload(run_id),
                 'duration': duration,
                 'test_summary': test_summary,
-                'file_tested': current_file
+                **tested,
+                'run_id': run_id
             }), 200
             
         except subprocess.TimeoutExpired:
-            return jsonify({'error': 'Test execution timed out (60s limit)'}), 500
+            return jsonify({'error': f'Test execution timed out ({Config.TEST_RUN_TIMEOUT}s limit)'}), 500
         except FileNotFoundError:
             return jsonify({'error': 'pytest not found. Please install pytest: pip install pytest'}), 500
         
     except Exception as e:
         return jsonify({'error': f'Test execution failed: {str(e)}'}), 500
 
-def create_sample_test_file(test_file, excel_file):
-    """Create a sample pytest file for testing Excel files"""
-    test_content = f'''
-import pytest
-import pandas as pd
-import os
+def parse_run_options(options):
+    """
+    Validate the run options sent to /run-tests
+    
+    Args:
+        options (dict): mentors (list or comma-separated str), questions (e.g. "1-10"),
+            question_delay (seconds), grader ("gemini" or "local"), changed_only (bool),
+            workers ("auto" or 1-Config.MAX_TEST_WORKERS, pytest mode only)
+    
+    Returns:
+        dict: mentors (list or None), question_range (tuple or None), question_delay (float or None),
+            grader (str or None), changed_only (bool), workers (str)
+    
+    Raises:
+        ValueError: If an option is invalid
+    """
+    mentors = options.get('mentors')
+    if mentors:
+        if isinstance(mentors, str):
+            mentors = mentors.split(',')
+        mentors = [str(name).strip() for name in mentors if str(name).strip()]
+    
+    question_range = parse_question_range(options.get('questions'))
+    
+    question_delay = options.get('question_delay')
+    if question_delay is not None:
+        try:
+            question_delay = float(question_delay)
+        except (TypeError, ValueError):
+            raise ValueError('question_delay must be a number of seconds')
+        if not math.isfinite(question_delay) or question_delay < 0:
+            raise ValueError('question_delay must be 0 or more seconds')
+    
+    grader = options.get('grader')
+    if grader:
+        grader = str(grader).strip().lower()
+        if grader not in GRADERS:
+            raise ValueError(f"grader must be one of: {', '.join(sorted(GRADERS))}")
+    
+    changed_only = options.get('changed_only', False)
+    if not isinstance(changed_only, bool):
+        raise ValueError('changed_only must be true or false')
+    
+    workers = str(options.get('workers') or Config.TEST_WORKERS)
+    if workers != 'auto' and not (workers.isdigit() and 1 <= int(workers) <= Config.MAX_TEST_WORKERS):
+        raise ValueError(f"workers must be 'auto' or 1-{Config.MAX_TEST_WORKERS}")
+    
+    return {
+        'mentors': mentors or None,
+        'question_range': question_range,
+        'question_delay': question_delay,
+        'grader': grader or None,
+        'changed_only': changed_only,
+        'workers': workers,
+    }
 
-EXCEL_FILE = r"{excel_file}"
+def describe_tested_files(uploads, batch_id=None):
+    """The response fields naming what a run tested: one upload, or every upload of a batch"""
+    if batch_id:
+        return {
+            'batch_id': batch_id,
+            'upload_ids': [upload['upload_id'] for upload in uploads],
+            'files_tested': [upload['filepath'] for upload in uploads]
+        }
+    return {'upload_id': uploads[0]['upload_id'], 'file_tested': uploads[0]['filepath']}
 
-class TestExcelFile:
-    """Test cases for the uploaded Excel file"""
+def build_pytest_command(test_file, excel_files, options):
+    """
+    Build the pytest command line for one run
     
-    def test_file_exists(self):
-        """Test that the Excel file exists"""
-        assert os.path.exists(EXCEL_FILE), f"Excel file does not exist: {{EXCEL_FILE}}"
+    Args:
+        test_file (str): The pytest file to run
+        excel_files (list): The uploaded workbooks, each passed to conftest.py as --uat-file
+        options (dict): Request options, see parse_run_options
     
-    def test_file_readable(self):
-        """Test that the Excel file can be read"""
-        try:
-            df = pd.read_excel(EXCEL_FILE)
-            assert df is not None, "Failed to read Excel file"
-        except Exception as e:
-            pytest.fail(f"Could not read Excel file: {{e}}")
+    Raises:
+        ValueError: If an option is invalid
+    """
+    run_options = parse_run_options(options)
     
-    def test_file_not_empty(self):
-        """Test that the Excel file is not empty"""
-        df = pd.read_excel(EXCEL_FILE)
-        assert len(df) > 0, "Excel file is empty (no data rows)"
-        assert len(df.columns) > 0, "Excel file has no columns"
+    command = ['python', '-m', 'pytest', test_file, '-v', '--tb=short', f"-n={run_options['workers']}"]
+    command += [f'--uat-file={excel_file}' for excel_file in excel_files]
     
-    def test_data_integrity(self):
-        """Test basic data integrity"""
-        df = pd.read_excel(EXCEL_FILE)
-        
-        # Check for duplicate rows
-        duplicate_count = df.duplicated().sum()
-        
-        # Check for completely empty rows
-        empty_rows = df.isnull().all(axis=1).sum()
-        
-        # Log findings (these are warnings, not failures)
-        if duplicate_count > 0:
-            print(f"Warning: Found {{duplicate_count}} duplicate rows")
-        
-        if empty_rows > 0:
-            print(f"Warning: Found {{empty_rows}} completely empty rows")
-        
-        # This test passes but logs warnings
-        assert True, f"Data integrity check completed. Duplicates: {{duplicate_count}}, Empty rows: {{empty_rows}}"
+    if run_options['mentors']:
+        command.append('--mentors=' + ','.join(run_options['mentors']))
+    if run_options['question_range']:
+        first, last = run_options['question_range']
+        command.append(f"--questions={first}-{last or ''}")
+    if run_options['question_delay'] is not None:
+        command.append(f"--question-delay={run_options['question_delay']}")
+    if run_options['grader']:
+        command.append(f"--grader={run_options['grader']}")
+    if run_options['changed_only']:
+        command.append('--changed-only')
     
-    def test_column_headers(self):
-        """Test that columns have proper headers"""
-        df = pd.read_excel(EXCEL_FILE)
-        
-        # Check for unnamed columns
-        unnamed_cols = [col for col in df.columns if str(col).startswith('Unnamed:')]
-        
-        if unnamed_cols:
-            print(f"Warning: Found unnamed columns: {{unnamed_cols}}")
-        
-        # Test passes if we have at least one properly named column
-        named_cols = [col for col in df.columns if not str(col).startswith('Unnamed:')]
-        assert len(named_cols) > 0, "No properly named columns found"
+    return command
+
+def run_tests_on_pool(uploads, options, run_id=None, tested=None):
+    """Run uploaded workbooks on the warm worker pool and report like a pytest run"""
+    try:
+        run_options = parse_run_options(options)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    def test_data_types(self):
-        """Test data types in the Excel file"""
-        df = pd.read_excel(EXCEL_FILE)
-        
-        # Get info about data types
-        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        text_cols = df.select_dtypes(include=['object']).columns.tolist()
-        date_cols = df.select_dtypes(include=['datetime']).columns.tolist()
-        
-        print(f"Numeric columns: {{len(numeric_cols)}}")
-        print(f"Text columns: {{len(text_cols)}}")
-        print(f"Date columns: {{len(date_cols)}}")
-        
-        # Test passes if we have any recognizable data types
-        total_typed_cols = len(numeric_cols) + len(text_cols) + len(date_cols)
-        assert total_typed_cols > 0, "No recognizable data types found"
+    start_time = time.time()
+    results = []
+    try:
+        for upload in uploads:
+            results += get_worker_pool().run(
+                upload['filepath'],
+                mentor_names=run_options['mentors'],
+                question_range=run_options['question_range'],
+                question_delay=run_options['question_delay'],
+                grader=run_options['grader'],
+                run_id=run_id,
+                changed_only=run_options['changed_only'],
+            )
+    except FuturesTimeoutError:
+        return jsonify({'error': f'Test execution timed out ({Config.TEST_RUN_TIMEOUT}s limit)'}), 500
+    duration = round(time.time() - start_time, 2)
+    
+    success = bool(results) and all(r['failed'] == 0 and not r['error'] for r in results)
+    run_id = run_id or new_run_id()
+    os.makedirs(Config.RUN_LOGS_DIR, exist_ok=True)
+    with open(run_log_path(run_id, 'stdout'), 'w', encoding='utf-8') as stdout:
+        stdout.writelines(r['output'] + '\n' for r in results)
+    with open(run_log_path(run_id, 'stderr'), 'w', encoding='utf-8') as stderr:
+        stderr.writelines(f"{r['state_name']}: {r['error']}\n" for r in results if r['error'])
+    
+    return jsonify({
+        'success': success,
+        'exit_code': 0 if success else 1,
+        **run_log_payload(run_id),
+        'duration': duration,
+        'test_summary': generate_pool_summary(results, success),
+        **(tested or describe_tested_files(uploads)),
+        'run_id': run_id
+    }), 200
 
-def test_file_summary():
-    """Generate a summary of the Excel file"""
-    df = pd.read_excel(EXCEL_FILE)
+def generate_pool_summary(results, success):
+    """Generate a human-readable summary of a warm pool run"""
+    summary = ["✅ All mentors processed successfully!" if success else "❌ Some mentors had failures."]
     
-    print("\\n" + "="*50)
-    print("EXCEL FILE SUMMARY")
-    print("="*50)
-    print(f"File: {{os.path.basename(EXCEL_FILE)}}")
-    print(f"Rows: {{len(df)}}")
-    print(f"Columns: {{len(df.columns)}}")
-    print(f"Size: {{df.shape}}")
-    print("\\nColumn Names:")
-    for i, col in enumerate(df.columns, 1):
-        print(f"  {{i}}. {{col}}")
+    if results:
+        summary.append("\nMentor Results:")
+        for r in results:
+            status = 'PASSED' if r['failed'] == 0 and not r['error'] else 'FAILED'
+            summary.append(f"  {r['state_name']}: {status} - processed {r['processed']}, "
+                           f"failed {r['failed']} ({r['duration']}s)")
+    else:
+        summary.append("\nNo mentors or questions found in the workbook.")
     
-    if len(df) > 0:
-        print("\\nFirst few rows:")
-        print(df.head(3).to_string())
+    passed_count = sum(1 for r in results if r['failed'] == 0 and not r['error'])
+    summary.append(f"\nTotal: {len(results)} mentors")
+    summary.append(f"Passed: {passed_count}")
+    summary.append(f"Failed: {len(results) - passed_count}")
     
-    print("="*50)
-'''
+    return '\n'.join(summary)
+
+def run_validation(uploads, run_id, tested=None):
+    """Run the data checks on uploaded workbooks and report like a pytest run"""
+    start_time = time.time()
+    reports = [validate_workbook(upload['filepath']) for upload in uploads]
+    duration = round(time.time() - start_time, 2)
+    success = all(report['valid'] for report in reports)
     
-    with open(test_file, 'w') as f:
-        f.write(test_content)
+    return jsonify({
+        'success': success,
+        'exit_code': 0 if success else 1,
+        'duration': duration,
+        'test_summary': '\n\n'.join(
+            (f"{report['file']}\n" if len(reports) > 1 else '') + generate_validation_summary(report)
+            for report in reports
+        ),
+        'validation': reports[0] if len(reports) == 1 else reports,
+        **(tested or describe_tested_files(uploads)),
+        'run_id': run_id
+    }), 200
 
-def generate_test_summary(stdout, stderr, success):
-    """Generate a human-readable test summary"""
+def generate_validation_summary(report):
+    """Generate a human-readable summary of a workbook validation report"""
+    summary = ["✅ Workbook passed all data checks!" if report['valid'] else "❌ Workbook failed some data checks."]
+    
+    if report['sheets']:
+        summary.append("\nSheets:")
+        for sheet in report['sheets']:
+            counts = sheet['dtype_counts']
+            summary.append(f"  {sheet['name']}: {sheet['rows']} rows, {sheet['columns']} columns "
+                           f"({counts['numeric']} numeric, {counts['text']} text, {counts['date']} date)")
+    if report['errors']:
+        summary.append("\nErrors:")
+        summary.extend(f"  {error}" for error in report['errors'])
+    if report['warnings']:
+        summary.append("\nWarnings:")
+        summary.extend(f"  {warning}" for warning in report['warnings'])
+    
+    return '\n'.join(summary)
+
+def run_log_path(run_id, stream):
+    """The file a run's stdout or stderr is written to"""
+    return os.path.join(Config.RUN_LOGS_DIR, f"{run_id}.{stream}.log")
+
+def read_log_tail(path, limit):
+    """
+    Read the last characters of a log
+    
+    Returns:
+        (str, bool): About the last limit characters, and whether the log is longer
+    """
+    if not os.path.exists(path):
+        return '', False
+    size = os.path.getsize(path)
+    # A character is at most 4 bytes in UTF-8
+    start = max(0, size - limit * 4)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read().decode('utf-8', errors='ignore')
+    return text[-limit:], start > 0 or len(text) > limit
+
+def read_log_page(path, offset, limit):
+    """
+    Read up to limit bytes of a log from a byte offset
+    
+    Returns:
+        (str, int): The text and the offset of the next page; a character split
+            by the page boundary is left for the next page
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(limit)
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.reason == 'unexpected end of data' and e.start > 0:
+            data = data[:e.start]
+        text = data.decode('utf-8', errors='replace')
+    return text, offset + len(data)
+
+def run_log_payload(run_id):
+    """The stdout/stderr fields of a /run-tests response: the end of each log and where to page the rest"""
+    payload = {'logs_url': f'/run-logs/{run_id}'}
+    for stream in ('stdout', 'stderr'):
+        text, truncated = read_log_tail(run_log_path(run_id, stream), Config.RUN_LOG_PAYLOAD_CHARS)
+        payload[stream] = text
+        payload[f'{stream}_truncated'] = truncated
+    return payload
+
+def generate_test_summary(stdout, success):
+    """
+    Generate a human-readable test summary
+    
+    Args:
+        stdout: The pytest output, any iterable of lines (such as the open log file)
+        success (bool): Whether pytest exited with 0
+    """
     summary = []
     
     if success:
@@ -295,28 +666,60 @@ def generate_test_summary(stdout, stderr, success):
         summary.append("❌ Some tests failed.")
     
     # Extract test results from stdout
-    lines = stdout.split('\n')
     test_results = []
+    passed_count = 0
+    failed_count = 0
     
-    for line in lines:
+    for line in stdout:
         if '::' in line and ('PASSED' in line or 'FAILED' in line):
             test_results.append(line.strip())
+        passed_count += line.count('PASSED')
+        failed_count += line.count('FAILED')
     
     if test_results:
         summary.append("\nTest Results:")
         for result in test_results:
             summary.append(f"  {result}")
     
-    # Count passed/failed
-    passed_count = stdout.count('PASSED')
-    failed_count = stdout.count('FAILED')
-    
     summary.append(f"\nTotal: {passed_count + failed_count} tests")
     summary.append(f"Passed: {passed_count}")
     summary.append(f"Failed: {failed_count}")
     
     return '\n'.join(summary)
 
+@app.route('/run-logs/<run_id>', methods=['GET'])
+def run_logs(run_id):
+    """Page through a run's full output (?stream=stdout|stderr&offset=<byte>&limit=<bytes>)"""
+    try:
+        stream = request.args.get('stream', 'stdout')
+        if stream not in ('stdout', 'stderr'):
+            return jsonify({'error': "stream must be 'stdout' or 'stderr'"}), 400
+        if not re.fullmatch(r'[\w-]+', run_id):
+            return jsonify({'error': 'Invalid run ID'}), 400
+        
+        path = run_log_path(run_id, stream)
+        if not os.path.exists(path):
+            return jsonify({'error': f'No logs for run {run_id}'}), 404
+        
+        offset = request.args.get('offset', 0, type=int)
+        limit = min(request.args.get('limit', Config.RUN_LOG_PAGE_BYTES, type=int), Config.RUN_LOG_PAGE_BYTES)
+        if offset < 0 or limit < 1:
+            return jsonify({'error': 'offset must be 0 or more and limit at least 1'}), 400
+        
+        size = os.path.getsize(path)
+        content, next_offset = read_log_page(path, offset, limit)
+        return jsonify({
+            'run_id': run_id,
+            'stream': stream,
+            'offset': offset,
+            'next_offset': next_offset,
+            'size': size,
+            'eof': next_offset >= size,
+            'content': content
+        }), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to read logs: {str(e)}'}), 500
+
 @app.route('/list-output-files', methods=['GET'])
 def list_output_files():
     """List all files in the output directory"""
@@ -369,6 +772,66 @@ def download_output_file(filename):
     except Exception as e:
         abort(500, description=f"Download failed: {str(e)}")
 
+@app.route('/runs', methods=['GET'])
+def list_runs():
+    """List recent runs from the results store with their counts and average score"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify({'runs': results_store.list_runs(limit)}), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to list runs: {str(e)}'}), 500
+
+@app.route('/runs/<run_id>', methods=['GET'])
+def run_details(run_id):
+    """Per-state counts and average scores of one run"""
+    try:
+        states = results_store.run_summary(run_id)
+        if not states:
+            return jsonify({'error': f'Unknown run or no results yet: {run_id}'}), 404
+        return jsonify({'run_id': run_id, 'states': states}), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to load run: {str(e)}'}), 500
+
+@app.route('/runs/<run_id>/export', methods=['GET'])
+def export_run(run_id):
+    """Download a run (optionally one ?state=) as an xlsx with one sheet per state"""
+    try:
+        state_name = request.args.get('state')
+        workbook = results_store.export_xlsx(run_id, state_name)
+        if workbook is None:
+            return jsonify({'error': f'No results for run {run_id}'}), 404
+        
+        filename = secure_filename(f"run_{run_id}{'_' + state_name if state_name else ''}.xlsx")
+        return send_file(
+            workbook,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    except Exception as e:
+        return jsonify({'error': f'Export failed: {str(e)}'}), 500
+
+@app.route('/compare-runs', methods=['GET'])
+def compare_runs():
+    """Score deltas and changed responses between two runs (?base=&head=&threshold=&responses=1)"""
+    try:
+        base = request.args.get('base')
+        head = request.args.get('head')
+        if not base or not head:
+            return jsonify({'error': 'base and head run IDs are required'}), 400
+        
+        threshold = request.args.get('threshold', Config.REGRESSION_THRESHOLD, type=int)
+        if threshold < 0:
+            return jsonify({'error': 'threshold must be a non-negative number of points'}), 400
+        
+        include_responses = request.args.get('responses') == '1'
+        comparison = results_store.compare_runs(base, head, threshold, include_responses)
+        if request.args.get('only') == 'regressions':
+            comparison['rows'] = [row for row in comparison['rows'] if row['regression']]
+        return jsonify(comparison), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to compare runs: {str(e)}'}), 500
+
 @app.route('/list-template-files', methods=['GET'])
 def list_template_files():
     """List all template files available for download"""
@@ -497,28 +960,18 @@ def download_template_file(filename):
 
 @app.route('/clear-uploads', methods=['POST'])
 def clear_uploads():
-    """Clear all files from the uploads folder"""
+    """Clear this session's files from the uploads folder in the background"""
     try:
-        # Get all files in the uploads folder
-        upload_files = glob.glob(os.path.join(UPLOAD_FOLDER, '*'))
-        cleared_count = 0
-        
-        for file_path in upload_files:
-            try:
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-                    cleared_count += 1
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-                    cleared_count += 1
-            except Exception as e:
-                print(f"Warning: Could not remove {file_path}: {str(e)}")
+        # Only the caller's uploads, other sessions may still be testing theirs
+        upload_files = [upload['filepath'] for upload in upload_registry.remove_session(get_session_id())]
+        job_id = janitor.submit('clear_uploads', remove_paths, upload_files)
         
         return jsonify({
             'success': True,
-            'message': f'Cleared {cleared_count} items from uploads folder',
-            'cleared_count': cleared_count
-        }), 200
+            'message': f'Clearing {len(upload_files)} items from uploads folder',
+            'job_id': job_id,
+            'status_url': f'/jobs/{job_id}'
+        }), 202
         
     except Exception as e:
         return jsonify({
@@ -526,10 +979,43 @@ def clear_uploads():
             'error': f'Failed to clear uploads folder: {str(e)}'
         }), 500
 
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Recent background jobs (upload clearing, retention sweeps), newest first"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify({'jobs': janitor.job_store.recent(limit)}), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to list jobs: {str(e)}'}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status of a background job: queued, running, done (with its result) or failed"""
+    try:
+        job = janitor.job_store.get(job_id)
+        if not job:
+            return jsonify({'error': f'Unknown job ID: {job_id}'}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to load job: {str(e)}'}), 500
+
+@app.route('/retention/sweep', methods=['POST'])
+def run_retention_sweep():
+    """Prune uploads, outputs, reports and run logs to their policies now"""
+    try:
+        job_id = janitor.submit('retention', retention_sweep)
+        return jsonify({'job_id': job_id, 'status_url': f'/jobs/{job_id}'}), 202
+    except Exception as e:
+        return jsonify({'error': f'Failed to start retention sweep: {str(e)}'}), 500
+
 if __name__ == '__main__':
     print("Starting Excel Upload & Test Runner Server...")
     print("Server will be available at: http://localhost:5000")
     print("Make sure you have the required packages installed:")
     print("  pip install flask flask-cors pandas openpyxl pytest")
+    print("This is the development server; use 'python wsgi.py' or")
+    print("'gunicorn -c gunicorn.conf.py wsgi:app' to serve multiple users.")
     
+    # Pick up edits to the front-end files without restarting
+    static_assets.reload_on_change = True
     app.run(debug=True, host='0.0.0.0', port=5000)
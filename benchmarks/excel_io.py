@@ -0,0 +1,163 @@
+"""
+The Excel reader and writer paths measured by test_excel_io.py, and synthetic UAT
+workbooks to run them on.
+
+Each operation can also run on its own in a fresh interpreter, which is how the
+benchmarks measure its peak RSS without the rest of the test session in it:
+
+    python -m benchmarks.excel_io read_questions uploads/synthetic_10000.xlsx 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+import openpyxl
+
+from benchmarks.memory import peak_rss_mb
+from pages.grading_page import GradingPage
+from utils.excel_read import create_state_output_file, preview_workbook, save_state_workbook
+from utils.orchestrator import StateWriter
+
+TEXT_SIZE = 1000  # characters per question and per response
+PER_ROW_SAVE_MAX_ROWS = 1000  # saving after every row is quadratic, larger sizes take hours
+
+WORDS = (
+    "leasehold estate periodic tenancy licence exam course instructor practice question "
+    "property contract disclosure escrow appraisal mortgage broker agent commission"
+).split()
+
+
+def long_text(seed, size=TEXT_SIZE):
+    """Deterministic text of exactly size characters that differs per seed"""
+    words, i = [f"#{seed}"], seed
+    length = len(words[0])
+    while length < size:
+        i = (i * 1103515245 + 12345) % (1 << 31)
+        word = WORDS[i % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def write_synthetic_workbook(path, rows, text_size=TEXT_SIZE):
+    """
+    Write a UAT workbook with rows long questions; Queries is the first sheet, so
+    the upload preview reads it as well
+
+    Returns:
+        str: The workbook path
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    queries = workbook.create_sheet("Queries")
+    queries.append(["Question", "Expected Answer", "Category"])
+    for i in range(rows):
+        queries.append([long_text(i, text_size), long_text(rows + i, text_size), WORDS[i % len(WORDS)]])
+
+    urls = workbook.create_sheet("LLM-Url")
+    urls.append(["State", "Mentor URL"])
+    urls.append(["Synthetic", "http://127.0.0.1:8765/mentor/Synthetic"])
+
+    workbook.save(path)
+    return str(path)
+
+
+def _graded_result(i):
+    return {
+        'evaluation': None, 'score': 70 + i % 30, 'error': None,
+        'rubric': {'accuracy': 3, 'completeness': 2, 'clarity': 4, 'tone': 3},
+    }
+
+
+def _write_rows(workbook, sheet, file_path, rows, save_every_row):
+    for i in range(rows):
+        row = i + 2
+        GradingPage.write_scrape_result(sheet, row, long_text(i), long_text(rows + i))
+        GradingPage.write_grade_result(sheet, row, _graded_result(i))
+        if save_every_row:
+            save_state_workbook(workbook, file_path)
+    save_state_workbook(workbook, file_path)
+    workbook.close()
+
+
+def create_output_file(workbook_path, rows):
+    """create_state_output_file: a new state workbook with its headers"""
+    workbook, _, _ = create_state_output_file("Synthetic")
+    workbook.close()
+
+
+def write_save_per_row(workbook_path, rows):
+    """process_mentor_questions: write a graded row, save_state_workbook the whole workbook, repeat"""
+    workbook, sheet, file_path = create_state_output_file("Synthetic")
+    _write_rows(workbook, sheet, file_path, rows, save_every_row=True)
+
+
+def write_save_interval(workbook_path, rows):
+    """The orchestrator's StateWriter: save at most every Config.WORKBOOK_SAVE_INTERVAL seconds"""
+    writer = StateWriter("Synthetic")
+    for i in range(rows):
+        writer.write_response(i + 2, long_text(i), long_text(rows + i))
+        writer.write_grade(i + 2, _graded_result(i))
+    writer.close()
+
+
+def write_save_once(workbook_path, rows):
+    """Write every row, then save once with save_state_workbook: the lower bound for the writers"""
+    workbook, sheet, file_path = create_state_output_file("Synthetic")
+    _write_rows(workbook, sheet, file_path, rows, save_every_row=False)
+
+
+def read_questions(workbook_path, rows):
+    """read_questions_from_template over the whole Queries sheet"""
+    questions = GradingPage(None).read_questions_from_template(workbook_path, (1, None))
+    assert len(questions) == rows, f"read {len(questions)} of {rows} questions"
+
+
+def read_upload_preview(workbook_path, rows):
+    """The /upload preview: pd.read_excel of the first sheet"""
+    preview = preview_workbook(workbook_path)
+    assert preview['rows'] == rows, f"previewed {preview['rows']} of {rows} rows"
+
+
+OPERATIONS = {
+    "create_output_file": create_output_file,
+    "write_save_per_row": write_save_per_row,
+    "write_save_interval": write_save_interval,
+    "write_save_once": write_save_once,
+    "read_questions": read_questions,
+    "read_upload_preview": read_upload_preview,
+}
+
+
+def run_quietly(operation, workbook_path, rows):
+    """Run an operation with its diagnostics prints discarded"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        OPERATIONS[operation](workbook_path, rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one Excel operation and report its time and peak RSS")
+    parser.add_argument("operation", choices=sorted(OPERATIONS))
+    parser.add_argument("workbook", help="Synthetic UAT workbook (written first if it does not exist)")
+    parser.add_argument("rows", type=int)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.workbook):
+        write_synthetic_workbook(args.workbook, args.rows)
+
+    import pandas  # noqa: F401  loaded lazily by preview_workbook, keep it out of the measurement
+
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    run_quietly(args.operation, args.workbook, args.rows)
+    print(json.dumps({
+        "seconds": time.perf_counter() - started,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
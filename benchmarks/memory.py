@@ -0,0 +1,101 @@
+"""
+Memory measurements for the benchmarks: resident set size of this process and
+everything it started (Playwright drivers and Chromium).
+"""
+import os
+import sys
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _proc_tree_rss(root_pid):
+    """Linux fallback without psutil: walk /proc for the descendants of root_pid"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The process name may contain spaces, the fields after it do not
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, pending = 0, [root_pid]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            pass
+        pending.extend(children.get(pid, []))
+    return total
+
+
+def process_tree_rss_mb():
+    """Current RSS of this process and its descendants in MB, or None if unsupported"""
+    if psutil is not None:
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+    if sys.platform.startswith("linux"):
+        return _proc_tree_rss(os.getpid()) / (1024 * 1024)
+    return None
+
+
+def peak_rss_mb():
+    """Peak RSS of this process over its lifetime in MB, or None on Windows"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler:
+    """
+    Samples process_tree_rss_mb in the background while the block runs.
+
+        with RssSampler() as sampler:
+            run()
+        sampler.peak_mb
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while True:
+            rss = process_tree_rss_mb()
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0, rss)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if self.peak_mb is not None:
+            self.peak_mb = round(self.peak_mb, 1)
@@ -0,0 +1,230 @@
+"""
+Offline stand-in for a mentor site, for reproducible benchmarks without the live
+site or an API key.
+
+Serves the same contract navigate_to_mentor_api relies on: a
+textarea[data-testid="user-prompt-textarea"] that sends the question on Enter,
+and a copy button ([prop-events-value-onclick="handleCopyResponseBtnClick"]) that
+puts the answer on the clipboard. Answer latency and size are configurable per
+server or per mentor URL (?latency=<seconds>&size=<characters>).
+
+Like the live site, the server can redirect a mentor URL to its chat route
+(redirect=True), and it sends a request carrying EXPIRED_SESSION_COOKIE to a
+login page, for checking how saved sessions are handled.
+
+    python -m benchmarks.mock_mentor --port 8765 --latency 1.5 --size 2000
+"""
+import argparse
+import hashlib
+import html
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import openpyxl
+
+from utils.graders import LocalGrader
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>Mock mentor {mentor}</title></head>
+<body>
+    <textarea data-testid="user-prompt-textarea" rows="4" cols="80"></textarea>
+    <div id="response"></div>
+    <button prop-events-value-onclick="handleCopyResponseBtnClick" hidden>Copy</button>
+    <script>
+        const config = {config};
+        const box = document.querySelector('[data-testid="user-prompt-textarea"]');
+        const copyButton = document.querySelector('[prop-events-value-onclick="handleCopyResponseBtnClick"]');
+        const output = document.getElementById('response');
+
+        box.addEventListener('keydown', async (event) => {{
+            if (event.key !== 'Enter' || event.shiftKey) return;
+            event.preventDefault();
+            copyButton.hidden = true;
+            const params = new URLSearchParams({{...config, q: box.value}});
+            const response = await fetch('/answer?' + params);
+            output.textContent = (await response.json()).answer;
+            copyButton.hidden = false;
+        }});
+
+        copyButton.addEventListener('click', () => navigator.clipboard.writeText(output.textContent));
+    </script>
+</body>
+</html>
+"""
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="UTF-8"><title>Sign in</title></head>
+<body><form method="post"><input name="user"><input name="password" type="password"></form></body>
+</html>
+"""
+
+# A session the mock site no longer accepts
+EXPIRED_SESSION_COOKIE = "session=expired"
+
+FILLER = (
+    "You should review the course material for this topic and practise with the "
+    "sample questions. Feel free to contact your instructor if anything is unclear. "
+)
+
+
+def mock_answer(mentor, question, size):
+    """A deterministic answer of about size characters, unique per mentor and question"""
+    digest = hashlib.sha256(f"{mentor}\0{question}".encode("utf-8")).hexdigest()[:12]
+    answer = f"Great question! About '{question}' ({mentor}, ref {digest}): "
+    while len(answer) < size:
+        answer += FILLER
+    return answer[:max(size, 1)]
+
+
+class MockMentorHandler(BaseHTTPRequestHandler):
+    def _send(self, status, content_type, body):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        latency = float(params.get("latency", self.server.latency))
+        size = int(params.get("size", self.server.size))
+
+        if url.path == "/login":
+            self.server.count_login()
+            self._send(200, "text/html; charset=utf-8", LOGIN_PAGE)
+        elif url.path.startswith("/mentor/") and EXPIRED_SESSION_COOKIE in self.headers.get("Cookie", ""):
+            self._redirect("/login?next=" + quote(self.path, safe=""))
+        elif url.path.startswith("/mentor/"):
+            mentor = url.path[len("/mentor/"):]
+            if self.server.redirect:
+                if not mentor.endswith("/chat/"):
+                    self._redirect(f"/mentor/{mentor}/chat/" + (f"?{url.query}" if url.query else ""))
+                    return
+                mentor = mentor[:-len("/chat/")]
+            mentor = mentor or "default"
+            # Escaped so a mentor name cannot close the script element
+            config = json.dumps({"mentor": mentor, "latency": latency, "size": size}).replace("</", "<\\/")
+            self._send(200, "text/html; charset=utf-8", PAGE.format(mentor=html.escape(mentor), config=config))
+        elif url.path == "/answer":
+            self.server.count_answer()
+            time.sleep(latency)
+            answer = mock_answer(params.get("mentor", "default"), params.get("q", ""), size)
+            self._send(200, "application/json", json.dumps({"answer": answer}))
+        else:
+            self._send(404, "text/plain", "Not found")
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+
+class MockMentorServer(ThreadingHTTPServer):
+    """Threaded mock mentor site; every /mentor/<name> URL is a separate mentor."""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, size=500, redirect=False):
+        super().__init__(("127.0.0.1", port), MockMentorHandler)
+        self.latency = latency
+        self.size = size
+        self.redirect = redirect
+        self.answers = 0
+        self.logins = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def mentor_url(self, name):
+        return f"{self.base_url}/mentor/{name}"
+
+    def count_answer(self):
+        with self._lock:
+            self.answers += 1
+
+    def count_login(self):
+        with self._lock:
+            self.logins += 1
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def write_mock_workbook(path, server, mentors, questions):
+    """
+    Write a UAT workbook whose LLM-Url sheet points at the mock server
+
+    Returns:
+        str: The workbook path
+    """
+    workbook = openpyxl.Workbook()
+    urls = workbook.active
+    urls.title = "LLM-Url"
+    urls.append(["State", "Mentor URL"])
+    for mentor in mentors:
+        urls.append([mentor, server.mentor_url(mentor)])
+
+    queries = workbook.create_sheet("Queries")
+    queries.append(["Question"])
+    for question in questions:
+        queries.append([question])
+
+    workbook.save(path)
+    return str(path)
+
+
+class SlowLocalGrader(LocalGrader):
+    """The offline grader with an artificial per-request delay, to stand in for LLM latency."""
+
+    name = "local"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def grade(self, question, response):
+        time.sleep(self.latency)
+        return super().grade(question, response)
+
+    def grade_batch(self, pairs):
+        time.sleep(self.latency)
+        return super().grade_batch(pairs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve an offline mock mentor site")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds before each answer")
+    parser.add_argument("--size", type=int, default=500, help="Answer length in characters")
+    args = parser.parse_args(argv)
+
+    server = MockMentorServer(args.port, args.latency, args.size)
+    print(f"Mock mentors at {server.mentor_url('<name>')} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Excel I/O benchmarks: time and peak memory of every reader and writer of the UAT
+workbooks on synthetic workbooks of 1k, 10k and 100k rows of long text.
+
+    python -m pytest benchmarks/test_excel_io.py
+
+Time is measured in-process by pytest-benchmark. Peak RSS is measured by running
+the operation again in a fresh interpreter (benchmarks/excel_io.py), recorded in
+extra_info and checked against MEMORY_BUDGETS. The 100k-row cases take several
+minutes (-k "not 100000" to skip them).
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.excel_io import PER_ROW_SAVE_MAX_ROWS, run_quietly, write_synthetic_workbook
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROW_COUNTS = [1000, 10000, 100000]
+
+# Peak RSS budget over the interpreter's baseline: (MB, MB per 1000 rows)
+MEMORY_BUDGETS = {
+    "create_output_file": (10, 0),
+    "write_save_per_row": (10, 8),
+    "write_save_interval": (10, 8),
+    "write_save_once": (10, 8),
+    "read_questions": (10, 2),
+    "read_upload_preview": (10, 4),
+}
+
+WRITERS = ["write_save_per_row", "write_save_interval", "write_save_once"]
+READERS = ["read_questions", "read_upload_preview"]
+
+
+@pytest.fixture(scope="module")
+def workbooks(tmp_path_factory):
+    """Synthetic workbooks by row count, written on first use"""
+    directory = tmp_path_factory.mktemp("workbooks")
+    paths = {}
+
+    def get(rows):
+        if rows not in paths:
+            paths[rows] = write_synthetic_workbook(directory / f"synthetic_{rows}.xlsx", rows)
+        return paths[rows]
+
+    return get
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """State output files go to a temporary directory"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def measure_in_fresh_interpreter(operation, workbook_path, rows, cwd):
+    """Run an operation in a new Python process and report its time and peak RSS."""
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.excel_io", operation, str(workbook_path), str(rows)],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(benchmark, operation, workbook_path, rows, cwd):
+    rounds = 3 if rows <= 1000 and operation != "write_save_per_row" else 1
+    benchmark.pedantic(run_quietly, args=(operation, workbook_path, rows), rounds=rounds, iterations=1)
+
+    probe = measure_in_fresh_interpreter(operation, workbook_path, rows, cwd)
+    used_mb = probe["peak_rss_mb"] - probe["baseline_rss_mb"] if probe["peak_rss_mb"] is not None else None
+    benchmark.extra_info.update({
+        "rows": rows,
+        "peak_rss_mb": probe["peak_rss_mb"],
+        "rss_growth_mb": used_mb,
+    })
+    if benchmark.stats is not None:  # None with --benchmark-disable
+        benchmark.extra_info["rows_per_second"] = round(rows / benchmark.stats["mean"])
+
+    fixed, per_thousand = MEMORY_BUDGETS[operation]
+    if used_mb is not None:
+        assert used_mb < fixed + per_thousand * rows / 1000, f"{operation} grew RSS by {used_mb:.0f} MB"
+
+
+def test_create_output_file(benchmark, workbooks, sandbox):
+    """The headers of a new state workbook, written once per mentor."""
+    run_benchmark(benchmark, "create_output_file", workbooks(ROW_COUNTS[0]), 0, sandbox)
+
+
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+@pytest.mark.parametrize("operation", WRITERS)
+def test_writer(benchmark, workbooks, sandbox, operation, rows):
+    """rows graded answers written to a state workbook with each save strategy."""
+    if operation == "write_save_per_row" and rows > PER_ROW_SAVE_MAX_ROWS:
+        pytest.skip(f"saving after every row is quadratic, only run up to {PER_ROW_SAVE_MAX_ROWS} rows")
+    run_benchmark(benchmark, operation, workbooks(rows), rows, sandbox)
+
+
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+@pytest.mark.parametrize("operation", READERS)
+def test_reader(benchmark, workbooks, sandbox, operation, rows):
+    """A UAT workbook of rows questions read by each reader."""
+    run_benchmark(benchmark, operation, workbooks(rows), rows, sandbox)
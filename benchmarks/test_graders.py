@@ -0,0 +1,55 @@
+"""
+Grading backend benchmarks: throughput and per-call latency of each Grader.
+
+    python -m pytest benchmarks/test_graders.py
+
+The Gemini backend is only benchmarked when GOOGLE_API_KEY is set.
+"""
+import os
+
+import pytest
+
+from utils.graders import GRADERS, get_grader
+
+SAMPLE_PAIRS = [
+    (
+        "What are the leasehold estates?",
+        "Great question! Leasehold estates give you the right to occupy property you rent. "
+        "The four types are the estate for years, the periodic estate, the estate at will "
+        "and the estate at sufferance. Hope this helps!",
+    ),
+    (
+        "Can Kaplan help me form a study group for my exam?",
+        "Kaplan does not organise study groups, but you can use the course forums to find "
+        "other students preparing for the same exam. Good luck with your studies!",
+    ),
+    (
+        "What is the difference between the on-demand course and the live class?",
+        "The on-demand course lets you study at your own pace with recorded lessons, while "
+        "the live class follows a fixed schedule with an instructor you can ask questions.",
+    ),
+]
+
+
+def grade_all(grader):
+    return [grader.grade(question, response) for question, response in SAMPLE_PAIRS]
+
+
+@pytest.mark.parametrize("backend", sorted(GRADERS))
+def test_grader_throughput(benchmark, backend):
+    """Grade the sample pairs; OPS x len(SAMPLE_PAIRS) is pairs per second."""
+    if backend == "gemini" and not os.getenv("GOOGLE_API_KEY"):
+        pytest.skip("GOOGLE_API_KEY not set")
+
+    grader = get_grader(backend)
+    rounds = 20 if backend == "local" else 2
+    evaluations = benchmark.pedantic(grade_all, args=(grader,), rounds=rounds, iterations=1)
+
+    benchmark.extra_info["pairs_per_round"] = len(SAMPLE_PAIRS)
+    assert len(evaluations) == len(SAMPLE_PAIRS)
+
+
+def test_local_grader_is_deterministic():
+    """The offline grader gives identical results for identical input."""
+    grader = get_grader("local")
+    assert grade_all(grader) == grade_all(grader)
@@ -0,0 +1,114 @@
+"""
+End-to-end throughput against the offline mock mentor site (benchmarks/mock_mentor.py)
+with the offline grader, so runs are reproducible without the live site or an API key.
+
+    python -m pytest benchmarks/test_pipeline.py
+
+Needs Playwright's Chromium (playwright install chromium). The orchestrator runs one
+browser per concurrent page, so the 100-page case starts 100 headless browsers;
+skip it on small machines with -k "not 100".
+"""
+import pytest
+
+pytest.importorskip("playwright.sync_api")
+
+from playwright.sync_api import sync_playwright
+
+from benchmarks.memory import RssSampler
+from benchmarks.mock_mentor import MockMentorServer, SlowLocalGrader, write_mock_workbook
+from utils.config import Config
+
+MENTOR_LATENCY = 0.5  # seconds before the mock mentor answers
+ANSWER_SIZE = 2000    # characters per answer
+GRADER_LATENCY = 0.2  # seconds per grading request
+QUESTIONS = [
+    "What are the leasehold estates?",
+    "What is the difference between the on-demand course and the live class?",
+    "How many hours of pre-licensing education do I need?",
+    "Can Kaplan help me form a study group for my exam?",
+    "What steps should I take after obtaining my real estate license?",
+]
+
+
+@pytest.fixture(scope="module")
+def mock_mentor():
+    server = MockMentorServer(latency=MENTOR_LATENCY, size=ANSWER_SIZE).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="module")
+def playwright():
+    with sync_playwright() as playwright:
+        try:
+            playwright.chromium.launch(**Config.get_browser_options("chromium")).close()
+        except Exception as e:
+            pytest.skip(f"Chromium is not available: {e}")
+        yield playwright
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """Output files go to a temporary directory and nothing is added to the results store."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Config, "RESULTS_STORE_ENABLED", False)
+    monkeypatch.setattr(Config, "DEDUP_ENABLED", False)
+    return tmp_path
+
+
+def test_process_mentor_questions(benchmark, mock_mentor, playwright, sandbox):
+    """One page answering every question in turn: the path each pytest worker takes."""
+    from pages.grading_page import GradingPage
+
+    browser = playwright.chromium.launch(**Config.get_browser_options("chromium"))
+    context = browser.new_context(**Config.BROWSER_CONTEXT_ARGS)
+    grading_page = GradingPage(context.new_page())
+    grader = SlowLocalGrader(GRADER_LATENCY)
+
+    def process():
+        return grading_page.process_mentor_questions(
+            mock_mentor.mentor_url("Sequential"), "Sequential", QUESTIONS,
+            model=grader, question_delay=0, run_id="benchmark"
+        )
+
+    try:
+        with RssSampler() as sampler:
+            processed, failed = benchmark.pedantic(process, rounds=3, iterations=1)
+    finally:
+        context.close()
+        browser.close()
+
+    if benchmark.stats is not None:  # None with --benchmark-disable
+        benchmark.extra_info["questions_per_minute"] = round(len(QUESTIONS) / benchmark.stats["mean"] * 60, 1)
+    benchmark.extra_info["peak_rss_mb"] = sampler.peak_mb
+    assert (processed, failed) == (len(QUESTIONS), 0)
+
+
+@pytest.mark.parametrize("pages", [1, 10, 100])
+def test_orchestrator_throughput(benchmark, mock_mentor, playwright, sandbox, pages):
+    """A full sweep over `pages` mentors with one browser page each."""
+    from utils.orchestrator import Orchestrator
+
+    mentors = [f"Mentor{i:03d}" for i in range(pages)]
+    workbook = write_mock_workbook(sandbox / "mock_uat.xlsx", mock_mentor, mentors, QUESTIONS)
+
+    def sweep():
+        return Orchestrator(
+            workbook, mentor_names=mentors, question_delay=0, grader=SlowLocalGrader(GRADER_LATENCY),
+            browsers=pages, grading_workers=max(1, pages // 5)
+        ).run()
+
+    with RssSampler() as sampler:
+        summary = benchmark.pedantic(sweep, rounds=1, iterations=1)
+
+    mentor_rows = summary["mentors"]
+    benchmark.extra_info.update({
+        "pages": pages,
+        "questions": summary["items"],
+        "questions_per_minute": summary["questions_per_minute"],
+        "avg_scrape_seconds": round(sum(m["avg_scrape_seconds"] for m in mentor_rows) / len(mentor_rows), 2),
+        "avg_grade_seconds": round(sum(m["avg_grade_seconds"] for m in mentor_rows) / len(mentor_rows), 2),
+        "peak_rss_mb": sampler.peak_mb,
+    })
+    assert summary["failed"] == 0
+    assert summary["processed"] == pages * len(QUESTIONS)
@@ -0,0 +1,54 @@
+"""
+Results store benchmarks: looking up the unchanged questions of a changed-only run.
+
+    python -m pytest benchmarks/test_results_store.py
+"""
+import pytest
+
+from utils.dedup import text_hash
+from utils.graders import GeminiGrader, LocalGrader
+from utils.results_store import ResultsStore, result_row
+
+QUESTION_COUNT = 1000
+MENTOR_URL = "https://mentor.example/ohio"
+
+
+def graded(score):
+    return {'score': score, 'rubric': {'total': score}, 'evaluation': None, 'error': None}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / "results.db"))
+
+
+def record_run(store, run_id, grader, questions):
+    store.add([
+        result_row(run_id, "Ohio", MENTOR_URL, index, question, "An answer", graded(80), grader=grader)
+        for index, question in enumerate(questions, 1)
+    ])
+
+
+def test_find_unchanged(benchmark, store):
+    """Look up every question of a large Queries sheet; OPS is lookups per second."""
+    questions = [f"Question number {index}?" for index in range(QUESTION_COUNT)]
+    grader = LocalGrader().cache_id
+    record_run(store, "run_1", grader, questions)
+    hashes = [text_hash(question) for question in questions]
+
+    found = benchmark(store.find_unchanged, "Ohio", MENTOR_URL, hashes, grader)
+
+    assert len(found) == QUESTION_COUNT
+
+
+def test_find_unchanged_skips_other_graders(store):
+    """Results graded by another backend or model are graded again, not reused."""
+    questions = ["What are the leasehold estates?", "What is escrow?"]
+    record_run(store, "run_local", LocalGrader().cache_id, questions[:1])
+    record_run(store, "run_flash", GeminiGrader("gemini-2.5-flash").cache_id, questions)
+    hashes = [text_hash(question) for question in questions]
+
+    assert store.find_unchanged("Ohio", MENTOR_URL, hashes, GeminiGrader().cache_id) == {}
+    found = store.find_unchanged("Ohio", MENTOR_URL, hashes, LocalGrader().cache_id)
+    assert list(found) == [hashes[0]]
+    assert found[hashes[0]]['run_id'] == "run_local"
@@ -0,0 +1,56 @@
+"""
+Start-up benchmarks: how long it takes a fresh interpreter to import the modules
+every xdist worker and every collection pass loads.
+
+    python -m pytest benchmarks/test_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Upper bounds (seconds) for importing a module in a fresh interpreter
+IMPORT_BUDGETS = {
+    "utils.grading_model": 0.25,
+    "pages.grading_page": 1.0,
+}
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "modules": sorted(sys.modules),
+}}))
+"""
+
+
+def import_in_fresh_interpreter(module):
+    """Import a module in a new Python process and report the time and loaded modules."""
+    env = dict(os.environ)
+    env.pop("GOOGLE_API_KEY", None)  # importing must not need the key
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE.format(module=module)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS))
+def test_import_time(benchmark, module):
+    """Importing the module stays within its budget."""
+    probe = benchmark.pedantic(import_in_fresh_interpreter, args=(module,), rounds=5, iterations=1)
+    benchmark.extra_info["import_seconds"] = probe["seconds"]
+    assert probe["seconds"] < IMPORT_BUDGETS[module]
+
+
+def test_grading_model_import_is_lazy():
+    """Importing the grading module neither loads the Gemini SDK nor needs an API key."""
+    probe = import_in_fresh_interpreter("utils.grading_model")
+    assert "google.generativeai" not in probe["modules"]
+    assert "dotenv" not in probe["modules"]
@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for the UAT Automation Tool.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+All values come from utils.config.Config so they can be tuned with the
+UAT_HOST, UAT_PORT, UAT_WORKERS, UAT_THREADS and UAT_REQUEST_TIMEOUT
+environment variables.
+"""
+import os
+import sys
+
+# Make the project packages importable regardless of the launch directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config import Config
+
+bind = f"{Config.SERVER_HOST}:{Config.SERVER_PORT}"
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = "gthread"
+
+# /run-tests blocks until pytest finishes, so the timeout has to cover a full run
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+
+chdir = Config.BASE_DIR
+accesslog = "-"
+errorlog = "-"
+
+# Each worker process has its own warm browser pool (UAT_WARM_POOL_SIZE Chromium
+# processes), started by the worker's first warm run rather than at boot, so
+# only workers that serve warm runs launch browsers. Set UAT_WORKERS=1 to keep
+# a single pool.
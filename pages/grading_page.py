@@ -1,11 +1,23 @@
+import logging
 import openpyxl
 from openpyxl.styles import Alignment
-import re
+import json
 from datetime import datetime
-from playwright.sync_api import Page
-import time
-from utils.excel_read import create_state_output_file
-from utils.grading_model import create_grading_model
+from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
+from utils.blob_store import resolve, shorten, spill
+from utils.config import Config
+from utils.dedup import GradeClaim, get_grade_cache, text_hash
+from utils.excel_read import NOTES_COLUMN, RUBRIC_FIRST_COLUMN, create_state_output_file, save_state_workbook
+from utils.graders import Grader, GeminiGrader, get_grader
+from utils.grading_model import RUBRIC_CRITERIA, parse_rubric, validate_rubric
+from utils.logger import get_logger
+from utils.rate_limit import NavigationTimeout, RetryableHTTPError, call_with_retry, mentor_limiter
+from utils.results_store import current_run_id, get_results_store, record_results, result_row, stored_result
+from utils.storage_state import SESSION_REJECTED_STATUSES, get_storage_state_cache, is_login_page
+
+logger = get_logger(__name__)
+
+PROMPT_SELECTOR = 'textarea[data-testid="user-prompt-textarea"]'  # Text prompt input area
 
 class GradingPage:
     """Page Object Model for the grading page."""
@@ -20,91 +32,261 @@ class GradingPage:
         Args:
             question (str): The student's question
             response (str): The response to be graded
-            model: The Gemini model (if None, creates a new one)
+            model: A Grader, a Gemini model, or None for the configured grader
+                (Config.GRADER_BACKEND)
         
         Returns:
             str: Grading results including score and feedback
         """
-        if model is None:
-            model = create_grading_model()
+        return GradingPage.as_grader(model).grade(question, response)
+
+    def extract_score(evaluation_text):
+        """
+        Extract the numerical score from the evaluation text
+        
+        Args:
+            evaluation_text (str): The full evaluation text
+        
+        Returns:
+            int: The numerical score, or None if not found
+        """
+        rubric = parse_rubric(evaluation_text)
+        return rubric['total'] if rubric else None
+
+    def extract_rubric(evaluation_text):
+        """
+        Extract the per-criterion scores from the evaluation text
+        
+        Args:
+            evaluation_text (str): The structured (JSON) evaluation text
+        
+        Returns:
+            dict: accuracy, completeness, clarity, tone and total, or None if the text
+                is not a valid grade (criteria are None for plain-score replies)
+        """
+        return parse_rubric(evaluation_text)
+
+    def extract_rubrics(evaluation_text, count):
+        """
+        Extract the rubrics of a multi-answer evaluation
+        
+        Args:
+            evaluation_text (str): JSON array of rubric objects with ids 1..count
+            count (int): The number of items that were graded
+        
+        Returns:
+            list: One rubric dict per item in item order, or None if the output is
+                not valid JSON, misses items or has out-of-range scores
+        """
+        try:
+            items = json.loads(evaluation_text)
+        except (TypeError, ValueError):
+            return None
+        
+        if not isinstance(items, list) or len(items) != count:
+            return None
         
-        # Create the user prompt
-        user_prompt = f"""You will receive a question and a response in the following format:
+        rubrics = {}
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+                return None
+            rubric = validate_rubric(item)
+            if rubric is None:
+                return None
+            rubrics[item['id']] = rubric
+        
+        if sorted(rubrics) != list(range(1, count + 1)):
+            return None
+        return [rubrics[item_id] for item_id in range(1, count + 1)]
+
+    def extract_scores(evaluation_text, count):
+        """
+        Extract the total scores of a multi-answer evaluation
+        
+        Returns:
+            list: One int score per item in item order, or None (see extract_rubrics)
+        """
+        rubrics = GradingPage.extract_rubrics(evaluation_text, count)
+        return [rubric['total'] for rubric in rubrics] if rubrics is not None else None
 
-    <question>
-    {question}
-    </question>
+    def grade_responses(pairs, model=None, cache=None):
+        """
+        Grade several question/response pairs, packing up to Config.GRADING_BATCH_SIZE
+        pairs into one request
+        
+        Batches are also cut at Config.GRADING_BATCH_MAX_CHARS. A pair that is too
+        long on its own, a backend without multi-answer support, or a batch reply
+        that fails validation falls back to one request per pair.
+        
+        Args:
+            pairs (list): [(question, response), ...]
+            model: See grade_response
+            cache (GradeCache): Reuse grades of identical (or, if enabled, near-identical)
+                answers instead of grading them again
+        
+        Returns:
+            list: One dict per pair with score (int or None), rubric (dict or None),
+                evaluation (str) and error (str or None)
+        """
+        model = GradingPage.as_grader(model)
+        
+        if cache is None:
+            return GradingPage.grade_unique_responses(pairs, model)
+        
+        results = [None] * len(pairs)
+        claims = [cache.claim(model.cache_id, question, response) for question, response in pairs]
+        for i, claim in enumerate(claims):
+            if claim.state == GradeClaim.HIT:
+                results[i] = dict(claim.result)
+        
+        # Grade the new answers first, then collect the ones other callers were grading
+        owned = [i for i, claim in enumerate(claims) if claim.state == GradeClaim.OWN]
+        graded = GradingPage.grade_unique_responses([pairs[i] for i in owned], model)
+        for i, result in zip(owned, graded):
+            results[i] = result
+            cache.finish(claims[i], result)
+        
+        for i, claim in enumerate(claims):
+            if claim.state == GradeClaim.WAIT:
+                shared = cache.wait(claim)
+                results[i] = dict(shared) if shared else GradingPage.grade_unique_responses([pairs[i]], model)[0]
+        
+        return results
 
-    <response>
-    {response}
-    </response>
+    def as_grader(model=None):
+        """The Grader for a grading model argument: None (default backend), a Grader or a Gemini model"""
+        if model is None:
+            return get_grader()
+        if not isinstance(model, Grader):
+            return GeminiGrader(model=model)
+        return model
 
-    Score the response on a scale of 0 to 100 based on the rubric. Output ONLY the numerical score."""
+    def grade_unique_responses(pairs, model):
+        """grade_responses without the cache, model must be a Grader"""
+        # Split into batches by count and size
+        batches, batch, batch_chars = [], [], 0
+        for index, (question, response) in enumerate(pairs):
+            pair_chars = len(str(question)) + len(str(response))
+            if batch and (len(batch) >= Config.GRADING_BATCH_SIZE
+                          or batch_chars + pair_chars > Config.GRADING_BATCH_MAX_CHARS):
+                batches.append(batch)
+                batch, batch_chars = [], 0
+            batch.append(index)
+            batch_chars += pair_chars
+        if batch:
+            batches.append(batch)
         
-        # Get the evaluation
-        chat = model.start_chat(history=[])
-        evaluation = chat.send_message(user_prompt)
+        results = [None] * len(pairs)
+        for batch in batches:
+            if len(batch) > 1:
+                try:
+                    evaluation = model.grade_batch([pairs[i] for i in batch])
+                    rubrics = GradingPage.extract_rubrics(evaluation, len(batch))
+                except NotImplementedError:
+                    rubrics = None
+                except Exception as e:
+                    logger.warning("Batch grading failed, grading one by one: %s", e)
+                    rubrics = None
+                
+                if rubrics is not None:
+                    for i, rubric in zip(batch, rubrics):
+                        results[i] = {'score': rubric['total'], 'rubric': rubric,
+                                      'evaluation': evaluation, 'error': None}
+                    continue
+            
+            # Single-pair requests
+            for i in batch:
+                question, response = pairs[i]
+                try:
+                    evaluation = GradingPage.grade_response(str(question), str(response), model)
+                    rubric = GradingPage.extract_rubric(evaluation)
+                    results[i] = {'score': rubric['total'] if rubric else None, 'rubric': rubric,
+                                  'evaluation': evaluation, 'error': None}
+                except Exception as e:
+                    results[i] = {'score': None, 'rubric': None, 'evaluation': None, 'error': str(e)}
         
-        return evaluation.text
+        return results
 
-    def extract_score(evaluation_text):
+    def write_scrape_result(sheet, row, question, response=None, error=None):
         """
-        Extract the numerical score from the evaluation text
+        Write a mentor response (or the reason it could not be fetched) to columns A-D
         
         Args:
-            evaluation_text (str): The full evaluation text
+            sheet: The state output worksheet
+            row (int): Row to write
+            question (str): The question sent
+            response (str): The mentor's response, or a blob reference to it; long
+                responses are kept as references until the workbook is saved
+                with save_state_workbook
+            error (Exception): Set when fetching the response failed
+        """
+        sheet[f'A{row}'] = question
+        sheet[f'B{row}'] = f"Error: {str(error)}" if error is not None else spill(response)
+        sheet[f'C{row}'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        sheet[f'D{row}'] = "Failed" if error is not None else "Success"
+
+    def write_grade_result(sheet, row, result):
+        """
+        Write a grade_responses result to the timestamp, status, score and rubric columns
         
         Returns:
-            int: The numerical score, or None if not found
+            bool: False if grading failed (the mentor response is kept)
         """
-        # First, try to find just a number (since AI should output only the score)
-        # Look for patterns like "85", "92", etc.
-        number_pattern = r'^(\d+)$'
-        match = re.search(number_pattern, evaluation_text.strip())
-        if match:
-            score = int(match.group(1))
-            if 0 <= score <= 100:
-                return score
-        
-        # Fallback: Look for any number between 0-100 in the text
-        fallback_pattern = r'\b(\d{1,2}|100)\b'
-        match = re.search(fallback_pattern, evaluation_text)
-        if match:
-            score = int(match.group(1))
-            if 0 <= score <= 100:
-                return score
-        
-        # Legacy patterns (in case AI still outputs formatted text)
-        score_patterns = [
-            r'[Ss]core:\s*(\d+)/100',  # Score: 92/100
-            r'[Ss]core:\s*(\d+)',       # Score: 92
-            r'(\d+)/100',               # Just 92/100
-        ]
-        
-        for pattern in score_patterns:
-            match = re.search(pattern, evaluation_text, re.IGNORECASE)
-            if match:
-                score = int(match.group(1))
-                if 0 <= score <= 100:
-                    return score
-        
-        return None
-
-    def read_mentor_configurations(self, config_file_path):
+        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        sheet.cell(row=row, column=3, value=current_time)  # Column C: Timestamp
+        sheet.cell(row=row, column=3).alignment = Alignment(horizontal='center')
+        
+        if result['error']:
+            # Keep the mentor response, record why grading failed
+            sheet.cell(row=row, column=4, value="Failed")   # Column D: Status
+            sheet.cell(row=row, column=5, value="N/A")      # Column E: AI Review
+            sheet.cell(row=row, column=NOTES_COLUMN, value=f"Grading error: {result['error']}")  # Column H: Notes
+            return False
+        
+        if result['evaluation'] and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("AI response: %r", shorten(result['evaluation']))
+        score = result['score']
+        logger.debug("Extracted score: %s", score)
+        
+        # Write status and AI review score
+        sheet.cell(row=row, column=4, value="Success")     # Column D: Status
+        sheet.cell(row=row, column=5, value=score if score is not None else "N/A")  # Column E: AI Review
+        
+        # Columns M-P: per-criterion rubric scores
+        rubric = result['rubric'] or {}
+        for column, criterion in enumerate(RUBRIC_CRITERIA, start=RUBRIC_FIRST_COLUMN):
+            sheet.cell(row=row, column=column, value=rubric.get(criterion))
+        return True
+
+    def write_reused_result(sheet, row, question, previous):
+        """Write an earlier run's stored row for an unchanged question"""
+        GradingPage.write_scrape_result(sheet, row, question, previous['response'])
+        GradingPage.write_grade_result(sheet, row, stored_result(previous))
+        sheet.cell(row=row, column=NOTES_COLUMN, value=f"Unchanged, reused from run {previous['run_id']}")  # Column H: Notes
+
+    def read_mentor_configurations(self, config_file_path, mentor_names=None, row_limit=None):
         """
         Reads mentor configurations from Real Estate AI Explainer.xlsx
+        
+        Args:
+            config_file_path (str): Workbook with the LLM-Url sheet
+            mentor_names (list): Only return these states (case-insensitive); when
+                given the whole sheet is scanned
+            row_limit (int): Last sheet row read when no states are given, e.g.
+                Config.MENTOR_ROW_LIMIT (default: every row)
+        
         Returns: List of tuples [(state_name, mentor_url), ...]
         """
         mentors = []
         
         try:
-            print(f"Reading mentor configurations from: {config_file_path}")
+            logger.debug("Reading mentor configurations from %s", config_file_path)
             # Use data_only=True to get calculated values instead of formulas
             workbook = openpyxl.load_workbook(config_file_path, data_only=True)
             
             sheet_name = "LLM-Url"
             if sheet_name not in workbook.sheetnames:
-                print(f"Error: Sheet '{sheet_name}' not found")
+                logger.error("Sheet '%s' not found in %s", sheet_name, config_file_path)
                 workbook.close()
                 return mentors
                 
@@ -115,8 +297,14 @@ class GradingPage:
             empty_count = 0
             
             # Handle case where max_row might be None or very large
-            # LIMITED TO 2 MENTORS FOR TESTING
-            max_row = min(sheet.max_row or 1000, 5)# Only process first 2 mentors (rows 4-5)
+            # Without an explicit subset the caller may cap the rows (testing limit)
+            max_row = sheet.max_row or 1000
+            if mentor_names:
+                wanted = {str(name).strip().lower() for name in mentor_names}
+            else:
+                wanted = None
+                if row_limit:
+                    max_row = min(max_row, row_limit)
 
             for row_num in range(2, max_row + 1):
                 state_cell = sheet[f'A{row_num}']
@@ -131,102 +319,180 @@ class GradingPage:
                     state_name = str(state_name).strip()
                     mentor_url = str(mentor_url).strip()
                     
+                    if wanted is not None and state_name.lower() not in wanted:
+                        continue
+                    
                     mentors.append((state_name, mentor_url))
                     row_count += 1
-                    print(f"  Found mentor {row_count}: {state_name}")
+                    logger.debug("Found mentor %s: %s", row_count, state_name)
                 else:
                     empty_count += 1
                     
             workbook.close()
             
-            print(f"\nTotal mentors found: {len(mentors)}")
-            print(f"Empty rows skipped: {empty_count}")
+            logger.info("Found %s mentors (%s empty rows skipped)", len(mentors), empty_count)
             
             return mentors
             
         except Exception as e:
-            print(f"Error reading mentor configurations: {str(e)}")
+            logger.error("Error reading mentor configurations: %s", e)
             return []
     
-    def navigate_to_mentor_api(self, question, mentor_url):
-        print("Navigating to Mentor API...")
-        self.page.goto(mentor_url)
+    def navigate_to_mentor_api(self, question, mentor_url, question_delay=None):
+        """
+        Ask a mentor one question and return its response
 
-        # Wait for the page to load
-        self.page.wait_for_load_state("networkidle")
-        print("✓ Google loaded successfully")
+        Calls are paced per mentor URL and retried with backoff when the site
+        answers 429/5xx or the page does not load in time (see utils.rate_limit);
+        a prompt or copy button that never appears fails the question at once.
 
-        print("Searching for 'new'...")
-        search_box = self.page.locator('textarea[data-testid="user-prompt-textarea"]')  # Text prompt input area
-        search_box.fill(question)
-                
-        # # Press Enter to search
-        search_box.press("Enter")
-                
-        # # Wait for search results to load
-        self.page.wait_for_load_state("networkidle")
-        print("✓ Response loaded successfully")
+        Args:
+            question (str): The question to send
+            mentor_url (str): The mentor URL
+            question_delay (float): Minimum seconds between questions to this mentor
+                (default Config.QUESTION_DELAY)
+        """
+        return call_with_retry(
+            lambda: self._ask_mentor(question, mentor_url),
+            mentor_limiter(mentor_url, question_delay),
+            description="Mentor request"
+        )
 
+    def _ask_mentor(self, question, mentor_url):
+        storage_cache = get_storage_state_cache()
+        if storage_cache is not None:
+            # Reuse the login/consent state saved for this mentor's host
+            storage_cache.apply(self.page.context, mentor_url)
 
-        # Find the search box and type "new"
-        print("Searching for 'new'...")
-        search_box = self.page.locator('textarea[data-testid="user-prompt-textarea"]')  # Text prompt input area
-        search_box.fill("What steps should I take after obtaining my real estate license?")
+        logger.debug("Navigating to %s", mentor_url)
+        navigation = self._load(mentor_url)
+        if (storage_cache is not None and storage_cache.holds_state(self.page.context, mentor_url)
+                and self._session_rejected(navigation, mentor_url)):
+            # The saved session expired: drop it and load the page without it
+            storage_cache.invalidate(mentor_url, self.page.context)
+            navigation = self._load(mentor_url)
+        if navigation is not None and (navigation.status == 429 or navigation.status >= 500):
+            raise RetryableHTTPError(navigation.status, mentor_url)
+
+        logger.debug("Mentor page loaded, sending question")
+        search_box = self.page.locator(PROMPT_SELECTOR)
+        search_box.fill(question)
     
-        # Press Enter to search
+        # Press Enter to send
         search_box.press("Enter")
     
-        # Wait for search results to load
+        # Wait for the response to load
         self.page.wait_for_load_state("networkidle")
-        print("✓ Response loaded successfully")
+        logger.debug("Response loaded")
 
         # Click Copy button to Copy the response text
         copy_button = self.page.locator('[prop-events-value-onclick="handleCopyResponseBtnClick"]')
         copy_button.click()
-        print("✓ Response text copied to clipboard")
 
         # # Get the response text from clipboard
         response_text = self.page.evaluate("navigator.clipboard.readText()")
+
+        if storage_cache is not None and not storage_cache.is_fresh(mentor_url):
+            storage_cache.save(mentor_url, self.page.context)
                 
         return response_text
 
-    def read_questions_from_template(self, template_file_path):
+    def _load(self, mentor_url):
+        """Open the mentor page and wait for it to settle; a timeout is raised as NavigationTimeout"""
+        try:
+            navigation = self.page.goto(mentor_url)
+            self.page.wait_for_load_state("networkidle")
+        except PlaywrightTimeoutError as e:
+            raise NavigationTimeout(mentor_url) from e
+        return navigation
+
+    def _session_rejected(self, navigation, mentor_url):
+        """
+        Whether the mentor site turned a saved session away: an auth status, or a
+        redirect that ended on a login or consent page
+        """
+        if navigation is not None and navigation.status in SESSION_REJECTED_STATUSES:
+            return True
+        return is_login_page(mentor_url, self.page.url)
+
+    def read_questions_from_template(self, template_file_path, question_range=None, return_hashes=False,
+                                     row_limit=None):
         """
         Reads questions from the UAT Template Excel file
-        Returns: List of questions
+        
+        Args:
+            template_file_path (str): Workbook with the Queries sheet
+            question_range (tuple): (first, last) 1-based question numbers to read,
+                last may be None for "until the end"; defaults to every question
+            return_hashes (bool): Also return each question's content hash, used to
+                find questions that are unchanged since an earlier run
+            row_limit (int): Last sheet row read when no range is given, e.g.
+                Config.QUESTION_ROW_LIMIT (default: every row)
+        
+        Returns: List of questions, or of (question, hash) tuples with return_hashes
         """
         questions = []
         
         try:
-            print(f"\nReading questions from: {template_file_path}")
+            logger.debug("Reading questions from %s", template_file_path)
             workbook = openpyxl.load_workbook(template_file_path, read_only=True)
             
             sheet_name = "Queries"
             if sheet_name not in workbook.sheetnames:
-                print(f"Error: Sheet '{sheet_name}' not found")
+                logger.error("Sheet '%s' not found in %s", sheet_name, template_file_path)
                 workbook.close()
                 return questions
                 
             sheet = workbook[sheet_name]
             
-            # Read questions from column B, starting from row 2
-            max_row = min(sheet.max_row or 100, 6)  # Limited to 6 questions (rows 2-7)
-            for row_num in range(2, max_row + 1):
-                prompt_cell = sheet[f'A{row_num}']
-                if prompt_cell.value:
-                    questions.append(str(prompt_cell.value).strip())
+            # Read questions from column A, question N is on row N + 1
+            if question_range:
+                first, last = question_range
+                min_row = first + 1
+                max_row = last + 1 if last else None
+            else:
+                min_row = 2
+                max_row = min(sheet.max_row or 100, row_limit) if row_limit else None
+            
+            # iter_rows streams the read-only sheet instead of seeking per cell
+            for (prompt,) in sheet.iter_rows(min_row=min_row, max_row=max_row, max_col=1, values_only=True):
+                if prompt:
+                    questions.append(str(prompt).strip())
             
             workbook.close()
-            print(f"Found {len(questions)} questions")
+            logger.info("Found %s questions in %s", len(questions), template_file_path)
             
+            if return_hashes:
+                return [(question, text_hash(question)) for question in questions]
             return questions
             
         except Exception as e:
-            print(f"Error reading questions: {str(e)}")
+            logger.error("Error reading questions: %s", e)
             return questions
 
 
-    def process_mentor_questions(self, mentor_url, state_name, questions, model=None):
+    def find_unchanged_results(state_name, mentor_url, questions, grader):
+        """
+        Earlier results that can be reused for a changed-only run
+        
+        Args:
+            questions (list): Questions, or (question, hash) tuples from read_questions_from_template
+            grader (Grader): The grader of this run
+        
+        Returns:
+            dict: 1-based question index -> stored row, for questions this mentor
+                answered successfully in an earlier run with the same text and grader
+        """
+        hashes = [q[1] if isinstance(q, tuple) else text_hash(q) for q in questions]
+        try:
+            previous = get_results_store().find_unchanged(state_name, mentor_url, hashes, grader.cache_id)
+        except Exception as e:
+            logger.warning("Could not look up earlier results, processing every question: %s", e)
+            return {}
+        return {idx: previous[h] for idx, h in enumerate(hashes, 1) if h in previous}
+
+    def process_mentor_questions(self, mentor_url, state_name, questions, model=None, question_delay=None,
+                                 run_id=None, changed_only=False):
         """
         Processes all questions for a specific mentor and saves to state file
         
@@ -234,94 +500,111 @@ class GradingPage:
             mentor_url (str): The mentor URL
             state_name (str): The state name for output file
             questions (list): List of questions to process
+            question_delay (float): Minimum seconds between questions (default Config.QUESTION_DELAY)
+            run_id (str): Run the rows are recorded under in the results store
+                (default: current_run_id())
+            changed_only (bool): Reuse earlier results of questions whose text did not
+                change instead of asking the mentor and grading again
         """
-        print(f"\n{'='*80}")
-        print(f"PROCESSING MENTOR FOR: {state_name}")
-        print(f"{'='*80}")
-        print(f"Mentor URL: {mentor_url}")
-        print(f"Total questions to process: {len(questions)}")
+        run_id = run_id or current_run_id()
+        model = GradingPage.as_grader(model)
+        reused = GradingPage.find_unchanged_results(state_name, mentor_url, questions, model) if changed_only else {}
+        questions = [q[0] if isinstance(q, tuple) else q for q in questions]
+        mentor_log = {'state': state_name}
+        logger.info("Processing %s questions from %s (%s reused from earlier runs)",
+                    len(questions), mentor_url, len(reused), extra=mentor_log)
         
         try:
             # Create state output file
-            workbook, sheet, file_path = create_state_output_file(state_name)
+            workbook, sheet, file_path = create_state_output_file(state_name, run_id)
             ws = workbook.active
 
             processed_count = 0
             failed_count = 0
             current_row = 2  # Start from row 2 (after headers)
+            pending = []  # (row, idx, question, response) scraped but not graded yet
+
+            def grade_pending():
+                """Grade the scraped rows (several per request when batching) and save"""
+                nonlocal processed_count, failed_count
+                results = GradingPage.grade_responses(
+                    [(str(question), str(resolve(response))) for _, _, question, response in pending], model,
+                    cache=get_grade_cache() if Config.DEDUP_ENABLED else None
+                )
+                record_results([
+                    result_row(run_id, state_name, mentor_url, idx, question, response, result,
+                               grader=model.cache_id)
+                    for (_, idx, question, response), result in zip(pending, results)
+                ])
+                for (row, idx, _, _), result in zip(pending, results):
+                    if GradingPage.write_grade_result(ws, row, result):
+                        processed_count += 1
+                        logger.debug("Question %s processed and saved", idx, extra=mentor_log)
+                    else:
+                        failed_count += 1
+                        logger.warning("Question %s grading failed: %s", idx, result['error'], extra=mentor_log)
+                
+                pending.clear()
+                # Save after grading to prevent data loss
+                save_state_workbook(workbook, file_path)
 
             # Process each question
             for idx, question in enumerate(questions, 1):
-                print(f"\n[{idx}/{len(questions)}] Processing question {idx} for {state_name}")
+                logger.debug("Processing question %s/%s", idx, len(questions), extra=mentor_log)
+                
+                if idx in reused:
+                    GradingPage.write_reused_result(sheet, current_row, question, reused[idx])
+                    record_results([result_row(run_id, state_name, mentor_url, idx, question,
+                                               reused[idx]['response'], stored_result(reused[idx]),
+                                               grader=model.cache_id)])
+                    processed_count += 1
+                    current_row += 1
+                    logger.debug("Question %s unchanged since run %s", idx, reused[idx]['run_id'], extra=mentor_log)
+                    continue
                 
                 try:
                     # Get response from mentor
-                    response = self.navigate_to_mentor_api(question, mentor_url)
+                    # Long responses are only held as blob references from here on
+                    response = spill(self.navigate_to_mentor_api(question, mentor_url, question_delay))
 
                     # Write to Excel
-                    sheet[f'A{current_row}'] = question
-                    sheet[f'B{current_row}'] = response
-                    sheet[f'C{current_row}'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    sheet[f'D{current_row}'] = "Success"
-                    
-                    # Grade the response
-                    evaluation = GradingPage.grade_response(str(question), str(response), model)
-                    print(f"    AI Response: '{evaluation}'")
-
-                    score = GradingPage.extract_score(evaluation)
-                    print(f"    Extracted Score: {score}")
+                    GradingPage.write_scrape_result(sheet, current_row, question, response)
                     
-                    # Write timestamp, status, and AI review score
-                    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    ws.cell(row=current_row, column=3, value=current_time)  # Column C: Timestamp
-                    ws.cell(row=current_row, column=4, value="Success")     # Column D: Status
-                    ws.cell(row=current_row, column=5, value=score if score is not None else "N/A")  # Column E: AI Review
-                    
-                    # Format timestamp column
-                    ws.cell(row=current_row, column=3).alignment = Alignment(horizontal='center')
-
-                    processed_count += 1
+                    # Grade once enough responses are collected for a batch
+                    pending.append((current_row, idx, question, response))
                     current_row += 1
-
-                    # Save after each question to prevent data loss
-                    workbook.save(file_path)
-                    print(f"[OK] Question {idx} processed and saved")
-
+                    if len(pending) >= Config.GRADING_BATCH_SIZE:
+                        grade_pending()
+                    else:
+                        save_state_workbook(workbook, file_path)
                     
                 except Exception as e:
                     # Log error but continue with next question
-                    sheet[f'A{current_row}'] = question
-                    sheet[f'B{current_row}'] = f"Error: {str(e)}"
-                    sheet[f'C{current_row}'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    sheet[f'D{current_row}'] = "Failed"
+                    GradingPage.write_scrape_result(sheet, current_row, question, error=e)
+                    record_results([result_row(run_id, state_name, mentor_url, idx, question, error=e)])
                     
                     failed_count += 1
                     current_row += 1
                     
-                    workbook.save(file_path)
-                    print(f"[FAILED] Question {idx} failed: {str(e)}")
-                
-                # Add delay between questions
-                if idx < len(questions):
-                    print("Waiting before next question...")
-                    time.sleep(5)
+                    save_state_workbook(workbook, file_path)
+                    logger.warning("Question %s failed: %s", idx, e, extra=mentor_log)
+            
+            # Grade what is left of the last batch
+            if pending:
+                grade_pending()
             
             # Final save and close
-            workbook.save(file_path)
+            save_state_workbook(workbook, file_path)
             workbook.close()
             
             # Summary for this mentor
-            print(f"\n{'='*60}")
-            print(f"COMPLETED: {state_name}")
-            print(f"{'='*60}")
-            print(f"Processed: {processed_count}/{len(questions)}")
-            print(f"Failed: {failed_count}")
-            print(f"Output saved to: {file_path}")
+            logger.info("Completed: processed %s/%s, failed %s, output saved to %s",
+                        processed_count, len(questions), failed_count, file_path, extra=mentor_log)
             
             return processed_count, failed_count
             
         except Exception as e:
-            print(f"Error processing mentor {state_name}: {str(e)}")
+            logger.error("Error processing mentor %s: %s", state_name, e)
             return 0, len(questions)
 
 
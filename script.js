@@ -2,6 +2,7 @@ class ExcelUploadApp {
     constructor() {
         this.selectedFile = null;
         this.fileUploaded = false;
+        this.uploadId = null;
         this.init();
     }
 
@@ -10,6 +11,7 @@ class ExcelUploadApp {
         this.clearUploads(); // Clear uploads folder on page load/refresh
         this.loadTemplateFiles(); // Load available template files
         this.loadOutputFiles(); // Load available output files
+        this.loadRuns(); // Load runs for comparison
         this.updateStatus('Ready to upload file...');
     }
 
@@ -45,7 +47,7 @@ class ExcelUploadApp {
             if (file && this.isValidExcelFile(file)) {
                 this.handleFileSelection(file);
             } else {
-                this.showError('Please select a valid Excel file (.xlsx or .xls)');
+                this.showError('Please select an .xlsx file (save .xls workbooks as .xlsx first)');
             }
         });
 
@@ -74,6 +76,15 @@ class ExcelUploadApp {
         refreshTemplatesBtn.addEventListener('click', () => {
             this.loadTemplateFiles();
         });
+
+        // Run comparison
+        document.getElementById('refreshRunsBtn').addEventListener('click', () => {
+            this.loadRuns();
+        });
+
+        document.getElementById('compareRunsBtn').addEventListener('click', () => {
+            this.compareRuns();
+        });
     }
 
     handleFileSelection(file) {
@@ -85,18 +96,17 @@ class ExcelUploadApp {
             this.enableUploadButton();
             this.updateStatus('File selected. Ready to upload.');
         } else {
-            this.showError('Please select a valid Excel file (.xlsx or .xls)');
+            this.showError('Please select an .xlsx file (save .xls workbooks as .xlsx first)');
         }
     }
 
     isValidExcelFile(file) {
+        // Legacy .xls workbooks cannot be read by the server
         const validTypes = [
-            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', // .xlsx
-            'application/vnd.ms-excel' // .xls
+            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' // .xlsx
         ];
         return validTypes.includes(file.type) || 
-               file.name.toLowerCase().endsWith('.xlsx') || 
-               file.name.toLowerCase().endsWith('.xls');
+               file.name.toLowerCase().endsWith('.xlsx');
     }
 
     showFileInfo(file) {
@@ -142,6 +152,7 @@ class ExcelUploadApp {
             if (response.ok) {
                 const result = await response.json();
                 this.fileUploaded = true;
+                this.uploadId = result.upload_id;
                 this.updateStatus('File uploaded successfully!', 'success');
                 this.enableTestButton();
                 this.hideProgress();
@@ -181,7 +192,8 @@ class ExcelUploadApp {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
-                }
+                },
+                body: JSON.stringify({ upload_id: this.uploadId })
             });
 
             if (response.ok) {
@@ -205,6 +217,9 @@ class ExcelUploadApp {
         output += `Status: ${result.success ? 'PASSED' : 'FAILED'}\n`;
         output += `Exit Code: ${result.exit_code}\n`;
         output += `Duration: ${result.duration}s\n\n`;
+        if (result.stdout_truncated || result.stderr_truncated) {
+            output += `Long output is cut to its last lines; the full logs are at ${result.logs_url}\n\n`;
+        }
         output += `=== STDOUT ===\n${result.stdout}\n\n`;
         
         if (result.stderr) {
@@ -363,6 +378,7 @@ class ExcelUploadApp {
                 // Reset file state
                 this.selectedFile = null;
                 this.fileUploaded = false;
+                this.uploadId = null;
                 
                 // Hide file info and reset UI
                 const fileInfo = document.getElementById('fileInfo');
@@ -450,6 +466,98 @@ class ExcelUploadApp {
         }
     }
 
+    escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text == null ? '' : String(text);
+        return div.innerHTML;
+    }
+
+    async loadRuns() {
+        const compareResults = document.getElementById('compareResults');
+        try {
+            const response = await fetch('/runs');
+            if (!response.ok) {
+                compareResults.innerHTML = '<p class="no-files-text">Failed to load runs</p>';
+                return;
+            }
+            const result = await response.json();
+            const options = result.runs.map(run => {
+                const label = `${run.run_id} (${run.states} states, ${run.questions} rows, avg ${run.avg_score ?? 'N/A'})`;
+                return `<option value="${this.escapeHtml(run.run_id)}">${this.escapeHtml(label)}</option>`;
+            }).join('');
+
+            // Newest run as head, the one before as base
+            const baseSelect = document.getElementById('baseRunSelect');
+            const headSelect = document.getElementById('headRunSelect');
+            baseSelect.innerHTML = options;
+            headSelect.innerHTML = options;
+            if (result.runs.length > 1) baseSelect.selectedIndex = 1;
+
+            compareResults.innerHTML = result.runs.length < 2
+                ? '<p class="no-files-text">At least two runs are needed for a comparison</p>'
+                : '';
+        } catch (error) {
+            compareResults.innerHTML = '<p class="no-files-text">Error loading runs</p>';
+        }
+    }
+
+    async compareRuns() {
+        const base = document.getElementById('baseRunSelect').value;
+        const head = document.getElementById('headRunSelect').value;
+        const threshold = document.getElementById('thresholdInput').value || 0;
+        if (!base || !head) {
+            this.showError('Select two runs to compare');
+            return;
+        }
+
+        const params = new URLSearchParams({ base, head, threshold });
+        try {
+            const response = await fetch(`/compare-runs?${params}`);
+            const result = await response.json();
+            if (response.ok) {
+                this.displayComparison(result);
+            } else {
+                this.showError(result.error || 'Comparison failed');
+            }
+        } catch (error) {
+            this.showError(`Comparison failed: ${error.message}`);
+        }
+    }
+
+    displayComparison(comparison) {
+        const summary = comparison.summary;
+        // Regressions first, then rows whose score or response changed
+        const rows = comparison.rows
+            .filter(row => row.regression || row.response_changed || row.change || (row.delta && Math.abs(row.delta) >= comparison.threshold))
+            .sort((a, b) => (b.regression - a.regression) || ((a.delta ?? 0) - (b.delta ?? 0)));
+
+        const tableRows = rows.map(row => `
+            <tr class="${row.regression ? 'regression-row' : ''}">
+                <td>${this.escapeHtml(row.state_name)}</td>
+                <td>${this.escapeHtml(row.question)}</td>
+                <td>${row.base_score ?? 'N/A'}</td>
+                <td>${row.head_score ?? 'N/A'}</td>
+                <td>${row.delta ?? (row.change || '')}</td>
+                <td>${row.response_changed ? 'Yes' : ''}</td>
+            </tr>
+        `).join('');
+
+        document.getElementById('compareResults').innerHTML = `
+            <p class="compare-summary">
+                ${summary.compared} compared, <strong>${summary.regressions} regressions</strong>,
+                ${summary.improvements} improvements, ${summary.changed_responses} changed responses,
+                ${summary.added} added, ${summary.removed} removed, average delta ${summary.avg_delta ?? 'N/A'}
+            </p>
+            ${rows.length ? `
+            <table class="compare-table">
+                <thead>
+                    <tr><th>State</th><th>Question</th><th>Base</th><th>Head</th><th>Delta</th><th>Response changed</th></tr>
+                </thead>
+                <tbody>${tableRows}</tbody>
+            </table>` : '<p class="no-files-text">No differences above the threshold</p>'}
+        `;
+    }
+
     // async generateSampleOutput() {
     //     if (!this.fileUploaded) {
     //         this.showError('Please upload a file first');
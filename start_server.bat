@@ -9,6 +9,6 @@ echo.
 echo Press Ctrl+C to stop the server
 echo.
 
-python app.py
+python wsgi.py
 
 pause
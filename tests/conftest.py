@@ -1,14 +1,116 @@
 import pytest
 import sys
 import os
-from playwright.sync_api import Page, Browser, BrowserContext
+from playwright.sync_api import Page, Browser
 
 # Add the project root directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from pages.uat_parallel_page import UATParallelPage
 from pages.grading_page import GradingPage
+from utils.artifacts import capture_failure, get_artifact_capture, start_trace, stop_trace
+from utils.browser_pool import ContextPool
 from utils.config import Config
+from utils.excel_read import parse_question_range
+from utils.graders import get_grader
+from utils.logger import flush_logs, get_logger
+from utils.results_store import current_run_id
+
+logger = get_logger(__name__)
+
+
+def pytest_addoption(parser):
+    """Options describing which workbook, mentors and questions a run covers."""
+    group = parser.getgroup("uat", "UAT grading run")
+    group.addoption(
+        "--uat-file", action="append", default=None,
+        help="Workbook with the LLM-Url and Queries sheets (repeatable). "
+             "Defaults to $UAT_FILE (os.pathsep separated) or the bundled template."
+    )
+    group.addoption(
+        "--mentors", default=None,
+        help="Comma-separated state names to run. Defaults to $UAT_MENTORS or the first rows."
+    )
+    group.addoption(
+        "--questions", default=None,
+        help="Question range such as '1-10', '5' or '3-'. Defaults to $UAT_QUESTIONS or the first rows."
+    )
+    group.addoption(
+        "--question-delay", type=float, default=None,
+        help="Seconds between questions sent to one mentor. Defaults to $UAT_QUESTION_DELAY."
+    )
+    group.addoption(
+        "--grader", default=None,
+        help="Grading backend: 'gemini' or 'local' (offline). Defaults to $UAT_GRADER or gemini."
+    )
+    group.addoption(
+        "--changed-only", action="store_true", default=None,
+        help="Only ask and grade questions that are new or edited since an earlier run; "
+             "reuse stored results for the rest. Defaults to $UAT_CHANGED_ONLY=1."
+    )
+
+
+def _question_range(value):
+    try:
+        return parse_question_range(value)
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+
+
+def get_uat_options(config):
+    """Collect the run options from the command line, falling back to environment variables."""
+    uat_files = config.getoption("uat_file")
+    if not uat_files:
+        env_files = os.getenv("UAT_FILE")
+        uat_files = env_files.split(os.pathsep) if env_files else [Config.DEFAULT_UAT_FILE]
+
+    mentors = config.getoption("mentors") or os.getenv("UAT_MENTORS")
+    question_delay = config.getoption("question_delay")
+    if question_delay is None and os.getenv("UAT_QUESTION_DELAY"):
+        question_delay = float(os.getenv("UAT_QUESTION_DELAY"))
+
+    return {
+        "uat_files": uat_files,
+        "mentors": [name.strip() for name in mentors.split(",") if name.strip()] if mentors else None,
+        "question_range": _question_range(config.getoption("questions") or os.getenv("UAT_QUESTIONS")),
+        "question_delay": question_delay,
+        "grader": config.getoption("grader"),
+        "changed_only": bool(config.getoption("changed_only") or os.getenv("UAT_CHANGED_ONLY") == "1"),
+    }
+
+
+def pytest_generate_tests(metafunc):
+    """Parametrize mentor tests with every (workbook, state, mentor URL) of this run."""
+    if "mentor_url" not in metafunc.fixturenames:
+        return
+
+    options = get_uat_options(metafunc.config)
+    reader = GradingPage(None)
+    params = []
+    for uat_file in options["uat_files"]:
+        for state_name, mentor_url in reader.read_mentor_configurations(
+            uat_file, options["mentors"], row_limit=Config.MENTOR_ROW_LIMIT
+        ):
+            test_id = f"{state_name}-{mentor_url}"
+            if len(options["uat_files"]) > 1:
+                test_id = f"{os.path.basename(uat_file)}-{test_id}"
+            params.append(pytest.param(uat_file, state_name, mentor_url, id=test_id))
+
+    metafunc.parametrize("uat_file, state_name, mentor_url", params)
+
+
+@pytest.fixture(scope="session")
+def uat_options(request):
+    """Run options (question range, pacing) shared by all tests."""
+    return get_uat_options(request.config)
+
+
+@pytest.fixture(scope="session")
+def grader(uat_options):
+    """Grading backend shared by all tests in this worker."""
+    try:
+        return get_grader(uat_options["grader"])
+    except ValueError as e:
+        pytest.exit(str(e), returncode=4)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -17,15 +119,27 @@ def setup_directories():
     Config.create_directories()
 
 
+@pytest.fixture(scope="session")
+def context_pool(browser: Browser, browser_context_args):
+    """Warm browser contexts shared by the tests of this worker (Config.CONTEXT_POOL_SIZE)."""
+    pool = ContextPool(browser, context_args=browser_context_args)
+    pool.warm_up()
+    yield pool
+    pool.close()
+    logger.debug("Context pool: %s", pool.stats)
+
+
 @pytest.fixture
-def uat_parallel_page(page: Page):
-    """Fixture to provide a UATParallelPage instance."""
-    return UATParallelPage(page)
+def pooled_page(context_pool):
+    """A page of a warm context leased from the pool for one test."""
+    with context_pool.lease() as page:
+        yield page
+
 
 @pytest.fixture
-def grading_page(page: Page):
+def grading_page(pooled_page: Page):
     """Fixture to provide a GradingPage instance."""
-    return GradingPage(page)
+    return GradingPage(pooled_page)
 
 
 # Commented out missing page fixtures
@@ -46,9 +160,7 @@ def browser_context_args(browser_context_args):
     """Configure browser context arguments."""
     return {
         **browser_context_args,
-        "viewport": {"width": 1920, "height": 1080},
-        "ignore_https_errors": True,
-        "permissions": ["geolocation", "clipboard-read", "clipboard-write"]
+        **Config.BROWSER_CONTEXT_ARGS
     }
 
 
@@ -65,41 +177,55 @@ def browser_type_launch_args(browser_type_launch_args):
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
-    """Hook to capture screenshots on test failure."""
+    """Hook to capture a screenshot and HTML snapshot on test failure."""
     outcome = yield
     rep = outcome.get_result()
+    # Kept on the item so teardown knows whether to keep the trace
+    setattr(item, f"rep_{rep.when}", rep)
     
     if rep.when == "call" and rep.failed:
         # Get the page fixture if available
-        if hasattr(item, "funcargs") and "page" in item.funcargs:
-            page = item.funcargs["page"]
-            screenshot_path = Config.get_screenshot_path(f"{item.name}_failure")
-            
-            try:
-                page.screenshot(path=screenshot_path)
-                print(f"Screenshot saved: {screenshot_path}")
-            except Exception as e:
-                print(f"Failed to capture screenshot: {e}")
+        funcargs = getattr(item, "funcargs", {})
+        page = funcargs.get("pooled_page") or funcargs.get("page")
+        if page is not None:
+            # Only reading the page happens here; the files are written in the background
+            capture_failure(page, f"{item.name}_failure")
 
 
 @pytest.fixture(autouse=True)
-def test_setup_teardown(page: Page, request):
+def test_setup_teardown(pooled_page: Page, request):
     """Setup and teardown for each test."""
     # Setup
     test_name = request.node.name
-    print(f"\n🧪 Starting test: {test_name}")
+    logger.debug("Starting test: %s", test_name)
+    start_trace(pooled_page.context)
     
     yield
     
     # Teardown
-    print(f"✅ Completed test: {test_name}")
+    rep_call = getattr(request.node, "rep_call", None)
+    stop_trace(pooled_page.context, f"{test_name}_failure", keep=rep_call is not None and rep_call.failed)
+    logger.debug("Completed test: %s", test_name)
+    # Write this test's log records while its output is still being captured
+    flush_logs()
 
 
 def pytest_configure(config):
     """Configure pytest with custom markers."""
+    # Fix the results store run ID before xdist starts its workers, so they share it
+    current_run_id()
     config.addinivalue_line(
         "markers", "smoke: mark test as a smoke test"
     )
     config.addinivalue_line(
         "markers", "regression: mark test as a regression test"
     )
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Write the failure artifacts still queued before the session ends."""
+    capture = get_artifact_capture()
+    capture.close()
+    if capture.stats["dropped"]:
+        logger.warning("%s failure artifacts were dropped", capture.stats["dropped"])
+    flush_logs()
@@ -1,50 +1,43 @@
 import pytest
-from playwright.sync_api import Page
 from pages.grading_page import GradingPage
-from datetime import datetime
+from utils.config import Config
+from utils.logger import get_logger
 
-def load_test_data_from_excel():
-    """
-    Load test data from an Excel file
-    """
-    grading_page = GradingPage(Page)
-    mentor_config_file = r"C:\Users\VVazhakunnamMana\Documents\TestData\UAT_TestData.xlsx"
-    mentors = grading_page.read_mentor_configurations(mentor_config_file)
-    print("Mentors loaded:" + str(mentors))
+logger = get_logger(__name__)
 
-    return mentors
-
-@pytest.mark.parametrize("state_name, mentor_url", load_test_data_from_excel())
-def test_mentor_api_excel(grading_page: GradingPage, state_name, mentor_url):
+# (uat_file, state_name, mentor_url) are parametrized by pytest_generate_tests in
+# conftest.py from --uat-file/--mentors (or $UAT_FILE/$UAT_MENTORS)
+def test_mentor_api_excel(grading_page: GradingPage, grader, uat_options, uat_file, state_name, mentor_url):
     """
     Main function that orchestrates multi-mentor processing
     """
-    print("="*80)
-    print("MULTI-MENTOR PROCESSING SYSTEM")
-    print("="*80)
-    print(f"Start time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.debug("Multi-mentor processing started", extra={'state': state_name})
         
     # File paths
-    mentor_config_file = r"C:\Users\VVazhakunnamMana\Documents\TestData\UAT_TestData.xlsx"
-    questions_file = r"C:\Users\VVazhakunnamMana\Documents\TestData\UAT_TestData.xlsx"
+    mentor_config_file = uat_file
+    questions_file = uat_file
 
     # Read mentor configurations
-    print("\n1. Reading mentor configurations...")
-    mentors = grading_page.read_mentor_configurations(mentor_config_file)
+    logger.debug("Reading mentor configurations")
+    mentors = grading_page.read_mentor_configurations(
+        mentor_config_file, uat_options["mentors"], row_limit=Config.MENTOR_ROW_LIMIT
+    )
 
     
-    print("Mentors loaded:"+ str(mentors))
+    logger.debug("Mentors loaded: %s", mentors)
 
     if not mentors:
-        print("No mentors found to process. Exiting.")
+        logger.warning("No mentors found to process. Exiting.")
         return
 
     # Read questions from template
-    print("\n2. Reading questions from template...")
-    questions = grading_page.read_questions_from_template(questions_file)
+    logger.debug("Reading questions from template")
+    questions = grading_page.read_questions_from_template(
+        questions_file, uat_options["question_range"], return_hashes=True, row_limit=Config.QUESTION_ROW_LIMIT
+    )
 
     if not questions:
-        print("No questions found to process. Exiting.")
+        logger.warning("No questions found to process. Exiting.")
         return
     
     # Process each mentor
@@ -53,14 +46,11 @@ def test_mentor_api_excel(grading_page: GradingPage, state_name, mentor_url):
     successful_mentors = []
     failed_mentors = []
     
-    
-    print(f"\n{'='*80}")
-    # print(f"[{idx}/{len(mentors)}] PROCESSING MENTOR {idx} OF {len(mentors)}")
-    print(f"{'='*80}")
-    
     try:
         processed, failed =  grading_page.process_mentor_questions(
-            mentor_url, state_name, questions, model=None
+            mentor_url, state_name, questions, model=grader,
+            question_delay=uat_options["question_delay"],
+            changed_only=uat_options["changed_only"]
         )
         
         total_processed += processed
@@ -72,33 +62,15 @@ def test_mentor_api_excel(grading_page: GradingPage, state_name, mentor_url):
             failed_mentors.append(f"{state_name} ({failed} failures)")
             
     except Exception as e:
-        print(f"Failed to process mentor {state_name}: {str(e)}")
+        logger.error("Failed to process mentor %s: %s", state_name, e)
         failed_mentors.append(f"{state_name} (complete failure)")
         total_failed += len(questions)
     
     # Final summary
-    print(f"\n{'='*80}")
-    print("MULTI-MENTOR PROCESSING COMPLETE!")
-    print(f"{'='*80}")
-    print(f"End time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"\nSummary:")
-    # print(f"  Total mentors: {len(mentors)}")
-    print(f"  Successful mentors: {len(successful_mentors)}")
-    print(f"  Mentors with issues: {len(failed_mentors)}")
-    print(f"  Total questions processed: {total_processed}")
-    print(f"  Total questions failed: {total_failed}")
-    
-    if successful_mentors:
-        print(f"\nSuccessful mentors:")
-        for mentor in successful_mentors:
-            print(f"  [OK] {mentor}")
-    
-    if failed_mentors:
-        print(f"\nMentors with issues:")
-        for mentor in failed_mentors:
-            print(f"  [FAILED] {mentor}")
-    
-    print(f"\nAll output files saved in: ./output/")
+    logger.info(
+        "Multi-mentor processing complete: %s questions processed, %s failed; mentors with issues: %s",
+        total_processed, total_failed, ", ".join(failed_mentors) or "none", extra={'state': state_name}
+    )
 
 
 if __name__ == "__main__":
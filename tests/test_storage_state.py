@@ -0,0 +1,64 @@
+import pytest
+from playwright.sync_api import Browser
+
+import pages.grading_page as grading_page_module
+from benchmarks.mock_mentor import EXPIRED_SESSION_COOKIE, MockMentorServer
+from pages.grading_page import GradingPage
+from utils.config import Config
+from utils.storage_state import StorageStateCache
+
+
+# A mentor URL that redirects to its chat route, like the live site
+@pytest.fixture(scope="module")
+def mock_mentor():
+    server = MockMentorServer(redirect=True).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def storage_cache(tmp_path, monkeypatch):
+    """A storage state cache of its own, so saved sessions of real mentor sites are left alone"""
+    cache = StorageStateCache(root=str(tmp_path / "storage_state"))
+    monkeypatch.setattr(grading_page_module, "get_storage_state_cache", lambda: cache)
+    return cache
+
+
+def save_session(browser, cache, mentor_url, value):
+    """Save a state for the mentor's host holding one session cookie"""
+    context = browser.new_context(**Config.BROWSER_CONTEXT_ARGS)
+    name, _, cookie = value.partition("=")
+    context.add_cookies([{"name": name, "value": cookie, "url": mentor_url}])
+    cache.save(mentor_url, context)
+    context.close()
+
+
+def ask(browser, mentor_url):
+    context = browser.new_context(**Config.BROWSER_CONTEXT_ARGS)
+    try:
+        return GradingPage(context.new_page()).navigate_to_mentor_api("What is escrow?", mentor_url, question_delay=0)
+    finally:
+        context.close()
+
+
+def test_redirect_keeps_saved_session(browser: Browser, mock_mentor, storage_cache):
+    """A redirect to the chat route is an ordinary page load, not a rejected session"""
+    mentor_url = mock_mentor.mentor_url("Ohio")
+    save_session(browser, storage_cache, mentor_url, "session=valid")
+    logins = mock_mentor.logins
+
+    assert ask(browser, mentor_url)
+    assert storage_cache.is_fresh(mentor_url)
+    assert "valid" in str(storage_cache.load(mentor_url)["cookies"])
+    assert mock_mentor.logins == logins
+
+
+def test_login_redirect_drops_saved_session(browser: Browser, mock_mentor, storage_cache):
+    """A saved session the site sends to its login page is deleted and the page loaded again without it"""
+    mentor_url = mock_mentor.mentor_url("Texas")
+    save_session(browser, storage_cache, mentor_url, EXPIRED_SESSION_COOKIE)
+    logins = mock_mentor.logins
+
+    assert ask(browser, mentor_url)
+    assert mock_mentor.logins == logins + 1
+    assert "expired" not in str(storage_cache.load(mentor_url)["cookies"])
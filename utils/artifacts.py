@@ -0,0 +1,203 @@
+import atexit
+import itertools
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+from utils.config import Config
+from utils.logger import get_logger
+from utils.retention import prune_directory
+
+logger = get_logger(__name__)
+
+# Artifact kind -> (Config folder attribute, file extension)
+ARTIFACT_KINDS = {
+    "screenshot": ("SCREENSHOTS_DIR", "png"),
+    "html": ("SNAPSHOTS_DIR", "html"),
+    "trace": ("TRACES_DIR", "zip"),
+}
+
+
+class ArtifactCapture:
+    """
+    Writes failure artifacts (screenshots, HTML snapshots, Playwright traces)
+    from a background thread.
+
+    The test thread only takes the bytes from the page and queues them; writing,
+    moving and pruning the folders happen on the writer thread. File names carry
+    a timestamp, the process ID and a counter, so parallel xdist workers and
+    repeated failures of one test never overwrite each other. Artifacts over
+    Config.ARTIFACT_MAX_BYTES, or queued while Config.ARTIFACT_QUEUE_SIZE others
+    are waiting, are dropped rather than slowing the test down. After every
+    write the folder is pruned to the ARTIFACT_MAX_* retention limits.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=Config.ARTIFACT_QUEUE_SIZE)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"written": 0, "dropped": 0, "pruned": 0}
+
+    def artifact_path(self, kind, test_name):
+        """A new, unique path for an artifact of a test"""
+        folder, extension = ARTIFACT_KINDS[kind]
+        safe_name = re.sub(r"[^\w.-]+", "_", test_name)[:100]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{safe_name}_{timestamp}_{os.getpid()}_{next(self._counter)}.{extension}"
+        return os.path.join(getattr(Config, folder), filename)
+
+    def save(self, kind, test_name, data):
+        """
+        Queue an artifact's content to be written
+
+        Args:
+            kind (str): "screenshot", "html" or "trace"
+            data (bytes or str): The content; str is written as UTF-8
+
+        Returns:
+            str: The path the artifact will be written to, or None if it was dropped
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if len(data) > Config.ARTIFACT_MAX_BYTES:
+            return self._drop(kind, test_name, f"{len(data)} bytes is over the size limit")
+        return self._enqueue(self.artifact_path(kind, test_name), data=data)
+
+    def save_file(self, kind, test_name, source_path):
+        """Queue a file written elsewhere (e.g. a trace zip) to be moved into place"""
+        try:
+            size = os.path.getsize(source_path)
+        except OSError as e:
+            return self._drop(kind, test_name, str(e))
+        if size > Config.ARTIFACT_MAX_BYTES:
+            os.remove(source_path)
+            return self._drop(kind, test_name, f"{size} bytes is over the size limit")
+        path = self._enqueue(self.artifact_path(kind, test_name), source_path=source_path)
+        if path is None:
+            os.remove(source_path)
+        return path
+
+    def _drop(self, kind, test_name, reason):
+        with self._lock:
+            self.stats["dropped"] += 1
+        logger.warning("Dropped %s of %s: %s", kind, test_name, reason)
+        return None
+
+    def _enqueue(self, path, data=None, source_path=None):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((path, data, source_path))
+        except queue.Full:
+            return self._drop(os.path.splitext(path)[1][1:], os.path.basename(path), "too many artifacts queued")
+        return path
+
+    def _write(self, path, data, source_path):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if source_path is not None:
+            shutil.move(source_path, path)
+        else:
+            tmp_path = f"{path}.part"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        extension = os.path.splitext(path)[1]
+        pruned = prune_directory(
+            directory, max_age=Config.ARTIFACT_MAX_AGE, max_count=Config.ARTIFACT_MAX_FILES,
+            max_bytes=Config.ARTIFACT_MAX_DIR_BYTES, pattern=f"*{extension}"
+        )
+        with self._lock:
+            self.stats["written"] += 1
+            self.stats["pruned"] += pruned["removed"]
+        logger.info("Saved %s", path)
+
+    def _run(self):
+        while True:
+            path, data, source_path = self._queue.get()
+            try:
+                if path is None:
+                    return
+                self._write(path, data, source_path)
+            except Exception as e:
+                logger.warning("Could not write %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until every queued artifact is written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put((None, None, None))
+            thread.join()
+
+
+_capture = None
+_capture_lock = threading.Lock()
+
+
+def get_artifact_capture():
+    """Get the process-wide artifact capture service"""
+    global _capture
+    with _capture_lock:
+        if _capture is None:
+            _capture = ArtifactCapture()
+            atexit.register(_capture.close)
+        return _capture
+
+
+def capture_failure(page, test_name):
+    """
+    Take a failed test's screenshot and HTML snapshot (as configured) and queue them
+
+    Only reading the page happens on the calling thread. Problems are logged,
+    never raised, so the test's own failure is what gets reported.
+    """
+    capture = get_artifact_capture()
+    if Config.CAPTURE_SCREENSHOTS:
+        try:
+            capture.save("screenshot", test_name, page.screenshot())
+        except Exception as e:
+            logger.warning("Failed to capture screenshot of %s: %s", test_name, e)
+    if Config.CAPTURE_HTML:
+        try:
+            capture.save("html", test_name, page.content())
+        except Exception as e:
+            logger.warning("Failed to capture HTML of %s: %s", test_name, e)
+
+
+def start_trace(context):
+    """Record a Playwright trace of a test if Config.CAPTURE_TRACE is on"""
+    if Config.CAPTURE_TRACE:
+        context.tracing.start(screenshots=True, snapshots=True)
+
+
+def stop_trace(context, test_name, keep):
+    """Stop the trace started by start_trace; keep it (for a failed test) or discard it"""
+    if not Config.CAPTURE_TRACE:
+        return
+    try:
+        if not keep:
+            context.tracing.stop()
+            return
+        os.makedirs(Config.TRACES_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=Config.TRACES_DIR, suffix=".part")
+        os.close(fd)
+        context.tracing.stop(path=tmp_path)
+        get_artifact_capture().save_file("trace", test_name, tmp_path)
+    except Exception as e:
+        logger.warning("Failed to save trace of %s: %s", test_name, e)
@@ -0,0 +1,116 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.utils import secure_filename
+
+from utils.config import Config
+from utils.excel_read import inspect_uat_workbook
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WORKBOOK_EXTENSIONS = ('.xlsx',)
+# openpyxl only reads the xlsx format, so legacy workbooks are turned away with this
+LEGACY_XLS_ERROR = 'Legacy .xls workbooks are not supported. Please save the file as .xlsx and upload it again'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_preview_executor():
+    """
+    Get the process-wide pool that parses uploaded workbooks
+
+    Parsing is CPU-bound, so a batch of workbooks is spread over processes
+    instead of the request thread. Processes are spawned, like the warm
+    worker pool, so they do not inherit the server's threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, Config.BATCH_PREVIEW_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_executor.shutdown, cancel_futures=True)
+        return _executor
+
+
+def extract_workbooks(zip_file, folder, prefix, max_files, max_file_size):
+    """
+    Extract the workbooks of an uploaded zip archive
+
+    Other members (folders, non-Excel files) are skipped; legacy .xls
+    workbooks, and workbooks larger than max_file_size, are rejected before
+    they are decompressed.
+
+    Args:
+        zip_file: A file object or path of the archive
+        folder (str): Where the workbooks are written
+        prefix (str): Prepended to every extracted file name
+        max_files (int): Workbooks extracted at most, the rest are rejected
+
+    Returns:
+        tuple: (extracted, rejected) lists of (filename, filepath) and of
+            {'filename', 'error'} dicts
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a zip archive
+    """
+    extracted, rejected = [], []
+    with zipfile.ZipFile(zip_file) as archive:
+        for member in archive.infolist():
+            name = os.path.basename(member.filename)
+            if member.is_dir() or name.startswith(('.', '~$')):
+                continue
+            if name.lower().endswith('.xls'):
+                rejected.append({'filename': name, 'error': LEGACY_XLS_ERROR})
+                continue
+            if not name.lower().endswith(WORKBOOK_EXTENSIONS):
+                continue
+            if len(extracted) >= max_files:
+                rejected.append({'filename': name, 'error': f'More than {max_files} workbooks in one batch'})
+                continue
+            if member.file_size > max_file_size:
+                rejected.append({'filename': name, 'error': f'Larger than {max_file_size // (1024 * 1024)}MB'})
+                continue
+
+            filename = f"{prefix}{len(extracted) + 1}_{secure_filename(name)}"
+            filepath = os.path.join(folder, filename)
+            with archive.open(member) as source, open(filepath, 'wb') as target:
+                # Read at most one byte past the declared size, the header may lie
+                data = source.read(max_file_size + 1)
+                if len(data) > max_file_size:
+                    rejected.append({'filename': name, 'error': f'Larger than {max_file_size // (1024 * 1024)}MB'})
+                    target.close()
+                    os.remove(filepath)
+                    continue
+                target.write(data)
+            extracted.append((filename, filepath))
+    return extracted, rejected
+
+
+def inspect_workbooks(filepaths):
+    """
+    Preview and check many workbooks in parallel (see inspect_uat_workbook)
+
+    Returns:
+        list: One dict per workbook, in order, with the inspection or an 'error'
+            when the file could not be read
+    """
+    if not filepaths:
+        return []
+    executor = get_preview_executor()
+    futures = [executor.submit(inspect_uat_workbook, filepath) for filepath in filepaths]
+    results = []
+    for filepath, future in zip(filepaths, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.warning("Could not read %s: %s", filepath, e)
+            results.append({'error': f'Invalid Excel file: {e}'})
+    return results
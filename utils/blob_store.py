@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+from utils.config import Config
+
+BLOB_REF_PREFIX = "blob:sha256:"
+_BLOB_REF_RE = re.compile(r"blob:sha256:([0-9a-f]{64})")
+
+
+def is_blob_ref(value):
+    return isinstance(value, str) and _BLOB_REF_RE.fullmatch(value) is not None
+
+
+class BlobStore:
+    """
+    Content-addressed, gzip-compressed text blobs on disk.
+
+    Long mentor responses are written here once and passed around (worksheets,
+    grading queues, the results store) as short "blob:sha256:<hash>" references;
+    the text is only read back when it is graded or written to a file. Identical
+    responses share one blob, and concurrent writers of the same blob from other
+    processes are harmless because files are replaced atomically. A blob's
+    modification time is its last put(), which collect() relies on.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or Config.BLOB_DIR
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.gz")
+
+    def put(self, text):
+        """
+        Store a text
+
+        Returns:
+            str: A reference to pass to get()
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        try:
+            os.utime(path)  # in use again, keep it from collect()
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=6))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return BLOB_REF_PREFIX + digest
+
+    def get(self, ref):
+        """
+        Read a stored text back
+
+        Raises:
+            KeyError: If the blob does not exist
+        """
+        match = _BLOB_REF_RE.fullmatch(ref)
+        if match is None:
+            raise KeyError(ref)
+        try:
+            with open(self._path(match.group(1)), "rb") as f:
+                return gzip.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(ref) from None
+
+    def collect(self, referenced, max_age):
+        """
+        Delete blobs nothing refers to any more
+
+        A blob is removed when it is not in referenced and was last put() more
+        than max_age seconds ago; the age covers references only held in memory,
+        like the cells of a state workbook that is still being written.
+
+        Args:
+            referenced (set): References (or their digests) that are kept
+            max_age (float): Seconds an unreferenced blob is kept
+
+        Returns:
+            dict: removed (blobs deleted) and freed_bytes
+        """
+        keep = {ref[len(BLOB_REF_PREFIX):] if ref.startswith(BLOB_REF_PREFIX) else ref for ref in referenced}
+        cutoff = time.time() - max_age
+        removed = freed = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                digest, extension = os.path.splitext(filename)
+                if extension != ".gz" or digest in keep:
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime >= cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+                freed += stat.st_size
+        return {'removed': removed, 'freed_bytes': freed}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Get the process-wide blob store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
+
+
+def spill(text):
+    """
+    Replace a long text by a blob reference
+
+    Returns:
+        The text itself if shorter than Config.BLOB_INLINE_CHARS (or not a
+        string, or already a reference), otherwise a reference for resolve()
+    """
+    if not isinstance(text, str) or len(text) < Config.BLOB_INLINE_CHARS or is_blob_ref(text):
+        return text
+    return get_blob_store().put(text)
+
+
+def resolve(value):
+    """The text behind a blob reference; any other value is returned unchanged"""
+    if is_blob_ref(value):
+        return get_blob_store().get(value)
+    return value
+
+
+def shorten(text, limit=200):
+    """A one-line preview of a text for logs"""
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else f"{text[:limit]}... ({len(text)} characters)"
@@ -0,0 +1,129 @@
+import threading
+from contextlib import contextmanager
+
+from utils.config import Config
+from utils.logger import get_logger
+from utils.storage_state import get_storage_state_cache
+
+logger = get_logger(__name__)
+
+
+class ContextPool:
+    """
+    Warm browser contexts of one browser, leased to tests and returned.
+
+    Creating a context and its first page costs a round trip to the browser
+    for every test; the pool creates at most `size` contexts and hands them out
+    again, each with a page already open. Cookies and local storage (e.g. a
+    mentor site's login) stay in the context between leases. A context is
+    replaced after `max_uses` leases, by one that starts from its storage
+    state, and dropped when it broke. New contexts also start with the mentor
+    sites' saved logins (utils/storage_state.py).
+
+    Playwright's sync API is bound to the thread that created the browser, so
+    a pool is used from that thread only; `size` bounds how many pages a test
+    (or a worker processing one task) may hold at once.
+    """
+
+    def __init__(self, browser, size=None, context_args=None, max_uses=None):
+        self.browser = browser
+        self.size = max(1, size or Config.CONTEXT_POOL_SIZE)
+        self.context_args = dict(Config.BROWSER_CONTEXT_ARGS if context_args is None else context_args)
+        self.max_uses = max(1, max_uses or Config.CONTEXT_MAX_USES)
+        self._idle = []     # (context, page) ready to lease
+        self._uses = {}     # context -> leases so far
+        self._leased = 0
+        self._storage_state = None  # carried into replacement contexts
+        self._storage_cache = get_storage_state_cache()
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "recycled": 0}
+
+    def _new_context(self):
+        args = dict(self.context_args)
+        hosts = set()
+        if self._storage_cache is not None:
+            args["storage_state"], hosts = self._storage_cache.merged_state()
+        elif self._storage_state is not None:
+            args["storage_state"] = self._storage_state
+        context = self.browser.new_context(**args)
+        if hosts:
+            self._storage_cache.mark_applied(context, hosts)
+        page = context.new_page()
+        self._uses[context] = 0
+        self.stats["created"] += 1
+        return context, page
+
+    def _discard(self, context):
+        self._uses.pop(context, None)
+        try:
+            context.close()
+        except Exception as e:
+            logger.debug("Could not close context: %s", e)
+
+    def warm_up(self, count=None):
+        """Create contexts up front, so the first tests don't pay for them"""
+        with self._lock:
+            while len(self._idle) + self._leased < min(count or self.size, self.size):
+                self._idle.append(self._new_context())
+
+    @contextmanager
+    def lease(self):
+        """
+        Borrow a context's page for the duration of a with block
+
+        Yields:
+            Page: Returned to the pool (or replaced when broken) afterwards
+
+        Raises:
+            RuntimeError: If all `size` contexts are already leased
+        """
+        with self._lock:
+            if self._idle:
+                context, page = self._idle.pop()
+                self.stats["reused"] += 1
+            elif self._leased < self.size:
+                context, page = self._new_context()
+            else:
+                raise RuntimeError(f"All {self.size} browser contexts are leased (UAT_CONTEXT_POOL_SIZE)")
+            self._leased += 1
+            self._uses[context] += 1
+
+        try:
+            yield page
+        finally:
+            with self._lock:
+                self._leased -= 1
+                self._give_back(context, page)
+
+    def _give_back(self, context, page):
+        if not self.browser.is_connected():
+            self._uses.pop(context, None)
+            return
+        try:
+            # Keep the session, drop what the test left behind: popups and the open document
+            for other in context.pages:
+                if other is not page:
+                    other.close()
+            if page.is_closed():
+                page = context.new_page()
+            else:
+                page.goto("about:blank")
+            if self._uses[context] >= self.max_uses:
+                # The replacement starts logged in where this one was
+                self._storage_state = context.storage_state()
+                self.stats["recycled"] += 1
+                self._discard(context)
+                return
+        except Exception as e:
+            logger.warning("Discarding a broken browser context: %s", e)
+            self._discard(context)
+            return
+        self._idle.append((context, page))
+
+    def close(self):
+        """Close every idle context (leased ones are closed when returned after this)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self.max_uses = 1
+        for context, _ in idle:
+            self._discard(context)
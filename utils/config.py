@@ -23,6 +23,21 @@ class Config:
         ]
     }
     
+    # Browser context settings (clipboard access is needed to copy mentor responses)
+    BROWSER_CONTEXT_ARGS = {
+        "viewport": {"width": 1920, "height": 1080},
+        "ignore_https_errors": True,
+        "permissions": ["geolocation", "clipboard-read", "clipboard-write"]
+    }
+    # Warm contexts kept per test worker / warm pool process and leased to tests
+    # (utils/browser_pool.py); a context is replaced after CONTEXT_MAX_USES leases
+    CONTEXT_POOL_SIZE = int(os.getenv("UAT_CONTEXT_POOL_SIZE", "1"))
+    CONTEXT_MAX_USES = int(os.getenv("UAT_CONTEXT_MAX_USES", "50"))
+    # Cookies and localStorage of each mentor host, reused by new contexts until they
+    # are this old or the site rejects them (utils/storage_state.py)
+    STORAGE_STATE_ENABLED = os.getenv("UAT_STORAGE_STATE", "1") == "1"
+    STORAGE_STATE_TTL = int(os.getenv("UAT_STORAGE_STATE_TTL_MINUTES", "60")) * 60
+    
     # Test data
     SEARCH_TERMS = {
         "MCP": "MCP",
@@ -34,12 +49,130 @@ class Config:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     REPORTS_DIR = os.path.join(BASE_DIR, "reports")
     SCREENSHOTS_DIR = os.path.join(REPORTS_DIR, "screenshots")
+    TRACES_DIR = os.path.join(REPORTS_DIR, "traces")
+    SNAPSHOTS_DIR = os.path.join(REPORTS_DIR, "snapshots")
+    
+    # Failure artifacts (utils/artifacts.py): a screenshot and HTML snapshot of the
+    # page, plus a Playwright trace when UAT_CAPTURE_TRACE=1 (records every test)
+    CAPTURE_SCREENSHOTS = os.getenv("UAT_CAPTURE_SCREENSHOTS", "1") == "1"
+    CAPTURE_HTML = os.getenv("UAT_CAPTURE_HTML", "1") == "1"
+    CAPTURE_TRACE = os.getenv("UAT_CAPTURE_TRACE", "0") == "1"
+    ARTIFACT_MAX_BYTES = 20 * 1024 * 1024  # larger artifacts are not kept
+    ARTIFACT_QUEUE_SIZE = 100  # artifacts waiting to be written; more are dropped
+    # Retention per artifact folder, enforced as artifacts are written
+    ARTIFACT_MAX_FILES = int(os.getenv("UAT_ARTIFACT_MAX_FILES", "200"))
+    ARTIFACT_MAX_DIR_BYTES = int(os.getenv("UAT_ARTIFACT_MAX_DIR_MB", "500")) * 1024 * 1024
+    ARTIFACT_MAX_AGE = int(os.getenv("UAT_ARTIFACT_MAX_AGE_DAYS", "14")) * 24 * 60 * 60
+    # Server-side state shared by all worker processes
+    STATE_DIR = os.path.join(BASE_DIR, "state")
+    UPLOAD_REGISTRY_DB = os.path.join(STATE_DIR, "uploads.db")
+    
+    # Every processed row of every run, next to the per-state xlsx files (utils/results_store.py)
+    RESULTS_DB = os.getenv("UAT_RESULTS_DB", os.path.join(STATE_DIR, "results.db"))
+    RESULTS_STORE_ENABLED = os.getenv("UAT_RESULTS_STORE", "1") == "1"
+    # Runs older than this are deleted from the results store by the retention sweep (0 = keep all)
+    RESULTS_MAX_AGE = int(os.getenv("UAT_RESULTS_MAX_AGE_DAYS", "180")) * 24 * 60 * 60
+    REGRESSION_THRESHOLD = 5  # score drop (points) flagged when comparing runs
+    # Mentor responses this long or longer are kept on disk and referenced by
+    # content hash until they are written out (utils/blob_store.py)
+    BLOB_DIR = os.getenv("UAT_BLOB_DIR", os.path.join(STATE_DIR, "blobs"))
+    BLOB_INLINE_CHARS = int(os.getenv("UAT_BLOB_INLINE_CHARS", "1024"))
+    # /run-tests returns the end of each log; the whole log is paged from /run-logs/<run_id>
+    RUN_LOGS_DIR = os.path.join(STATE_DIR, "run_logs")
+    STORAGE_STATE_DIR = os.path.join(STATE_DIR, "storage_state")
+    RUN_LOG_PAYLOAD_CHARS = int(os.getenv("UAT_RUN_LOG_CHARS", "20000"))
+    RUN_LOG_PAGE_BYTES = 64 * 1024
+    # Columns of a sheet checked at a time by the upload validation (utils/validation.py)
+    VALIDATION_CHUNK_COLUMNS = int(os.getenv("UAT_VALIDATION_CHUNK_COLUMNS", "64"))
+    # Batch uploads (/upload-batch): workbooks or zip archives of them, previewed in a process pool
+    BATCH_MAX_FILES = int(os.getenv("UAT_BATCH_MAX_FILES", "100"))
+    BATCH_MAX_REQUEST_BYTES = int(os.getenv("UAT_BATCH_MAX_MB", "200")) * 1024 * 1024
+    BATCH_PREVIEW_WORKERS = int(os.getenv("UAT_BATCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Background cleanup jobs (utils/janitor.py); status shared by all worker processes
+    JOBS_DB = os.path.join(STATE_DIR, "jobs.db")
+    # Minutes between retention sweeps of uploads, outputs, reports and run logs (0 = off)
+    JANITOR_INTERVAL = int(os.getenv("UAT_JANITOR_INTERVAL_MINUTES", "30")) * 60
+    UPLOAD_MAX_AGE = int(os.getenv("UAT_UPLOAD_MAX_AGE_HOURS", "24")) * 60 * 60
+    UPLOAD_MAX_FILES = int(os.getenv("UAT_UPLOAD_MAX_FILES", "500"))
+    UPLOAD_MAX_DIR_BYTES = int(os.getenv("UAT_UPLOAD_MAX_DIR_MB", "1000")) * 1024 * 1024
+    OUTPUT_MAX_AGE = int(os.getenv("UAT_OUTPUT_MAX_AGE_DAYS", "30")) * 24 * 60 * 60
+    OUTPUT_MAX_FILES = int(os.getenv("UAT_OUTPUT_MAX_FILES", "1000"))
+    OUTPUT_MAX_DIR_BYTES = int(os.getenv("UAT_OUTPUT_MAX_DIR_MB", "2000")) * 1024 * 1024
+    
+    # Static assets (seconds browsers may cache content-hashed URLs)
+    STATIC_MAX_AGE = 365 * 24 * 60 * 60
+    
+    # Test runs started from the web UI (in seconds)
+    TEST_RUN_TIMEOUT = int(os.getenv("UAT_TEST_RUN_TIMEOUT", "3600"))
+    # pytest-xdist worker count for a run ("auto" = one per CPU)
+    TEST_WORKERS = os.getenv("UAT_TEST_WORKERS", "auto")
+    MAX_TEST_WORKERS = 16
+    # "pytest" starts a pytest subprocess per run, "warm" sends runs to the
+    # long-lived browser worker pool (utils/worker_pool.py)
+    RUN_MODE = os.getenv("UAT_RUN_MODE", "pytest")
+    WARM_POOL_SIZE = int(os.getenv("UAT_WARM_POOL_SIZE", "2"))
+    # Seconds between checks for pool processes that died
+    WORKER_MONITOR_INTERVAL = float(os.getenv("UAT_WORKER_MONITOR_INTERVAL", "2"))
+    
+    # Grading run defaults (overridable per run, see tests/conftest.py)
+    DEFAULT_UAT_FILE = os.path.join(BASE_DIR, "template", "UAT_TestData.xlsx")
+    QUESTION_DELAY = 5  # minimum seconds between questions sent to one mentor
+    # Grading backend: "gemini" or "local" (offline, deterministic; see utils/graders.py)
+    GRADER_BACKEND = os.getenv("UAT_GRADER", "gemini")
+    # Question/response pairs packed into one grading request (1 = one call per pair);
+    # batches longer than GRADING_BATCH_MAX_CHARS are split, oversized pairs graded alone
+    GRADING_BATCH_SIZE = int(os.getenv("UAT_GRADING_BATCH_SIZE", "1"))
+    GRADING_BATCH_MAX_CHARS = int(os.getenv("UAT_GRADING_BATCH_MAX_CHARS", "60000"))
+    
+    # Grade identical answers once (utils/dedup.py); near-duplicates share a grade
+    # only when enabled, at or above the MinHash similarity threshold
+    DEDUP_ENABLED = os.getenv("UAT_DEDUP", "1") == "1"
+    DEDUP_NEAR_DUPLICATES = os.getenv("UAT_DEDUP_NEAR", "0") == "1"
+    DEDUP_NEAR_THRESHOLD = float(os.getenv("UAT_DEDUP_NEAR_THRESHOLD", "0.9"))
+    DEDUP_CACHE_SIZE = 10000  # grades kept per process
+    # Exact-match grades shared by every process (pool and xdist workers) through SQLite,
+    # reused for DEDUP_SHARED_TTL only so later runs grade the answers afresh
+    DEDUP_SHARED_ENABLED = os.getenv("UAT_DEDUP_SHARED", "1") == "1"
+    DEDUP_SHARED_DB = os.getenv("UAT_DEDUP_DB", os.path.join(STATE_DIR, "grades.db"))
+    DEDUP_SHARED_TTL = int(os.getenv("UAT_DEDUP_SHARED_TTL_HOURS", "12")) * 3600
+    
+    # Rate limiting and retries for Gemini and the mentor sites (utils/rate_limit.py)
+    GEMINI_RATE_PER_SEC = float(os.getenv("UAT_GEMINI_RATE_PER_SEC", "1.0"))  # ceiling, per process
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("UAT_GEMINI_MAX_CONCURRENCY", "4"))
+    MENTOR_MAX_CONCURRENCY = 1  # questions in flight per mentor URL
+    RETRY_ATTEMPTS = int(os.getenv("UAT_RETRY_ATTEMPTS", "4"))
+    RETRY_BASE_DELAY = 1.0  # seconds
+    RETRY_MAX_DELAY = 30.0  # seconds
+    
+    # Standalone sweeps (python -m utils.orchestrator)
+    ORCHESTRATOR_BROWSERS = int(os.getenv("UAT_BROWSERS", "4"))
+    ORCHESTRATOR_GRADING_WORKERS = int(os.getenv("UAT_GRADING_WORKERS", "2"))
+    WORKBOOK_SAVE_INTERVAL = 5  # seconds between saves of a state workbook during a sweep
+    # Logging (utils/logger.py): level, "text" or "json" lines, and keeping only every
+    # Nth DEBUG/INFO record per log call (1 = all)
+    LOG_LEVEL = os.getenv("UAT_LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("UAT_LOG_FORMAT", "text")
+    LOG_SAMPLE_EVERY = int(os.getenv("UAT_LOG_SAMPLE_EVERY", "1"))
+    # Opt-in row caps for the app's test runs when no mentor subset / question
+    # range is given; the orchestrator reads every row
+    MENTOR_ROW_LIMIT = 5
+    QUESTION_ROW_LIMIT = 6
+    
+    # Production server settings (see wsgi.py and gunicorn.conf.py)
+    SERVER_HOST = os.getenv("UAT_HOST", "0.0.0.0")
+    SERVER_PORT = int(os.getenv("UAT_PORT", "5000"))
+    SERVER_WORKERS = int(os.getenv("UAT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    SERVER_THREADS = int(os.getenv("UAT_THREADS", "8"))
+    # A request may wait for a whole test run, so allow a little more than that
+    SERVER_TIMEOUT = int(os.getenv("UAT_REQUEST_TIMEOUT", str(TEST_RUN_TIMEOUT + 60)))
     
     @classmethod
     def create_directories(cls) -> None:
         """Create necessary directories if they don't exist."""
         os.makedirs(cls.REPORTS_DIR, exist_ok=True)
         os.makedirs(cls.SCREENSHOTS_DIR, exist_ok=True)
+        os.makedirs(cls.TRACES_DIR, exist_ok=True)
+        os.makedirs(cls.SNAPSHOTS_DIR, exist_ok=True)
     
     @classmethod
     def get_screenshot_path(cls, test_name: str) -> str:
@@ -0,0 +1,329 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from utils.config import Config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+
+# MinHash: 64 permutations in 16 LSH bands of 4 rows
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    # Fixed (a, b) pairs so signatures are comparable across processes and runs
+    params = []
+    for i in range(MINHASH_PERMUTATIONS):
+        digest = hashlib.sha256(f"minhash-{i}".encode()).digest()
+        a, b = struct.unpack("<QQ", digest[:16])
+        params.append((a % (_MERSENNE_PRIME - 1) + 1, b % _MERSENNE_PRIME))
+    return params
+
+
+_PERMUTATIONS = _permutations()
+
+
+def normalize_text(text):
+    """Normalize unicode and collapse whitespace so formatting differences do not matter"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", str(text or ""))).strip()
+
+
+def text_hash(text):
+    """Short content hash of a normalized text, e.g. to recognise a question across runs"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def response_key(grader_id, question, response):
+    """Content hash identifying one (grader, question, response) grade"""
+    payload = "\0".join((grader_id, normalize_text(question), normalize_text(response)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def shared_key(grader_id, question, response):
+    """(grader id, question hash, response hash) of a grade in the SharedGradeStore"""
+    return (
+        grader_id,
+        hashlib.sha256(normalize_text(question).encode("utf-8")).hexdigest(),
+        hashlib.sha256(normalize_text(response).encode("utf-8")).hexdigest(),
+    )
+
+
+def minhash_signature(text, shingle_size=3):
+    """
+    MinHash signature of a text's word shingles
+
+    Returns:
+        tuple: MINHASH_PERMUTATIONS ints; the share of equal positions between two
+            signatures estimates the Jaccard similarity of the texts
+    """
+    words = _WORD_RE.findall(normalize_text(text).lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+        for s in shingles
+    ]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def signature_similarity(left, right):
+    return sum(x == y for x, y in zip(left, right)) / len(left)
+
+
+class GradeClaim:
+    """The outcome of GradeCache.claim for one response."""
+
+    HIT = "hit"      # already graded, result is set
+    WAIT = "wait"    # being graded by someone else, wait() for it
+    OWN = "own"      # the caller grades it and must call finish()
+
+    def __init__(self, key, state, result=None, event=None, shared_key=None):
+        self.key = key
+        self.state = state
+        self.result = result
+        self.event = event
+        self.shared_key = shared_key
+
+
+class SharedGradeStore:
+    """
+    Exact-match grades shared by all processes.
+
+    GradeCache lives in one process, so the warm pool's workers and pytest-xdist
+    workers would each grade the same answer again. Finished grades are also
+    written here, keyed by (grader id, question hash, response hash), and looked
+    up before grading. The grader id (Grader.cache_id) holds the backend, model
+    and prompt/rubric version, so a changed rubric or model grades afresh.
+    Grades are reused for ttl seconds only (Config.DEDUP_SHARED_TTL): they are
+    meant for the workers of one run, not for skipping grading in later runs.
+    Grades in progress are not shared across processes: two processes that get
+    the same new answer at the same moment both grade it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS grades (
+            grader TEXT NOT NULL,
+            question_hash TEXT NOT NULL,
+            response_hash TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (grader, question_hash, response_hash)
+        );
+    """
+
+    def __init__(self, db_path=None, ttl=None):
+        self.db_path = db_path or Config.DEDUP_SHARED_DB
+        self.ttl = Config.DEDUP_SHARED_TTL if ttl is None else ttl
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """The stored result for a shared_key, or None if there is none younger than the TTL"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM grades WHERE grader = ? AND question_hash = ? AND response_hash = ? "
+                "AND created_at >= ?",
+                (*key, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row['result']) if row else None
+
+    def put(self, key, result):
+        """Store a successful grade under its shared_key"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO grades (grader, question_hash, response_hash, result, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(result), time.time())
+            )
+
+    def remove_older_than(self, cutoff):
+        """Delete grades stored before a time.time() value"""
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM grades WHERE created_at < ?", (cutoff,)).rowcount
+
+
+class GradeCache:
+    """
+    Process-wide cache of grades keyed by normalized content.
+
+    Identical answers to the same question (from different mentors, files or
+    runs) are graded once: the first caller grades, concurrent callers wait for
+    its result, later callers reuse it. With near_duplicates on, answers whose
+    MinHash similarity reaches the threshold share a grade as well. With a
+    shared store, exact matches graded by other processes are reused too.
+    """
+
+    def __init__(self, max_entries=None, near_duplicates=None, threshold=None, shared=None):
+        self.max_entries = max_entries or Config.DEDUP_CACHE_SIZE
+        self.near_duplicates = Config.DEDUP_NEAR_DUPLICATES if near_duplicates is None else near_duplicates
+        self.threshold = threshold or Config.DEDUP_NEAR_THRESHOLD
+        self.shared = shared
+
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # key -> result, least recently used first
+        self._pending = {}             # key -> threading.Event
+        self._signatures = {}          # key -> (question key, signature)
+        self._bands = {}               # (question key, band, values) -> set of keys
+        self.stats = {"hits": 0, "near_hits": 0, "shared_hits": 0, "waits": 0, "misses": 0}
+
+    def _band_keys(self, question_key, signature):
+        rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        return [(question_key, band, signature[band * rows:(band + 1) * rows]) for band in range(MINHASH_BANDS)]
+
+    def _find_near(self, question_key, signature):
+        candidates = set()
+        for band_key in self._band_keys(question_key, signature):
+            candidates |= self._bands.get(band_key, set())
+        best, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = signature_similarity(signature, self._signatures[key][1])
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
+
+    def _index(self, key, question_key, signature):
+        self._signatures[key] = (question_key, signature)
+        for band_key in self._band_keys(question_key, signature):
+            self._bands.setdefault(band_key, set()).add(key)
+
+    def _forget(self, key):
+        question_key, signature = self._signatures.pop(key, (None, None))
+        if signature is not None:
+            for band_key in self._band_keys(question_key, signature):
+                keys = self._bands.get(band_key)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._bands[band_key]
+
+    def claim(self, grader_id, question, response):
+        """
+        Look up a response before grading it
+
+        Args:
+            grader_id (str): The grader's cache_id, grades of other graders are not reused
+
+        Returns:
+            GradeClaim: HIT with the cached result, WAIT with an event to wait on,
+                or OWN when the caller has to grade and then call finish()
+        """
+        key = response_key(grader_id, question, response)
+        signature = question_key = None
+        if self.near_duplicates:
+            question_key = response_key(grader_id, question, "")
+            signature = minhash_signature(response)
+
+        with self._lock:
+            if key not in self._results and key not in self._pending and signature is not None:
+                near = self._find_near(question_key, signature)
+                if near is not None:
+                    key = near
+                    self.stats["near_hits"] += 1
+
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return GradeClaim(key, GradeClaim.HIT, result=self._results[key])
+            if key in self._pending:
+                self.stats["waits"] += 1
+                return GradeClaim(key, GradeClaim.WAIT, event=self._pending[key])
+
+            self._pending[key] = threading.Event()
+            if signature is not None:
+                self._index(key, question_key, signature)
+
+        claim = GradeClaim(key, GradeClaim.OWN, shared_key=shared_key(grader_id, question, response))
+        result = self._shared_get(claim.shared_key)
+        if result is not None:
+            self.finish(claim, result, share=False)
+            with self._lock:
+                self.stats["shared_hits"] += 1
+            return GradeClaim(key, GradeClaim.HIT, result=result)
+        with self._lock:
+            self.stats["misses"] += 1
+        return claim
+
+    def _shared_get(self, key):
+        if self.shared is None:
+            return None
+        try:
+            return self.shared.get(key)
+        except sqlite3.Error as e:
+            logger.warning("Could not read the shared grade cache: %s", e)
+            return None
+
+    def finish(self, claim, result, share=True):
+        """Store the grade of an owned claim and wake up the callers waiting for it"""
+        if share and self.shared is not None and claim.shared_key and not result.get('error'):
+            try:
+                self.shared.put(claim.shared_key, result)
+            except sqlite3.Error as e:
+                logger.warning("Could not write the shared grade cache: %s", e)
+        with self._lock:
+            event = self._pending.pop(claim.key)
+            if result.get('error'):
+                # Do not share failures, the waiting callers grade for themselves
+                self._forget(claim.key)
+            else:
+                self._results[claim.key] = result
+                while len(self._results) > self.max_entries:
+                    old_key, _ = self._results.popitem(last=False)
+                    self._forget(old_key)
+        event.set()
+
+    def wait(self, claim, timeout=None):
+        """
+        Wait for a WAIT claim
+
+        Returns:
+            dict: The shared result, or None if the owner failed (grade it yourself)
+        """
+        claim.event.wait(timeout)
+        with self._lock:
+            return self._results.get(claim.key)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_grade_cache():
+    """Get the process-wide grade cache, backed by the shared store when Config.DEDUP_SHARED_ENABLED is on"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GradeCache(shared=SharedGradeStore() if Config.DEDUP_SHARED_ENABLED else None)
+        return _cache
@@ -1,13 +1,148 @@
+import logging
+import os
+import re
+import tempfile
+import uuid
+from copy import copy
 import openpyxl
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment
 from datetime import datetime
 from pathlib import Path
+from utils.blob_store import resolve
+from utils.config import Config
+from utils.logger import get_logger
 
+logger = get_logger(__name__)
 
-def create_state_output_file(state_name):
+# Columns A-L of a state output file (see create_state_output_file)
+STATE_HEADERS = [
+    "Question", "Response", "Timestamp", "Status", "AI Review", "Rating", "If bad response, why?",
+    "Additional Notes", "Fix?", "Ground Truth Version", "Ground Truth Written By", "Date",
+]
+NOTES_COLUMN = 8
+
+# Per-criterion rubric scores are written to columns M-P
+RUBRIC_FIRST_COLUMN = 13
+RUBRIC_HEADERS = ["Accuracy", "Completeness", "Clarity", "Tone"]
+
+# Excel sheet titles: at most 31 characters, none of []:*?/\ and unique ignoring case
+SHEET_TITLE_MAX = 31
+_INVALID_TITLE_RE = re.compile(r"[\[\]:*?/\\]")
+
+
+def sheet_title(name, taken=None):
+    """
+    A valid worksheet title for a name such as a state name
+
+    Args:
+        taken (set): Lowercased titles already in the workbook; a clash gets a
+            " (2)", " (3)", ... suffix and the new title is added to the set
+
+    Returns: The title
+    """
+    title = _INVALID_TITLE_RE.sub("_", str(name)).strip("'")[:SHEET_TITLE_MAX] or "Sheet"
+    if taken is None:
+        return title
+    candidate, number = title, 2
+    while candidate.lower() in taken:
+        suffix = f" ({number})"
+        candidate = title[:SHEET_TITLE_MAX - len(suffix)] + suffix
+        number += 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def parse_question_range(value):
+    """
+    Parses a question range such as '1-10', '5' or '3-'
+    Returns: (first, last) 1-based tuple with last None for open-ended, or None if empty
+    """
+    if not value:
+        return None
+    first, sep, last = str(value).partition("-")
+    try:
+        first = int(first) if first.strip() else 1
+        if not sep:
+            return first, first
+        last = int(last) if last.strip() else None
+    except ValueError:
+        raise ValueError(f"Invalid question range: {value}")
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"Invalid question range: {value}")
+    return first, last
+
+
+def preview_workbook(filepath, sample_rows=3, max_columns=10):
+    """
+    Reads the first sheet of an uploaded workbook for the upload preview
+    Returns: dict with rows, columns, column_names and sample_data
+    Raises: whatever pandas raises for a file that is not a readable workbook
+    """
+    import pandas as pd
+
+    df = pd.read_excel(filepath)
+    return {
+        'rows': len(df),
+        'columns': len(df.columns),
+        'column_names': df.columns.tolist()[:max_columns],
+        'sample_data': df.head(sample_rows).to_dict('records') if len(df) > 0 else []
+    }
+
+
+def inspect_uat_workbook(filepath):
+    """
+    Previews a UAT test pack and checks its LLM-Url and Queries sheets
+    (mentors are rows with a state name and URL, questions non-empty cells of column A)
+    mentors and questions count what a run without a mentor list or question range
+    covers (the rows up to Config.MENTOR_ROW_LIMIT / QUESTION_ROW_LIMIT), the
+    total_ counts the whole sheet
+    Returns: dict with preview, sheets, mentors, questions, total_mentors, total_questions
+        and errors (empty when usable)
+    Raises: whatever pandas/openpyxl raise for a file that is not a readable workbook
+    """
+    preview = preview_workbook(filepath)
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        errors = []
+        mentor_rows, question_rows = [], []
+        for sheet_name in ("LLM-Url", "Queries"):
+            if sheet_name not in workbook.sheetnames:
+                errors.append(f"Sheet '{sheet_name}' not found")
+        if "LLM-Url" in workbook.sheetnames:
+            rows = workbook["LLM-Url"].iter_rows(min_row=2, max_col=2, values_only=True)
+            mentor_rows = [row_num for row_num, row in enumerate(rows, 2) if len(row) == 2 and row[0] and row[1]]
+            if not mentor_rows:
+                errors.append("No mentors (state name and URL) in sheet 'LLM-Url'")
+        if "Queries" in workbook.sheetnames:
+            rows = workbook["Queries"].iter_rows(min_row=2, max_col=1, values_only=True)
+            question_rows = [row_num for row_num, row in enumerate(rows, 2) if row and row[0]]
+            if not question_rows:
+                errors.append("No questions in sheet 'Queries'")
+        return {
+            'preview': preview,
+            'sheets': workbook.sheetnames,
+            'mentors': sum(1 for row_num in mentor_rows if row_num <= Config.MENTOR_ROW_LIMIT),
+            'questions': sum(1 for row_num in question_rows if row_num <= Config.QUESTION_ROW_LIMIT),
+            'total_mentors': len(mentor_rows),
+            'total_questions': len(question_rows),
+            'errors': errors,
+        }
+    finally:
+        workbook.close()
+
+
+def create_state_output_file(state_name, run_id=None):
     """
     Creates a new Excel file for the state with headers
+
+    The file name carries the run id and a random suffix, so concurrent runs or
+    two mentors of one state started in the same second never share a file.
+
+    Args:
+        run_id (str): Run the file belongs to, added to the file name
+
     Returns: (workbook, sheet, file_path)
     """
     try:
@@ -18,15 +153,16 @@ def create_state_output_file(state_name):
         # Clean state name for file naming (remove special characters)
         clean_state_name = "".join(c for c in state_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
         
-        # Create filename with timestamp
+        # Create filename with timestamp, run id and a unique suffix
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{clean_state_name}_{timestamp}.xlsx"
+        run_part = f"_{run_id}" if run_id else ""
+        filename = f"{clean_state_name}_{timestamp}{run_part}_{uuid.uuid4().hex[:8]}.xlsx"
         file_path = output_path / filename
         
         # Create new workbook
         workbook = Workbook()
         sheet = workbook.active
-        sheet.title = f"{state_name} Results"
+        sheet.title = sheet_title(f"{state_name} Results")
         
         # Add headers
         sheet['A1'] = "Question"
@@ -79,77 +215,78 @@ def create_state_output_file(state_name):
         if sheet.cell(row=1, column=12).value is not None:
             has_date_column = True
 
-        print(f"  Column C header: '{sheet.cell(row=1, column=3).value}' (has_timestamp: {has_timestamp_column})")
-        print(f"  Column D header: '{sheet.cell(row=1, column=4).value}' (has_status: {has_status_column})")
-        print(f"  Column E header: '{sheet.cell(row=1, column=5).value}' (has_ai_review: {has_ai_review_column})")
-        print(f"  Column F header: '{sheet.cell(row=1, column=6).value}' (has_rating: {has_rating_column})")
-        print(f"  Column G header: '{sheet.cell(row=1, column=7).value}' (has_bad_response: {has_bad_response_column})")
-        print(f"  Column H header: '{sheet.cell(row=1, column=8).value}' (has_notes: {has_notes_column})")
-        print(f"  Column I header: '{sheet.cell(row=1, column=9).value}' (has_fix: {has_fix_column})")
-        print(f"  Column J header: '{sheet.cell(row=1, column=10).value}' (has_ground_truth: {has_ground_truth_column})")
-        print(f"  Column K header: '{sheet.cell(row=1, column=11).value}' (has_writer: {has_writer_column})")
-        print(f"  Column L header: '{sheet.cell(row=1, column=12).value}' (has_date: {has_date_column})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Column C header: %r (has_timestamp: %s)", sheet.cell(row=1, column=3).value, has_timestamp_column)
+            logger.debug("Column D header: %r (has_status: %s)", sheet.cell(row=1, column=4).value, has_status_column)
+            logger.debug("Column E header: %r (has_ai_review: %s)", sheet.cell(row=1, column=5).value, has_ai_review_column)
+            logger.debug("Column F header: %r (has_rating: %s)", sheet.cell(row=1, column=6).value, has_rating_column)
+            logger.debug("Column G header: %r (has_bad_response: %s)", sheet.cell(row=1, column=7).value, has_bad_response_column)
+            logger.debug("Column H header: %r (has_notes: %s)", sheet.cell(row=1, column=8).value, has_notes_column)
+            logger.debug("Column I header: %r (has_fix: %s)", sheet.cell(row=1, column=9).value, has_fix_column)
+            logger.debug("Column J header: %r (has_ground_truth: %s)", sheet.cell(row=1, column=10).value, has_ground_truth_column)
+            logger.debug("Column K header: %r (has_writer: %s)", sheet.cell(row=1, column=11).value, has_writer_column)
+            logger.debug("Column L header: %r (has_date: %s)", sheet.cell(row=1, column=12).value, has_date_column)
 
         # Add headers if they don't exist
         if not has_timestamp_column:
             sheet.cell(row=1, column=3, value="Timestamp")
             sheet.cell(row=1, column=3).font = Font(bold=True)
             sheet.cell(row=1, column=3).alignment = Alignment(horizontal='center')
-            print("  Added Timestamp header to column C")
+            logger.debug("Added Timestamp header to column C")
         
         if not has_status_column:
             sheet.cell(row=1, column=4, value="Status")
             sheet.cell(row=1, column=4).font = Font(bold=True)
             sheet.cell(row=1, column=4).alignment = Alignment(horizontal='center')
-            print("  Added Status header to column D")
+            logger.debug("Added Status header to column D")
         
         if not has_ai_review_column:
             sheet.cell(row=1, column=5, value="AI Review")
             sheet.cell(row=1, column=5).font = Font(bold=True)
             sheet.cell(row=1, column=5).alignment = Alignment(horizontal='center')
-            print("  Added AI Review header to column E")
+            logger.debug("Added AI Review header to column E")
         
         if not has_rating_column:
             sheet.cell(row=1, column=6, value="Rating")
             sheet.cell(row=1, column=6).font = Font(bold=True)
             sheet.cell(row=1, column=6).alignment = Alignment(horizontal='center')
-            print("  Added Rating header to column F")
+            logger.debug("Added Rating header to column F")
         
         if not has_bad_response_column:
             sheet.cell(row=1, column=7, value="If bad response, why?")
             sheet.cell(row=1, column=7).font = Font(bold=True)
             sheet.cell(row=1, column=7).alignment = Alignment(horizontal='center')
-            print("  Added 'If bad response, why?' header to column G")
+            logger.debug("Added 'If bad response, why?' header to column G")
         
         if not has_notes_column:
             sheet.cell(row=1, column=8, value="Additional Notes")
             sheet.cell(row=1, column=8).font = Font(bold=True)
             sheet.cell(row=1, column=8).alignment = Alignment(horizontal='center')
-            print("  Added Additional Notes header to column H")
+            logger.debug("Added Additional Notes header to column H")
         
         if not has_fix_column:
             sheet.cell(row=1, column=9, value="Fix?")
             sheet.cell(row=1, column=9).font = Font(bold=True)
             sheet.cell(row=1, column=9).alignment = Alignment(horizontal='center')
-            print("  Added Fix? header to column I")
+            logger.debug("Added Fix? header to column I")
         
         if not has_ground_truth_column:
             sheet.cell(row=1, column=10, value="Ground Truth Version")
             sheet.cell(row=1, column=10).font = Font(bold=True)
             sheet.cell(row=1, column=10).alignment = Alignment(horizontal='center')
-            print("  Added Ground Truth Version header to column J")
+            logger.debug("Added Ground Truth Version header to column J")
         
         if not has_writer_column:
             sheet.cell(row=1, column=11, value="Ground Truth Written By")
             sheet.cell(row=1, column=11).font = Font(bold=True)
             sheet.cell(row=1, column=11).alignment = Alignment(horizontal='center')
-            print("  Added Ground Truth Written By header to column K")
+            logger.debug("Added Ground Truth Written By header to column K")
         
         if not has_date_column:
             sheet.cell(row=1, column=12, value="Date")
             sheet.cell(row=1, column=12).font = Font(bold=True)
             sheet.cell(row=1, column=12).alignment = Alignment(horizontal='center')
-            print("  Added Date header to column L")
+            logger.debug("Added Date header to column L")
         
         # Adjust column widths
         sheet.column_dimensions['C'].width = 20  # Timestamp column
@@ -163,12 +300,61 @@ def create_state_output_file(state_name):
         sheet.column_dimensions['K'].width = 25  # Ground Truth Written By column
         sheet.column_dimensions['L'].width = 15  # Date column
 
+        # Add per-criterion rubric score headers (columns M-P)
+        for column, header in enumerate(RUBRIC_HEADERS, start=RUBRIC_FIRST_COLUMN):
+            header_cell = sheet.cell(row=1, column=column, value=header)
+            header_cell.font = Font(bold=True)
+            header_cell.alignment = Alignment(horizontal='center')
+            sheet.column_dimensions[header_cell.column_letter].width = 15
+
         # Save initial file
-        workbook.save(file_path)
+        save_state_workbook(workbook, file_path)
         
-        print(f"Created output file: {file_path}")
+        logger.debug("Created output file %s", file_path)
         return workbook, sheet, file_path
         
     except Exception as e:
-        print(f"Error creating state output file: {str(e)}")
+        logger.error("Error creating state output file: %s", e)
+        raise
+
+
+def save_state_workbook(workbook, file_path):
+    """
+    Saves a state workbook whose cells may hold blob references (utils/blob_store.py)
+
+    The in-memory workbook keeps only the references; the responses are read back
+    one cell at a time while a write-only copy is streamed to disk, with the
+    header styles and column widths kept. The file is replaced atomically, so a
+    reader never sees a half-written workbook.
+    """
+    output = Workbook(write_only=True)
+    for sheet in workbook.worksheets:
+        copy_sheet = output.create_sheet(sheet.title)
+        for key, dimension in sheet.column_dimensions.items():
+            if dimension.width:
+                copy_sheet.column_dimensions[key].width = dimension.width
+
+        for row in sheet.iter_rows():
+            values = []
+            for cell in row:
+                value = resolve(cell.value)
+                if cell.has_style:
+                    value = WriteOnlyCell(copy_sheet, value=value)
+                    value.font = copy(cell.font)
+                    value.fill = copy(cell.fill)
+                    value.alignment = copy(cell.alignment)
+                values.append(value)
+            copy_sheet.append(values)
+
+    # A unique temp file in the same directory, so two writers never share it
+    # and the rename stays on one filesystem
+    file_path = str(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            output.save(f)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600, the output is shared
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
         raise
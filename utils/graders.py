@@ -0,0 +1,222 @@
+import json
+import re
+import threading
+
+from utils.config import Config
+from utils.rate_limit import call_with_retry, gemini_limiter
+from utils.grading_model import (
+    PROMPT_FINGERPRINT, BatchRubricScore, build_batch_prompt, build_user_prompt, create_grading_model
+)
+
+
+class Grader:
+    """
+    Interface for grading backends.
+
+    A grader turns a question/response pair into an evaluation text: a JSON
+    rubric object as parsed by utils.grading_model.parse_rubric.
+    """
+
+    name = "base"
+
+    @property
+    def cache_id(self):
+        """What grade caches key this grader's grades on: backend and prompt/rubric version"""
+        return f"{self.name}:{PROMPT_FINGERPRINT}"
+
+    def grade(self, question, response):
+        """
+        Grade a response to a question
+
+        Returns:
+            str: The evaluation text
+        """
+        raise NotImplementedError
+
+    def grade_batch(self, pairs):
+        """
+        Grade several question/response pairs in one request
+
+        Args:
+            pairs (list): [(question, response), ...]
+
+        Returns:
+            str: A JSON array of rubric objects with an "id" numbered from 1,
+                parsed by GradingPage.extract_rubrics
+
+        Raises:
+            NotImplementedError: If the backend has no multi-answer mode; callers
+                then grade the pairs one by one
+        """
+        raise NotImplementedError
+
+
+class GeminiGrader(Grader):
+    """Grades with a Gemini model using the rubric system prompt."""
+
+    name = "gemini"
+
+    def __init__(self, model_name='gemini-2.5-pro', model=None):
+        self.model_name = model_name
+        self._model = model
+        self._batch_model = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_id(self):
+        # Another model grades differently, so it does not share cached grades
+        return f"{self.name}:{self.model_name}:{PROMPT_FINGERPRINT}"
+
+    @property
+    def model(self):
+        # Created on first use so building a grader never needs the API key
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = create_grading_model(self.model_name)
+        return self._model
+
+    @property
+    def batch_model(self):
+        # Same rubric, but one structured object per item for multi-answer requests
+        if self._batch_model is None:
+            with self._lock:
+                if self._batch_model is None:
+                    self._batch_model = create_grading_model(
+                        self.model_name, response_schema=list[BatchRubricScore]
+                    )
+        return self._batch_model
+
+    def grade(self, question, response):
+        prompt = build_user_prompt(question, response)
+
+        def send():
+            chat = self.model.start_chat(history=[])
+            return chat.send_message(prompt).text
+
+        return call_with_retry(send, gemini_limiter(), description="Gemini grading")
+
+    def grade_batch(self, pairs):
+        prompt = build_batch_prompt(pairs)
+        return call_with_retry(
+            lambda: self.batch_model.generate_content(prompt).text,
+            gemini_limiter(), description="Gemini batch grading"
+        )
+
+
+class LocalGrader(Grader):
+    """
+    Deterministic, offline stand-in for the LLM grader.
+
+    Scores the same rubric (Accuracy 30, Completeness 30, Clarity 20, Tone 20)
+    from simple text features, so full pipeline runs, CI and regression sweeps
+    work without network access or an API key. Identical inputs always get the
+    same score; the numbers are a smoke signal, not a quality judgement.
+    """
+
+    name = "local"
+
+    WORD_RE = re.compile(r"[a-z0-9']+")
+    SENTENCE_RE = re.compile(r"[.!?]+(?:\s|$)")
+
+    STOPWORDS = frozenset(
+        "a an and are as at be by can do does for from have how i if in is it my of on or "
+        "should so that the their there this to was what when where which who why will with "
+        "you your".split()
+    )
+    REFUSAL_MARKERS = (
+        "i don't know", "i do not know", "i'm not sure", "cannot answer", "can't answer",
+        "unable to", "error:", "as an ai",
+    )
+    WARM_MARKERS = (
+        "happy to", "glad", "great question", "please", "thank", "hope this helps",
+        "good luck", "feel free", "you're welcome", "don't hesitate",
+    )
+
+    def _content_words(self, text):
+        return {w for w in self.WORD_RE.findall(text.lower()) if len(w) > 2 and w not in self.STOPWORDS}
+
+    def score(self, question, response):
+        """
+        Score a response on the rubric
+
+        Returns:
+            dict: accuracy, completeness, clarity, tone and total
+        """
+        text = (response or "").strip()
+        words = self.WORD_RE.findall(text.lower())
+        if not words:
+            return {"accuracy": 0, "completeness": 0, "clarity": 0, "tone": 0, "total": 0}
+
+        lowered = text.lower()
+
+        # Accuracy: refusals and error text lose most points
+        refusals = sum(marker in lowered for marker in self.REFUSAL_MARKERS)
+        accuracy = max(0, 27 - 12 * refusals)
+
+        # Completeness: how many of the question's content words are addressed, and enough substance
+        question_words = self._content_words(question or "")
+        coverage = len(question_words & set(words)) / len(question_words) if question_words else 1.0
+        substance = min(1.0, len(words) / 60)
+        completeness = round(30 * (0.6 * coverage + 0.4 * substance))
+
+        # Clarity: prefer medium sentences and answers that are not walls of text
+        sentences = max(1, len(self.SENTENCE_RE.findall(text)))
+        avg_sentence = len(words) / sentences
+        clarity = 20
+        if avg_sentence > 25:
+            clarity -= min(10, round((avg_sentence - 25) / 3))
+        if len(words) > 400:
+            clarity -= min(6, (len(words) - 400) // 100)
+        clarity = max(0, clarity)
+
+        # Tone: friendly phrasing and addressing the reader
+        warmth = sum(marker in lowered for marker in self.WARM_MARKERS)
+        addresses_reader = "you" in words or "your" in words
+        tone = min(20, 12 + 3 * warmth + (3 if addresses_reader else 0))
+
+        return {
+            "accuracy": accuracy,
+            "completeness": completeness,
+            "clarity": clarity,
+            "tone": tone,
+            "total": accuracy + completeness + clarity + tone,
+        }
+
+    def grade(self, question, response):
+        return json.dumps(self.score(question, response))
+
+    def grade_batch(self, pairs):
+        return json.dumps([
+            {"id": item_id, **self.score(question, response)}
+            for item_id, (question, response) in enumerate(pairs, 1)
+        ])
+
+
+GRADERS = {
+    GeminiGrader.name: GeminiGrader,
+    LocalGrader.name: LocalGrader,
+}
+
+_graders = {}
+_graders_lock = threading.Lock()
+
+
+def get_grader(name=None):
+    """
+    Get the shared grader for a backend
+
+    Args:
+        name (str): "gemini" or "local"; defaults to Config.GRADER_BACKEND
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    name = (name or Config.GRADER_BACKEND).lower()
+    if name not in GRADERS:
+        raise ValueError(f"Unknown grader '{name}'. Choose one of: {', '.join(sorted(GRADERS))}")
+
+    with _graders_lock:
+        if name not in _graders:
+            _graders[name] = GRADERS[name]()
+        return _graders[name]
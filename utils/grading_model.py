@@ -1,19 +1,51 @@
+import hashlib
+import json
 import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import re
+import threading
 
-# Load environment variables from .env file
-load_dotenv()
+try:
+    # The Gemini SDK (via pydantic) needs this TypedDict on Python < 3.12
+    from typing_extensions import TypedDict
+except ImportError:
+    from typing import TypedDict
 
-# Get API key from environment variable
-api_key = os.getenv('GOOGLE_API_KEY')
-print("Google API Key: ", api_key)
+# The Gemini SDK is imported and configured on first use (see _get_genai) so that
+# importing this module - e.g. during pytest collection in every xdist worker -
+# stays cheap and does not fail for runs that never grade.
+_genai = None
+_genai_lock = threading.Lock()
 
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY not found in environment variables. Please set it in your .env file or as an environment variable.")
 
-# Configure the API
-genai.configure(api_key=api_key)
+def _get_genai():
+    """
+    Import and configure google.generativeai once, on first use
+    
+    Raises:
+        ValueError: If GOOGLE_API_KEY is not set
+    """
+    global _genai
+    if _genai is not None:
+        return _genai
+    
+    with _genai_lock:
+        if _genai is None:
+            from dotenv import load_dotenv
+            import google.generativeai as genai
+            
+            # Load environment variables from .env file
+            load_dotenv()
+            
+            # Get API key from environment variable
+            api_key = os.getenv('GOOGLE_API_KEY')
+            if not api_key:
+                raise ValueError("GOOGLE_API_KEY not found in environment variables. Please set it in your .env file or as an environment variable.")
+            
+            # Configure the API
+            genai.configure(api_key=api_key)
+            _genai = genai
+    
+    return _genai
 
 # Define the system prompt for the insurance specialist grading bot
 SYSTEM_PROMPT = """You are a meticulous Expert Senior Editor and Professor of Real Estate. 
@@ -32,15 +64,157 @@ Tone: Does the answer convey a friendly, considerate, warm, respectful mood? Thi
 *Task:*
 Based on that rubric, and the weighting of scores for each section, assign a final summative grade.
 
-If the answer is excellent across all criteria, it will likely score nearly all points in Accuracy (perhaps 25-30 points), Completeness (perhaps 25-30 points), Clarity (perhaps 15-20 points), and Tone (perhaps 15-20 points), totalling 80-100 points overall. Only ONE numerical value that is the ACTUAL SUM of these scores, will be output in the end.
+If the answer is excellent across all criteria, it will likely score nearly all points in Accuracy (perhaps 25-30 points), Completeness (perhaps 25-30 points), Clarity (perhaps 15-20 points), and Tone (perhaps 15-20 points), totalling 80-100 points overall. The total is the ACTUAL SUM of these scores.
+
+For Example: an AMAZING answer to a query that hits Accuracy: 28, Completeness: 28, Clarity: 20, Tone: 18 is output as:
+{"accuracy": 28, "completeness": 28, "clarity": 20, "tone": 18, "total": 94}
+
+Finally, make sure that you ONLY output the JSON object with the four criterion scores and their total."""
+
+# Rubric criteria and their maximum points, in output column order
+RUBRIC_CRITERIA = {
+    "accuracy": 30,
+    "completeness": 30,
+    "clarity": 20,
+    "tone": 20,
+}
+
+
+class RubricScore(TypedDict):
+    """Structured grading output (used as the Gemini response schema)"""
+    accuracy: int
+    completeness: int
+    clarity: int
+    tone: int
+    total: int
+
+
+class BatchRubricScore(RubricScore):
+    """One item of a multi-answer grading output"""
+    id: int
+
+
+# Model output may wrap the JSON in a markdown code fence
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL | re.IGNORECASE)
+# Legacy plain-text output: the whole reply is one score, e.g. "85", "Score: 85" or "85/100"
+_PLAIN_SCORE_RE = re.compile(r"^\s*(?:score\s*:\s*)?(\d{1,3})\s*(?:/\s*100)?\s*$", re.IGNORECASE)
+
+
+def validate_rubric(data):
+    """
+    Validate one structured grade
+    
+    Args:
+        data (dict): accuracy, completeness, clarity and tone scores (total is optional
+            and always recomputed as their sum)
+    
+    Returns:
+        dict: The criterion scores and total, or None if a criterion is missing or out of range
+    """
+    if not isinstance(data, dict):
+        return None
+    
+    rubric = {}
+    for criterion, max_points in RUBRIC_CRITERIA.items():
+        value = data.get(criterion)
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= max_points:
+            return None
+        rubric[criterion] = value
+    
+    rubric["total"] = sum(rubric.values())
+    return rubric
+
+
+def parse_rubric(evaluation_text):
+    """
+    Parse a grading reply into a rubric
+    
+    Accepts the structured JSON object (optionally in a code fence), or a reply
+    that consists of nothing but a 0-100 score. Anything else is rejected rather
+    than guessed at.
+    
+    Returns:
+        dict: accuracy, completeness, clarity, tone (None for plain scores) and total,
+            or None if the reply is not a valid grade
+    """
+    if not isinstance(evaluation_text, str):
+        return None
+    
+    fenced = _CODE_FENCE_RE.match(evaluation_text)
+    text = fenced.group(1) if fenced else evaluation_text
+    
+    plain = _PLAIN_SCORE_RE.match(text)
+    if plain:
+        total = int(plain.group(1))
+        if total > 100:
+            return None
+        return {**{criterion: None for criterion in RUBRIC_CRITERIA}, "total": total}
+    
+    try:
+        return validate_rubric(json.loads(text))
+    except ValueError:
+        return None
+
+def build_user_prompt(question, response):
+    """
+    Build the grading request for one question/response pair
+    """
+    return f"""You will receive a question and a response in the following format:
+
+    <question>
+    {question}
+    </question>
 
-For Example: an AMAZING answer to a query that hits Accuracy: 28, Completeness: 28, Clarity: 20, Tone: 18, then "94" is what the specific summative output will be. 
+    <response>
+    {response}
+    </response>
 
-Finally, make sure that you have ONLY output the single score that is the summative rubric tally."""
+    Score the response on the rubric. Output ONLY the JSON object:
+    {{"accuracy": <0-30>, "completeness": <0-30>, "clarity": <0-20>, "tone": <0-20>, "total": <sum>}}"""
 
-def create_grading_model(model_name='gemini-2.5-pro'):
+def build_batch_prompt(pairs):
+    """
+    Build one grading request for several question/response pairs
+    
+    Args:
+        pairs (list): [(question, response), ...]; items are numbered from 1
+    """
+    items = "\n\n".join(
+        f"""    <item id="{item_id}">
+    <question>
+    {question}
+    </question>
+    <response>
+    {response}
+    </response>
+    </item>"""
+        for item_id, (question, response) in enumerate(pairs, 1)
+    )
+    return f"""You will receive {len(pairs)} independent items, each with a question and a response:
+
+{items}
+
+Score each response on the rubric, grading every item on its own.
+Output ONLY a JSON array with exactly one object per item, in item order:
+[{{"id": 1, "accuracy": <0-30>, "completeness": <0-30>, "clarity": <0-20>, "tone": <0-20>, "total": <sum>}}, ...]"""
+
+# Short hash of the system prompt, the request templates and the rubric; cached
+# grades made under another version of them are not reused (utils/dedup.py)
+PROMPT_FINGERPRINT = hashlib.sha256("\0".join((
+    SYSTEM_PROMPT, json.dumps(RUBRIC_CRITERIA, sort_keys=True),
+    build_user_prompt("", ""), build_batch_prompt([("", "")]),
+)).encode("utf-8")).hexdigest()[:12]
+
+def create_grading_model(model_name='gemini-2.5-pro', response_schema=RubricScore):
     """
     Create a model with the insurance specialist grading system prompt
+    
+    Args:
+        model_name (str): The Gemini model
+        response_schema: Structured output schema, e.g. RubricScore or list[BatchRubricScore];
+            None for free text
     """
     generation_config = {
         "temperature": 0.1,  # Lower temperature for more consistent grading
@@ -48,7 +222,11 @@ def create_grading_model(model_name='gemini-2.5-pro'):
         "top_k": 40,
         "max_output_tokens": 8192,
     }
+    if response_schema is not None:
+        generation_config["response_mime_type"] = "application/json"
+        generation_config["response_schema"] = response_schema
     
+    genai = _get_genai()
     model = genai.GenerativeModel(
         model_name,
         system_instruction=SYSTEM_PROMPT,
@@ -0,0 +1,271 @@
+import atexit
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils.config import Config
+from utils.logger import get_logger
+from utils.retention import prune_directory
+
+logger = get_logger(__name__)
+
+
+class JobStore:
+    """
+    Status of background jobs, e.g. clearing a session's uploads.
+
+    Stored in SQLite so a job started by one server worker process can be
+    polled through any other.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_kind
+            ON jobs (kind, created_at);
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.JOBS_DB
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind, unless_since=None):
+        """
+        Record a new queued job
+
+        Args:
+            kind (str): What the job does, e.g. "clear_uploads"
+            unless_since (float): Don't create one if a job of this kind was
+                created after this time (by any process)
+
+        Returns:
+            str: The generated job ID, or None if skipped because of unless_since
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            # Take the write lock first so two processes cannot both see no recent job
+            conn.execute("BEGIN IMMEDIATE")
+            if unless_since is not None:
+                recent = conn.execute(
+                    "SELECT 1 FROM jobs WHERE kind = ? AND created_at > ? LIMIT 1", (kind, unless_since)
+                ).fetchone()
+                if recent:
+                    return None
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, kind, time.time())
+            )
+        return job_id
+
+    def mark_running(self, job_id):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE job_id = ?", (time.time(), job_id)
+            )
+
+    def mark_finished(self, job_id, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                ('failed' if error else 'done', json.dumps(result), error, time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        """Get a job by ID, or None if it is unknown"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def recent(self, limit=50):
+        """The latest jobs, newest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def remove_older_than(self, cutoff):
+        """Forget finished jobs that finished before a time"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+
+class Janitor:
+    """
+    Runs cleanup jobs on one background thread, one at a time.
+
+    Request handlers submit() a job and return its ID straight away instead of
+    deleting files themselves; the status is kept in a JobStore. schedule()
+    repeats a job (e.g. the retention sweep) every so often. Every server
+    worker process has its own janitor, but a scheduled job is skipped when
+    another process already ran it within the interval.
+    """
+
+    def __init__(self, job_store=None):
+        self.job_store = job_store or JobStore()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="janitor", daemon=True)
+                self._thread.start()
+
+    def submit(self, kind, func, *args, unless_since=None):
+        """
+        Queue func(*args) as a background job
+
+        Args:
+            kind (str): What the job does, shown in its status
+            func: Returns the job's result (JSON serializable)
+            unless_since (float): See JobStore.create
+
+        Returns:
+            str: The job ID to poll, or None if skipped
+        """
+        job_id = self.job_store.create(kind, unless_since=unless_since)
+        if job_id is not None:
+            self._ensure_started()
+            self._queue.put((job_id, kind, func, args))
+        return job_id
+
+    def schedule(self, kind, func, interval):
+        """Submit func every interval seconds, skipped if any process ran it more recently"""
+        def repeat():
+            while not self._stopped.wait(interval):
+                try:
+                    self.submit(kind, func, unless_since=time.time() - interval)
+                except Exception as e:
+                    logger.warning("Could not schedule %s: %s", kind, e)
+
+        threading.Thread(target=repeat, name=f"janitor-{kind}", daemon=True).start()
+
+    def _run(self):
+        while True:
+            job_id, kind, func, args = self._queue.get()
+            try:
+                if job_id is None:
+                    return
+                self.job_store.mark_running(job_id)
+                try:
+                    result = func(*args)
+                except Exception as e:
+                    logger.warning("Job %s (%s) failed: %s", job_id, kind, e)
+                    self.job_store.mark_finished(job_id, error=str(e))
+                else:
+                    logger.info("Job %s (%s) done", job_id, kind, extra={'result': result})
+                    self.job_store.mark_finished(job_id, result=result)
+            except Exception as e:
+                logger.warning("Could not record job %s: %s", job_id, e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until every submitted job has finished"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """Stop scheduling, finish the submitted jobs and stop the thread"""
+        self._stopped.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put((None, None, None, None))
+            thread.join()
+
+
+_janitor = None
+_janitor_lock = threading.Lock()
+
+
+def get_janitor():
+    """Get the process-wide janitor"""
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = Janitor()
+            atexit.register(_janitor.stop)
+        return _janitor
+
+
+def remove_paths(paths):
+    """
+    Delete files and folders
+
+    Returns:
+        dict: removed (paths deleted) and freed_bytes
+    """
+    removed = freed = 0
+    for path in paths:
+        try:
+            if os.path.isfile(path):
+                size = os.path.getsize(path)
+                os.remove(path)
+            elif os.path.isdir(path):
+                size = sum(
+                    os.path.getsize(os.path.join(root, name))
+                    for root, _, names in os.walk(path) for name in names
+                )
+                shutil.rmtree(path)
+            else:
+                continue
+            removed += 1
+            freed += size
+        except Exception as e:
+            logger.warning("Could not remove %s: %s", path, e)
+    return {'removed': removed, 'freed_bytes': freed}
+
+
+def sweep(policies):
+    """
+    Prune every folder to its retention policy
+
+    Args:
+        policies (list): Dicts with a directory and any of prune_directory's
+            max_age, max_count, max_bytes and pattern
+
+    Returns:
+        dict: removed and freed_bytes per directory
+    """
+    results = {}
+    for policy in policies:
+        policy = dict(policy)
+        directory = policy.pop('directory')
+        if os.path.isdir(directory):
+            results[directory] = prune_directory(directory, **policy)
+    return results
@@ -0,0 +1,142 @@
+"""
+Logging for the grading pipeline.
+
+Modules log through get_logger(__name__) instead of print. Records are handed
+to a queue on the calling thread and formatted and written to stdout by one
+background listener thread, so a log call on the hot path costs a level check
+(and, when enabled, a queue put) rather than terminal I/O. Extra fields passed
+with extra={...} are written as key=value pairs, or as JSON keys with
+UAT_LOG_FORMAT=json.
+
+    logger = get_logger(__name__)
+    logger.debug("Question %s sent", idx, extra={'state': state_name})
+
+Defaults (utils/config.py) keep per-question detail at DEBUG, below the default
+INFO level, so a run's captured output holds one summary per mentor. Raise the
+detail with UAT_LOG_LEVEL=DEBUG; UAT_LOG_SAMPLE_EVERY=N keeps only every Nth
+DEBUG/INFO record of each log call (warnings and errors are never sampled).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from collections import Counter
+
+from utils.config import Config
+
+ROOT_LOGGER = "uat"
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener = None
+
+
+class SamplingFilter(logging.Filter):
+    """Let through every Nth DEBUG/INFO record of each call site, and every warning or error."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts[key]
+            self._counts[key] += 1
+        return count % self.every == 0
+
+
+class StructuredFormatter(logging.Formatter):
+    """Text lines with the extra fields as key=value, or one JSON object per record."""
+
+    def __init__(self, json_lines=False):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES}
+        if self.json_lines:
+            entry = {
+                "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = super().format(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to sys.stdout as it is when the record is written (pytest and the worker pool swap it)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive a fork; start one in the child
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+
+def configure_logging():
+    """Set up the queue handler and listener once per process (get_logger does this)"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        handler = _StdoutHandler()
+        handler.setFormatter(StructuredFormatter(json_lines=Config.LOG_FORMAT == "json"))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_EVERY))
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(Config.LOG_LEVEL.upper())
+        root.addHandler(queue_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+
+def get_logger(name):
+    """A logger under the pipeline's root logger, e.g. get_logger(__name__)"""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def flush_logs():
+    """Wait until every record logged so far is written, e.g. before stdout is swapped back"""
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
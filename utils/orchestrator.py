@@ -0,0 +1,434 @@
+"""
+Standalone sweep runner: sends every question of a UAT workbook to every mentor
+on a pool of browsers, grades the answers on a pool of grading workers and writes
+one summary, without going through pytest.
+
+    python -m utils.orchestrator --uat-file uploads/my_pack.xlsx --browsers 4 --grading-workers 2
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from utils.blob_store import resolve, spill
+from utils.config import Config
+from utils.dedup import GradeCache
+from utils.excel_read import create_state_output_file, parse_question_range, save_state_workbook
+from utils.logger import get_logger
+from utils.results_store import get_results_store, new_run_id, record_results, result_row, stored_result
+
+logger = get_logger(__name__)
+
+
+class StateWriter:
+    """One state's output workbook, shared by the browser and grading threads."""
+
+    def __init__(self, state_name, run_id=None):
+        self.workbook, self.sheet, self.file_path = create_state_output_file(state_name, run_id)
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+    def _save_if_due(self):
+        if time.monotonic() - self._last_save >= Config.WORKBOOK_SAVE_INTERVAL:
+            save_state_workbook(self.workbook, self.file_path)
+            self._last_save = time.monotonic()
+
+    def write_response(self, row, question, response=None, error=None):
+        from pages.grading_page import GradingPage
+
+        with self._lock:
+            GradingPage.write_scrape_result(self.sheet, row, question, response, error)
+            self._save_if_due()
+
+    def write_grade(self, row, result):
+        from pages.grading_page import GradingPage
+
+        with self._lock:
+            ok = GradingPage.write_grade_result(self.sheet, row, result)
+            self._save_if_due()
+        return ok
+
+    def write_reused(self, row, question, previous):
+        from pages.grading_page import GradingPage
+
+        with self._lock:
+            GradingPage.write_reused_result(self.sheet, row, question, previous)
+            self._save_if_due()
+
+    def close(self):
+        with self._lock:
+            save_state_workbook(self.workbook, self.file_path)
+            self.workbook.close()
+
+
+class MentorScheduler:
+    """
+    Hands out (mentor x question) work items, balanced across mentors.
+
+    Each mentor has its own queue. Browsers take the next item from the mentor
+    after the last one served that has no more than Config.MENTOR_MAX_CONCURRENCY
+    questions in flight, so no browser sits waiting on a busy mentor while others
+    have work.
+    """
+
+    def __init__(self, items):
+        self._queues = {}
+        for item in items:
+            self._queues.setdefault(item['mentor_url'], deque()).append(item)
+        self._order = deque(self._queues)
+        self._in_flight = dict.fromkeys(self._queues, 0)
+        self._cond = threading.Condition()
+        self._cancelled = False
+
+    def next_item(self):
+        """Block until an item is available; None when all items are handed out"""
+        with self._cond:
+            while True:
+                if self._cancelled or not any(self._queues.values()):
+                    return None
+                for _ in range(len(self._order)):
+                    mentor_url = self._order[0]
+                    self._order.rotate(-1)
+                    if self._queues[mentor_url] and self._in_flight[mentor_url] < Config.MENTOR_MAX_CONCURRENCY:
+                        self._in_flight[mentor_url] += 1
+                        return self._queues[mentor_url].popleft()
+                self._cond.wait()
+
+    def done(self, item):
+        with self._cond:
+            self._in_flight[item['mentor_url']] -= 1
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Stop handing out items and return the ones never started"""
+        with self._cond:
+            self._cancelled = True
+            remaining = [item for items in self._queues.values() for item in items]
+            for items in self._queues.values():
+                items.clear()
+            self._cond.notify_all()
+        return remaining
+
+
+class Orchestrator:
+    """
+    Runs a full sweep of a UAT workbook.
+
+    Browser threads (each with its own Playwright instance and Chromium) fetch
+    mentor responses and queue them for grading; grading threads take up to
+    Config.GRADING_BATCH_SIZE responses at a time. Results go to the usual
+    per-state output workbooks.
+    """
+
+    def __init__(self, uat_file, mentor_names=None, question_range=None, question_delay=None,
+                 grader=None, browsers=None, grading_workers=None, changed_only=False):
+        self.uat_file = uat_file
+        self.mentor_names = mentor_names
+        self.question_range = question_range
+        self.question_delay = question_delay
+        # A backend name, or a Grader instance (e.g. a stub in benchmarks)
+        self.grader = grader
+        self.grader_name = getattr(grader, 'name', None) or grader or Config.GRADER_BACKEND
+        self._grader_id = None  # cache_id of the resolved grader, set by run()
+        self.browsers = browsers or Config.ORCHESTRATOR_BROWSERS
+        self.grading_workers = grading_workers or Config.ORCHESTRATOR_GRADING_WORKERS
+        self.changed_only = changed_only
+
+        self.run_id = new_run_id()
+        self._grade_cache = GradeCache() if Config.DEDUP_ENABLED else None
+        self._grading_queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        # Keyed by (state_name, mentor_url): states may share a mentor URL
+        self._stats = {}
+        self._writers = {}
+
+    @staticmethod
+    def _key(item):
+        return item['state_name'], item['mentor_url']
+
+    def _record(self, item, **counts):
+        with self._stats_lock:
+            stats = self._stats[self._key(item)]
+            for key, value in counts.items():
+                stats[key] += value
+            stats['last_finished'] = time.time()
+
+    def _fail_item(self, item, error):
+        self._writers[self._key(item)].write_response(item['row'], item['question'], error=error)
+        record_results([self._result_row(item, error=error)])
+        self._record(item, failed=1)
+        logger.warning("Question %s failed: %s", item['index'], error, extra={'state': item['state_name']})
+
+    def _result_row(self, item, response=None, result=None, error=None):
+        return result_row(self.run_id, item['state_name'], item['mentor_url'], item['index'],
+                          item['question'], response, result, error, grader=self._grader_id)
+
+    def _browser_worker(self, scheduler, active):
+        from playwright.sync_api import sync_playwright
+        from pages.grading_page import GradingPage
+
+        try:
+            with sync_playwright() as playwright:
+                browser = playwright.chromium.launch(**Config.get_browser_options("chromium"))
+                context = browser.new_context(**Config.BROWSER_CONTEXT_ARGS)
+                page = context.new_page()
+
+                while (item := scheduler.next_item()) is not None:
+                    if page.is_closed():
+                        page = context.new_page()
+
+                    started = time.perf_counter()
+                    try:
+                        # Queued and written as a blob reference when long
+                        response = spill(GradingPage(page).navigate_to_mentor_api(
+                            item['question'], item['mentor_url'], self.question_delay
+                        ))
+                    except Exception as e:
+                        self._fail_item(item, e)
+                        continue
+                    finally:
+                        scheduler.done(item)
+                        self._record(item, scrape_seconds=time.perf_counter() - started)
+
+                    self._writers[self._key(item)].write_response(item['row'], item['question'], response)
+                    self._grading_queue.put((item, response))
+                    logger.debug("Question %s scraped", item['index'], extra={'state': item['state_name']})
+
+                context.close()
+                browser.close()
+        except Exception as e:
+            logger.error("Browser worker stopped: %s", e)
+        finally:
+            with self._stats_lock:
+                active[0] -= 1
+                last_browser = active[0] == 0
+            # Nobody is left to fetch the remaining items
+            if last_browser:
+                for item in scheduler.cancel():
+                    self._fail_item(item, "No browser available")
+
+    def _grading_worker(self, grader):
+        from pages.grading_page import GradingPage
+
+        while True:
+            entry = self._grading_queue.get()
+            if entry is None:
+                break
+
+            # Take whatever else is ready, up to one batch
+            batch = [entry]
+            while len(batch) < Config.GRADING_BATCH_SIZE:
+                try:
+                    entry = self._grading_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._grading_queue.put(None)  # leave the stop signal for the next loop
+                    break
+                batch.append(entry)
+
+            started = time.perf_counter()
+            results = GradingPage.grade_responses(
+                [(str(item['question']), str(resolve(response))) for item, response in batch], grader,
+                cache=self._grade_cache
+            )
+            share = (time.perf_counter() - started) / len(batch)
+            record_results([
+                self._result_row(item, response, result) for (item, response), result in zip(batch, results)
+            ])
+
+            for (item, _), result in zip(batch, results):
+                ok = self._writers[self._key(item)].write_grade(item['row'], result)
+                self._record(item, grade_seconds=share, processed=int(ok), failed=int(not ok))
+                logger.debug("Question %s graded: %s", item['index'], result['score'] if ok else result['error'],
+                             extra={'state': item['state_name']})
+
+    def run(self):
+        """
+        Run the sweep
+
+        Returns:
+            dict: The summary (also written to output/orchestrator_summary_<timestamp>.json)
+        """
+        from pages.grading_page import GradingPage
+        from utils.graders import Grader, get_grader
+
+        reader = GradingPage(None)
+        mentors = reader.read_mentor_configurations(self.uat_file, self.mentor_names)
+        questions = reader.read_questions_from_template(self.uat_file, self.question_range, return_hashes=True)
+        grader = self.grader if isinstance(self.grader, Grader) else get_grader(self.grader_name)
+        self._grader_id = grader.cache_id
+
+        if Config.RESULTS_STORE_ENABLED:
+            get_results_store().start_run(self.run_id, "orchestrator", self.uat_file)
+
+        reused = {}
+        for state_name, mentor_url in mentors:
+            self._writers[state_name, mentor_url] = StateWriter(state_name, self.run_id)
+            self._stats[state_name, mentor_url] = {
+                'state_name': state_name, 'processed': 0, 'failed': 0, 'reused': 0,
+                'scrape_seconds': 0.0, 'grade_seconds': 0.0, 'last_finished': None,
+            }
+            if self.changed_only:
+                reused[state_name, mentor_url] = GradingPage.find_unchanged_results(
+                    state_name, mentor_url, questions, grader
+                )
+
+        # One row per question in every state file; items interleave the mentors
+        items = [
+            {'state_name': state_name, 'mentor_url': mentor_url, 'index': index,
+             'row': index + 1, 'question': question}
+            for index, (question, _) in enumerate(questions, 1)
+            for state_name, mentor_url in mentors
+        ]
+
+        # Unchanged questions are copied from earlier runs instead of being scheduled
+        if reused:
+            scheduled = []
+            for item in items:
+                previous = reused[self._key(item)].get(item['index'])
+                if previous is None:
+                    scheduled.append(item)
+                    continue
+                self._writers[self._key(item)].write_reused(item['row'], item['question'], previous)
+                record_results([self._result_row(item, previous['response'], stored_result(previous))])
+                self._record(item, processed=1, reused=1)
+            logger.info("Reused %s unchanged results, %s items to run", len(items) - len(scheduled), len(scheduled))
+            items = scheduled
+
+        started_at = datetime.now()
+        started = time.time()
+        scheduler = MentorScheduler(items)
+        browser_count = max(1, min(self.browsers, len(items)))
+        active = [browser_count]
+
+        threads = [
+            threading.Thread(target=self._browser_worker, args=(scheduler, active), daemon=True)
+            for _ in range(browser_count)
+        ]
+        graders = [
+            threading.Thread(target=self._grading_worker, args=(grader,), daemon=True)
+            for _ in range(self.grading_workers)
+        ]
+        for thread in threads + graders:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for _ in graders:
+            self._grading_queue.put(None)
+        for thread in graders:
+            thread.join()
+
+        for writer in self._writers.values():
+            writer.close()
+
+        summary = self.build_summary(started_at, time.time() - started, len(questions), browser_count)
+        summary['summary_file'] = self.write_summary(summary, started_at)
+        return summary
+
+    def build_summary(self, started_at, duration, question_count, browser_count):
+        """Per-mentor throughput, failures and stage timings for a finished sweep"""
+        mentors = []
+        for (state_name, mentor_url), stats in self._stats.items():
+            mentor_duration = (stats['last_finished'] - started_at.timestamp()) if stats['last_finished'] else 0
+            mentors.append({
+                'state_name': state_name,
+                'mentor_url': mentor_url,
+                'questions': question_count,
+                'processed': stats['processed'],
+                'failed': stats['failed'],
+                'reused': stats['reused'],
+                'duration_seconds': round(mentor_duration, 2),
+                'questions_per_minute': round(stats['processed'] / mentor_duration * 60, 2) if mentor_duration else 0,
+                'avg_scrape_seconds': round(stats['scrape_seconds'] / question_count, 2) if question_count else 0,
+                'avg_grade_seconds': round(stats['grade_seconds'] / question_count, 2) if question_count else 0,
+                'output_file': str(self._writers[state_name, mentor_url].file_path),
+            })
+
+        processed = sum(m['processed'] for m in mentors)
+        return {
+            'run_id': self.run_id,
+            'uat_file': self.uat_file,
+            'started_at': started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration_seconds': round(duration, 2),
+            'browsers': browser_count,
+            'grading_workers': self.grading_workers,
+            'grader': self.grader_name,
+            'items': question_count * len(mentors),
+            'processed': processed,
+            'failed': sum(m['failed'] for m in mentors),
+            'reused': sum(m['reused'] for m in mentors),
+            'questions_per_minute': round(processed / duration * 60, 2) if duration else 0,
+            'stages': {
+                'scrape_seconds': round(sum(s['scrape_seconds'] for s in self._stats.values()), 2),
+                'grade_seconds': round(sum(s['grade_seconds'] for s in self._stats.values()), 2),
+            },
+            'dedup': dict(self._grade_cache.stats) if self._grade_cache else None,
+            'mentors': mentors,
+        }
+
+    def write_summary(self, summary, started_at):
+        os.makedirs("output", exist_ok=True)
+        path = os.path.join("output", f"orchestrator_summary_{started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return path
+
+
+def print_summary(summary):
+    print(f"\n{'='*80}")
+    print(f"SWEEP COMPLETED in {summary['duration_seconds']}s "
+          f"({summary['questions_per_minute']} questions/min)")
+    print(f"{'='*80}")
+    print(f"{'State':<25}{'Processed':>10}{'Failed':>8}{'Q/min':>8}{'Scrape s':>10}{'Grade s':>9}")
+    for mentor in summary['mentors']:
+        print(f"{mentor['state_name'][:24]:<25}{mentor['processed']:>10}{mentor['failed']:>8}"
+              f"{mentor['questions_per_minute']:>8}{mentor['avg_scrape_seconds']:>10}"
+              f"{mentor['avg_grade_seconds']:>9}")
+    print(f"\nProcessed: {summary['processed']}/{summary['items']} ({summary['reused']} reused), "
+          f"failed: {summary['failed']}")
+    if summary['dedup']:
+        dedup = summary['dedup']
+        print(f"Grading calls saved by deduplication: {dedup['hits'] + dedup['waits']} "
+              f"({dedup['near_hits']} near-duplicates)")
+    print(f"Summary saved to: {summary['summary_file']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a full UAT grading sweep without pytest")
+    parser.add_argument("--uat-file", default=str(Config.DEFAULT_UAT_FILE),
+                        help="Workbook with the LLM-Url and Queries sheets")
+    parser.add_argument("--mentors", help="Comma-separated state names (default: every row of the LLM-Url sheet)")
+    parser.add_argument("--questions", help="Question range such as 1-10 or 5- (default: every row of the Queries sheet)")
+    parser.add_argument("--question-delay", type=float, help="Minimum seconds between questions to one mentor")
+    parser.add_argument("--grader", help="Grading backend: gemini or local")
+    parser.add_argument("--browsers", type=int, help="Browsers fetching mentor responses")
+    parser.add_argument("--grading-workers", type=int, help="Threads grading responses")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Only run questions that are new or edited since an earlier run")
+    args = parser.parse_args(argv)
+
+    try:
+        question_range = parse_question_range(args.questions)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.question_delay is not None and not (0 <= args.question_delay < math.inf):
+        parser.error("--question-delay must be 0 or more seconds")
+    mentor_names = [name.strip() for name in args.mentors.split(",") if name.strip()] if args.mentors else None
+
+    summary = Orchestrator(
+        args.uat_file, mentor_names, question_range, args.question_delay, args.grader,
+        args.browsers, args.grading_workers, args.changed_only
+    ).run()
+    print_summary(summary)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+import math
+import random
+import threading
+import time
+
+from utils.config import Config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Slowest rate a limiter runs at (requests per second); keeps the token refill
+# and the wait time finite whatever delay a caller passes
+MIN_RATE = 0.001
+
+
+def _clamp_rate(rate):
+    rate = float(rate)
+    return rate if math.isfinite(rate) and rate >= MIN_RATE else MIN_RATE
+
+
+class RetryableHTTPError(Exception):
+    """An HTTP response that is worth retrying (429 or 5xx)."""
+
+    def __init__(self, status, url=None):
+        super().__init__(f"HTTP {status}" + (f" from {url}" if url else ""))
+        self.status = status
+        self.url = url
+
+
+class NavigationTimeout(Exception):
+    """A page that did not load in time (worth retrying, unlike a missing element)."""
+
+    def __init__(self, url):
+        super().__init__(f"Timed out loading {url}")
+        self.url = url
+
+
+# Exception class names that mean "throttled, overloaded or slow" across the
+# Gemini SDK (google.api_core) and the standard library. Playwright's own
+# TimeoutError is left out: an element that never appears is not fixed by
+# asking again, page loads that time out are raised as NavigationTimeout.
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "ConnectionError",
+    "ConnectionResetError", "RetryableHTTPError", "NavigationTimeout",
+}
+
+
+def is_retryable_error(error):
+    """
+    Decide whether an error is a rate limit, server error or timeout
+
+    Checks the HTTP status the SDKs attach (code/status/status_code) and the
+    exception class names, so neither the Gemini SDK nor Playwright has to be imported.
+    """
+    for attribute in ("status", "status_code", "code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int) and (status in (408, 429) or 500 <= status < 600):
+            return True
+
+    if isinstance(error, TimeoutError):  # the builtin, e.g. a socket timeout
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an adaptive concurrency limit.
+
+    Requests take a token (refilled at ``rate`` per second, up to ``burst``) and
+    a concurrency slot. Throttling, server errors and timeouts halve both the
+    rate and the concurrency limit; every success raises them additively back
+    towards the configured ceiling (AIMD), so throughput settles just under the
+    provider's real limit instead of failing requests.
+
+    Limits are per process: with several xdist workers, each worker has its own.
+    """
+
+    def __init__(self, name, rate, burst=1, max_concurrency=1, min_rate=None):
+        self.name = name
+        self.max_rate = _clamp_rate(rate)
+        self.min_rate = _clamp_rate(min_rate or self.max_rate / 16)
+        self.rate = self.max_rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token and a concurrency slot are available"""
+        with self._cond:
+            while True:
+                self._refill()
+                if self._in_flight < max(1, int(self.concurrency)) and self._tokens >= 1:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    return
+
+                # Sleep until the next token, or until a slot is released
+                wait = (1 - self._tokens) / self.rate if self._tokens < 1 else None
+                self._cond.wait(timeout=wait)
+
+    def set_max_rate(self, rate):
+        """Change the rate ceiling, e.g. for a run with another question delay"""
+        rate = _clamp_rate(rate)
+        with self._cond:
+            if self.max_rate != rate:
+                self.max_rate = rate
+                self.min_rate = _clamp_rate(self.max_rate / 16)
+                self.rate = min(self.rate, self.max_rate)
+                self._cond.notify_all()
+
+    def release(self, throttled=False):
+        """
+        Return the slot and adapt the limits
+
+        Args:
+            throttled (bool): The request hit a rate limit, server error or timeout
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.concurrency = max(1.0, self.concurrency / 2)
+                self._tokens = min(self._tokens, 0.0)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / max(1.0, self.concurrency))
+            self._cond.notify_all()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name, rate, burst=1, max_concurrency=1):
+    """Get the shared limiter for a name, creating it with these settings on first use"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveRateLimiter(name, rate, burst, max_concurrency)
+        return _limiters[name]
+
+
+def gemini_limiter():
+    """The limiter shared by every Gemini request in this process"""
+    return get_limiter(
+        "gemini", Config.GEMINI_RATE_PER_SEC,
+        burst=Config.GEMINI_MAX_CONCURRENCY, max_concurrency=Config.GEMINI_MAX_CONCURRENCY
+    )
+
+
+def mentor_limiter(mentor_url, question_delay=None):
+    """
+    The limiter for one mentor endpoint
+
+    Args:
+        question_delay (float): Minimum seconds between questions (default Config.QUESTION_DELAY);
+            0 disables pacing
+    """
+    if question_delay is None:
+        question_delay = Config.QUESTION_DELAY
+    rate = 1 / question_delay if question_delay > 0 else 1000.0
+    limiter = get_limiter(f"mentor:{mentor_url}", rate, max_concurrency=Config.MENTOR_MAX_CONCURRENCY)
+    # A warm pool process serves runs with different delays
+    limiter.set_max_rate(rate)
+    return limiter
+
+
+def call_with_retry(func, limiter, attempts=None, description="request"):
+    """
+    Call func under a rate limiter, retrying retryable errors with jittered backoff
+
+    Args:
+        func: Callable without arguments
+        limiter (AdaptiveRateLimiter): Paces the calls and adapts to throttling
+        attempts (int): Maximum tries (default Config.RETRY_ATTEMPTS)
+        description (str): Used in the retry log line
+
+    Returns:
+        The result of func
+
+    Raises:
+        The last error if it is not retryable or the attempts are used up
+    """
+    attempts = attempts or Config.RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        limiter.acquire()
+        try:
+            result = func()
+        except Exception as e:
+            retryable = is_retryable_error(e)
+            limiter.release(throttled=retryable)
+            if not retryable or attempt == attempts:
+                raise
+
+            # Full jitter: random delay up to the exponential backoff cap
+            delay = random.uniform(0, min(Config.RETRY_MAX_DELAY, Config.RETRY_BASE_DELAY * 2 ** attempt))
+            logger.warning("%s failed (%s), retry %s/%s in %.1fs", description, e, attempt, attempts - 1, delay)
+            time.sleep(delay)
+        else:
+            limiter.release()
+            return result
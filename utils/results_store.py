@@ -0,0 +1,445 @@
+import io
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.blob_store import BLOB_REF_PREFIX, resolve, spill
+from utils.config import Config
+from utils.dedup import text_hash
+from utils.excel_read import NOTES_COLUMN, RUBRIC_FIRST_COLUMN, RUBRIC_HEADERS, STATE_HEADERS, sheet_title
+from utils.grading_model import RUBRIC_CRITERIA
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def new_run_id():
+    """A sortable, unique run ID such as 20250101_120000_1a2b3c"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def current_run_id():
+    """
+    The run this process is part of
+
+    Taken from UAT_RUN_ID (set by the server, the orchestrator and the pytest
+    controller for its xdist workers), otherwise created once per process.
+    """
+    if not os.environ.get("UAT_RUN_ID"):
+        os.environ["UAT_RUN_ID"] = new_run_id()
+    return os.environ["UAT_RUN_ID"]
+
+
+def result_row(run_id, state_name, mentor_url, question_index, question, response=None,
+               result=None, error=None, grader=None):
+    """
+    Build a results row from a scraped response and its grade_responses result
+
+    Args:
+        error: Set when the response could not be fetched (result is then ignored)
+        grader (str): cache_id of the Grader that graded the response
+
+    Long responses are stored as blob references (utils/blob_store.py).
+    """
+    rubric = (result or {}).get('rubric') or {}
+    if error is not None:
+        status, error = "Failed", str(error)
+    elif result is None:
+        status = "Scraped"
+    elif result.get('error'):
+        status, error = "Failed", f"Grading error: {result['error']}"
+    else:
+        status = "Success"
+
+    return {
+        'run_id': run_id,
+        'state_name': state_name,
+        'mentor_url': mentor_url,
+        'question_index': question_index,
+        'question': str(question),
+        'question_hash': text_hash(question),
+        'response': None if response is None else spill(str(response)),
+        'response_hash': None if response is None else text_hash(resolve(response)),
+        'status': status,
+        'score': (result or {}).get('score') if error is None else None,
+        **{criterion: rubric.get(criterion) for criterion in RUBRIC_CRITERIA},
+        'error': error,
+        'grader': grader,
+        'created_at': time.time(),
+    }
+
+
+def stored_result(row):
+    """Turn a stored row back into a grade_responses result"""
+    rubric = {criterion: row[criterion] for criterion in RUBRIC_CRITERIA}
+    rubric['total'] = row['score']
+    return {'score': row['score'], 'rubric': rubric, 'evaluation': None, 'error': None}
+
+
+class ResultsStore:
+    """
+    Every processed question of every run, in one SQLite database.
+
+    The per-state xlsx files stay the deliverable; this table makes cross-state
+    and cross-run questions (averages, trends, run diffs) a single indexed query,
+    and xlsx exports are generated from it on demand.
+    """
+
+    COLUMNS = (
+        "run_id", "state_name", "mentor_url", "question_index", "question", "question_hash",
+        "response", "response_hash", "status", "score", *RUBRIC_CRITERIA, "error", "grader", "created_at",
+    )
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id TEXT PRIMARY KEY,
+            source TEXT,
+            uat_file TEXT,
+            started_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            state_name TEXT NOT NULL,
+            mentor_url TEXT,
+            question_index INTEGER,
+            question TEXT NOT NULL,
+            question_hash TEXT NOT NULL,
+            response TEXT,
+            response_hash TEXT,
+            status TEXT NOT NULL,
+            score INTEGER,
+            accuracy INTEGER,
+            completeness INTEGER,
+            clarity INTEGER,
+            tone INTEGER,
+            error TEXT,
+            grader TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_run_state
+            ON results (run_id, state_name, question_hash);
+        CREATE INDEX IF NOT EXISTS idx_results_state_question
+            ON results (state_name, question_hash, created_at);
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.RESULTS_DB
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._add_response_hashes(conn)
+            self._add_grader_column(conn)
+
+    @staticmethod
+    def _add_response_hashes(conn):
+        """Add the response_hash column to a store created before it existed"""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(results)")}
+        if "response_hash" in columns:
+            return
+        conn.execute("ALTER TABLE results ADD COLUMN response_hash TEXT")
+        rows = conn.execute("SELECT id, response FROM results WHERE response IS NOT NULL").fetchall()
+        updates = []
+        for row in rows:
+            try:
+                updates.append((text_hash(resolve(row['response'])), row['id']))
+            except KeyError:
+                pass  # blob already collected, the row compares as changed
+        conn.executemany("UPDATE results SET response_hash = ? WHERE id = ?", updates)
+        logger.info("Added response hashes to %s stored results", len(updates))
+
+    @staticmethod
+    def _add_grader_column(conn):
+        """Add the grader column to a store created before it existed (older rows are never reused)"""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(results)")}
+        if "grader" not in columns:
+            conn.execute("ALTER TABLE results ADD COLUMN grader TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start_run(self, run_id, source=None, uat_file=None):
+        """Record a run's origin (rows can be added without it)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO runs (run_id, source, uat_file, started_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET source = excluded.source, uat_file = excluded.uat_file",
+                (run_id, source, uat_file, time.time())
+            )
+
+    def add(self, rows):
+        """Append result rows (dicts from result_row)"""
+        if not rows:
+            return
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)",
+                {(row['run_id'], row['created_at']) for row in rows}
+            )
+            conn.executemany(
+                f"INSERT INTO results ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row[column] for column in self.COLUMNS) for row in rows]
+            )
+
+    def list_runs(self, limit=50):
+        """Most recent runs with row counts and average score"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT runs.run_id, runs.source, runs.uat_file, runs.started_at,
+                       COUNT(results.id) AS questions,
+                       SUM(results.status = 'Success') AS succeeded,
+                       SUM(results.status = 'Failed') AS failed,
+                       COUNT(DISTINCT results.state_name) AS states,
+                       ROUND(AVG(results.score), 1) AS avg_score
+                FROM runs LEFT JOIN results ON results.run_id = runs.run_id
+                GROUP BY runs.run_id
+                ORDER BY runs.started_at DESC
+                LIMIT ?
+                """,
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def run_summary(self, run_id):
+        """Per-state counts and average scores of one run"""
+        averages = ", ".join(f"ROUND(AVG({c}), 1) AS avg_{c}" for c in RUBRIC_CRITERIA)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT state_name, COUNT(*) AS questions,
+                       SUM(status = 'Success') AS succeeded,
+                       SUM(status = 'Failed') AS failed,
+                       ROUND(AVG(score), 1) AS avg_score, {averages}
+                FROM results WHERE run_id = ?
+                GROUP BY state_name ORDER BY state_name
+                """,
+                (run_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def remove_runs_older_than(self, cutoff):
+        """
+        Delete runs started before a time.time() value, with their results
+
+        Returns:
+            int: Runs removed
+        """
+        with self._connect() as conn:
+            old_runs = "SELECT run_id FROM runs WHERE started_at < ?"
+            conn.execute(f"DELETE FROM results WHERE run_id IN ({old_runs})", (cutoff,))
+            return conn.execute("DELETE FROM runs WHERE started_at < ?", (cutoff,)).rowcount
+
+    def blob_refs(self):
+        """Every blob reference a stored response still uses (see BlobStore.collect)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT response FROM results WHERE response LIKE ?", (BLOB_REF_PREFIX + "%",)
+            ).fetchall()
+        return {row['response'] for row in rows}
+
+    def run_results(self, run_id, state_name=None):
+        """
+        All rows of a run (optionally one state), in state and question order
+
+        Long responses are blob references, see utils.blob_store.resolve.
+        """
+        query = "SELECT * FROM results WHERE run_id = ?"
+        params = [run_id]
+        if state_name:
+            query += " AND state_name = ?"
+            params.append(state_name)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY state_name, question_index, id", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_unchanged(self, state_name, mentor_url, question_hashes, grader):
+        """
+        The latest successful result of each question for one mentor and grader
+
+        Args:
+            question_hashes (list): text_hash of the questions to look up
+            grader (str): cache_id of the Grader of this run; grades of another
+                backend, model or rubric are not reused
+
+        Returns:
+            dict: question hash -> row, for questions this mentor answered before
+        """
+        found = {}
+        hashes = list(dict.fromkeys(question_hashes))
+        with self._connect() as conn:
+            # Chunked to stay under SQLite's limit on query parameters
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = conn.execute(
+                    f"""
+                    SELECT * FROM results WHERE id IN (
+                        SELECT MAX(id) FROM results
+                        WHERE state_name = ? AND question_hash IN ({', '.join('?' for _ in chunk)})
+                            AND mentor_url = ? AND grader = ? AND status = 'Success'
+                        GROUP BY question_hash)
+                    """,
+                    (state_name, *chunk, mentor_url, grader)
+                ).fetchall()
+                found.update((row['question_hash'], dict(row)) for row in rows)
+        return found
+
+    def compare_runs(self, base_run_id, head_run_id, threshold=None, include_responses=False):
+        """
+        Join two runs on (state, question) and compute score deltas
+
+        The latest row per state and question of each run is used; questions are
+        matched by content hash, so reordering the Queries sheet does not matter.
+        Responses are compared by their stored normalized hash, without reading
+        them back.
+
+        Args:
+            threshold (int): A score drop of at least this many points is a regression
+                (default Config.REGRESSION_THRESHOLD)
+            include_responses (bool): Add base_response and head_response to the
+                rows whose response changed
+
+        Returns:
+            dict: summary counts and one row per (state, question) in either run with
+                base/head scores, delta, response_changed, regression and change
+                ("added", "removed" or None)
+        """
+        threshold = Config.REGRESSION_THRESHOLD if threshold is None else threshold
+        latest = (
+            "SELECT * FROM results WHERE id IN ("
+            "SELECT MAX(id) FROM results WHERE run_id = ? GROUP BY state_name, question_hash)"
+        )
+        columns = """
+            COALESCE(head.state_name, base.state_name) AS state_name,
+            COALESCE(head.question, base.question) AS question,
+            COALESCE(head.question_index, base.question_index) AS question_index,
+            base.score AS base_score, head.score AS head_score,
+            head.score - base.score AS delta,
+            base.status AS base_status, head.status AS head_status,
+            base.id IS NOT NULL AND head.id IS NOT NULL
+                AND base.response_hash IS NOT head.response_hash AS response_changed,
+            CASE WHEN base.id IS NULL THEN 'added' WHEN head.id IS NULL THEN 'removed' END AS change
+        """
+        if include_responses:
+            columns += ", base.response AS base_response, head.response AS head_response"
+        same_question = "head.state_name = base.state_name AND head.question_hash = base.question_hash"
+        with self._connect() as conn:
+            # LEFT JOIN both ways rather than FULL OUTER JOIN, which needs SQLite 3.39+
+            rows = conn.execute(
+                f"""
+                WITH base AS ({latest}), head AS ({latest})
+                SELECT {columns} FROM base LEFT JOIN head ON {same_question}
+                UNION ALL
+                SELECT {columns} FROM head LEFT JOIN base ON {same_question} WHERE base.id IS NULL
+                ORDER BY state_name, question_index
+                """,
+                (base_run_id, head_run_id)
+            ).fetchall()
+
+        comparisons = []
+        for row in rows:
+            row = dict(row)
+            row['response_changed'] = bool(row['response_changed'])
+            if include_responses:
+                if row['response_changed']:
+                    row['base_response'] = resolve(row['base_response'])
+                    row['head_response'] = resolve(row['head_response'])
+                else:
+                    del row['base_response'], row['head_response']
+            row['regression'] = row['delta'] is not None and row['delta'] <= -threshold
+            comparisons.append(row)
+
+        matched = [row for row in comparisons if row['delta'] is not None]
+        return {
+            'base': base_run_id,
+            'head': head_run_id,
+            'threshold': threshold,
+            'summary': {
+                'compared': len(matched),
+                'regressions': sum(row['regression'] for row in comparisons),
+                'improvements': sum(row['delta'] >= threshold for row in matched),
+                'changed_responses': sum(row['response_changed'] for row in comparisons),
+                'added': sum(row['change'] == 'added' for row in comparisons),
+                'removed': sum(row['change'] == 'removed' for row in comparisons),
+                'avg_delta': round(sum(row['delta'] for row in matched) / len(matched), 2) if matched else None,
+            },
+            'rows': comparisons,
+        }
+
+    def export_xlsx(self, run_id, state_name=None):
+        """
+        Build an xlsx of a run with one sheet per state, in the state output file
+        layout: question, response, timestamp, status and AI review in A-E, errors
+        in the notes column (H) and rubric scores from RUBRIC_FIRST_COLUMN (M-P)
+
+        Returns:
+            io.BytesIO: The workbook, or None if the run has no rows
+        """
+        import openpyxl
+
+        rows = self.run_results(run_id, state_name)
+        if not rows:
+            return None
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheets, titles = {}, set()
+        for row in rows:
+            sheet = sheets.get(row['state_name'])
+            if sheet is None:
+                # States that only differ past 31 characters or in []:*?/\ get their own sheet
+                sheet = sheets[row['state_name']] = workbook.create_sheet(sheet_title(row['state_name'], titles))
+                sheet.append([*STATE_HEADERS, *RUBRIC_HEADERS])
+            values = [None] * (RUBRIC_FIRST_COLUMN - 1)
+            values[:5] = [
+                row['question'], resolve(row['response']),
+                datetime.fromtimestamp(row['created_at']).strftime('%Y-%m-%d %H:%M:%S'),
+                row['status'], row['score'] if row['score'] is not None else "N/A",
+            ]
+            values[NOTES_COLUMN - 1] = row['error']
+            sheet.append([*values, *(row[criterion] for criterion in RUBRIC_CRITERIA)])
+
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_results_store():
+    """Get the process-wide results store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore()
+        return _store
+
+
+def record_results(rows):
+    """
+    Append rows to the results store if it is enabled
+
+    Storage problems are reported but never fail the run; the xlsx files are
+    still written.
+    """
+    if not Config.RESULTS_STORE_ENABLED:
+        return
+    try:
+        get_results_store().add(rows)
+    except Exception as e:
+        logger.warning("Could not record results: %s", e)
@@ -0,0 +1,64 @@
+import glob
+import os
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def prune_directory(directory, max_age=None, max_count=None, max_bytes=None, pattern="*"):
+    """
+    Delete the oldest files of a folder until it is within its limits
+
+    Files are removed oldest first (by modification time): first everything older
+    than max_age, then as many as needed to keep at most max_count files and
+    max_bytes in total. Subfolders are left alone. Files that disappear meanwhile
+    (another process pruning the same folder) are skipped.
+
+    Args:
+        directory (str): The folder to prune
+        max_age (float): Seconds a file is kept, None for no age limit
+        max_count (int): Files kept, None for no count limit
+        max_bytes (int): Total size kept, None for no size limit
+        pattern (str): Only files matching this glob pattern are considered
+
+    Returns:
+        dict: removed (files deleted) and freed_bytes
+    """
+    files = []
+    for path in glob.glob(os.path.join(directory, pattern)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if os.path.isfile(path):
+            files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()  # oldest first
+
+    total_bytes = sum(size for _, size, _ in files)
+    count = len(files)
+    cutoff = time.time() - max_age if max_age is not None else None
+    removed = freed = 0
+
+    for mtime, size, path in files:
+        expired = cutoff is not None and mtime < cutoff
+        too_many = max_count is not None and count > max_count
+        too_big = max_bytes is not None and total_bytes > max_bytes
+        if not (expired or too_many or too_big):
+            break  # every newer file is within the limits too
+        try:
+            os.remove(path)
+            removed += 1
+            freed += size
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove %s: %s", path, e)
+            continue
+        count -= 1
+        total_bytes -= size
+
+    if removed:
+        logger.debug("Pruned %s files (%s bytes) from %s", removed, freed, directory)
+    return {'removed': removed, 'freed_bytes': freed}
@@ -0,0 +1,155 @@
+import gzip
+import hashlib
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+from utils.config import Config
+
+
+class StaticAsset:
+    """A static file held in memory together with its precompressed variants."""
+
+    def __init__(self, name, mimetype, body, mtime):
+        self.name = name
+        self.mimetype = mimetype
+        self.body = body
+        self.mtime = mtime
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+
+        # Precompress once so requests only pick a variant
+        self.variants = {'identity': body}
+        self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, quality=11)
+
+    def etag(self, encoding):
+        """Get the ETag for one encoding of this asset."""
+        if encoding == 'identity':
+            return self.digest
+        return f"{self.digest}-{encoding}"
+
+
+class StaticAssetCache:
+    """
+    Serves the front-end files from memory.
+
+    Each file is read and compressed once. The HTML page is rewritten so it
+    references the CSS/JS files by content hash (e.g. ``styles.css?v=<hash>``),
+    which lets those be cached by browsers for a year while the page itself is
+    always revalidated with its ETag.
+    """
+
+    # name -> mimetype
+    ASSETS = {
+        'index.html': 'text/html; charset=utf-8',
+        'styles.css': 'text/css; charset=utf-8',
+        'script.js': 'application/javascript; charset=utf-8',
+    }
+
+    # Assets referenced from index.html by content hash
+    HASHED_REFERENCES = {
+        'styles.css': 'href="styles.css"',
+        'script.js': 'src="script.js"',
+    }
+
+    def __init__(self, base_dir=None, reload_on_change=False):
+        self.base_dir = base_dir or Config.BASE_DIR
+        self.reload_on_change = reload_on_change
+        self._assets = {}
+        self._lock = threading.RLock()
+
+    def _read(self, name):
+        path = os.path.join(self.base_dir, name)
+        mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            body = f.read()
+        return body, mtime
+
+    def _is_stale(self, name):
+        asset = self._assets.get(name)
+        if asset is None:
+            return True
+        if not self.reload_on_change:
+            return False
+        try:
+            return os.path.getmtime(os.path.join(self.base_dir, name)) != asset.mtime
+        except OSError:
+            return True
+
+    def _load(self, name):
+        body, mtime = self._read(name)
+
+        if name == 'index.html':
+            html = body.decode('utf-8')
+            for ref_name, attribute in self.HASHED_REFERENCES.items():
+                ref = self.get(ref_name)
+                hashed = attribute.replace(ref_name, f"{ref_name}?v={ref.digest}")
+                html = html.replace(attribute, hashed)
+            body = html.encode('utf-8')
+
+        return StaticAsset(name, self.ASSETS[name], body, mtime)
+
+    def get(self, name):
+        """
+        Get an asset, loading it on first use
+
+        Raises:
+            FileNotFoundError: If the file does not exist on disk
+        """
+        if not self._is_stale(name):
+            return self._assets[name]
+
+        with self._lock:
+            if self._is_stale(name):
+                # The page embeds the hashes of the other assets
+                if name != 'index.html' and 'index.html' in self._assets:
+                    self._assets.pop('index.html')
+                self._assets[name] = self._load(name)
+            return self._assets[name]
+
+    @staticmethod
+    def negotiate_encoding(asset, accept_encodings):
+        """Pick the best precompressed variant the client accepts."""
+        for encoding in ('br', 'gzip'):
+            if encoding in asset.variants and accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+    def make_response(self, name, request, response_class):
+        """
+        Build a response for an asset, honouring If-None-Match and Accept-Encoding
+
+        Args:
+            name (str): The asset file name
+            request: The current Flask request
+            response_class: The Flask response class
+
+        Returns:
+            Response: 200 with the (compressed) body or 304 Not Modified
+        """
+        asset = self.get(name)
+        encoding = self.negotiate_encoding(asset, request.accept_encodings)
+        etag = asset.etag(encoding)
+
+        # URLs carrying the current content hash never change
+        if name != 'index.html' and request.args.get('v') == asset.digest:
+            cache_control = f"public, max-age={Config.STATIC_MAX_AGE}, immutable"
+        else:
+            cache_control = "no-cache"
+
+        if request.if_none_match.contains(etag):
+            response = response_class(status=304)
+        else:
+            response = response_class(asset.variants[encoding], content_type=asset.mimetype)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
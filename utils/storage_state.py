@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+from utils.config import Config
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Statuses meaning the site no longer accepts the session (login expired, consent withdrawn)
+SESSION_REJECTED_STATUSES = (401, 403, 419, 440)
+
+# Where a site sends a visitor whose session it turned away: a sign-in host or a
+# login / consent path (these pages usually answer 200)
+LOGIN_HOST = re.compile(r"^(login|signin|sso|auth|accounts|id)\.", re.IGNORECASE)
+LOGIN_PATH = re.compile(r"/(log-?in|sign-?in|sso|auth|oauth2?|authorize|consent)(/|$)", re.IGNORECASE)
+
+
+def host_of(url):
+    """The host (and port) a storage state is kept for, e.g. 'mentor.example.com'"""
+    return urlsplit(url).netloc.lower()
+
+
+def _looks_like_login(url):
+    parts = urlsplit(url)
+    return bool(LOGIN_HOST.match(parts.netloc) or LOGIN_PATH.search(parts.path))
+
+
+def is_login_page(url, landed_url):
+    """
+    Whether a navigation to url was redirected to a login or consent page
+
+    Other redirects (a trailing slash, a query string, the mentor's chat route)
+    are ordinary page loads and do not count.
+    """
+    return _looks_like_login(landed_url) and not _looks_like_login(url)
+
+
+def _cookie_matches(cookie, host):
+    domain = cookie.get("domain", "").lstrip(".").lower()
+    hostname = host.split(":")[0]
+    return hostname == domain or hostname.endswith("." + domain)
+
+
+class StorageStateCache:
+    """
+    Cookies and localStorage of mentor sites, saved once per host and reused.
+
+    After a question was answered, the context's cookies and localStorage for
+    the mentor's host are written to <root>/<host>.json (unless a fresh copy
+    exists). New browser contexts start from the saved states and existing
+    ones have them added before their first visit to a host, so login and
+    consent round trips are made once per host and TTL instead of per context.
+    Files are shared by all processes and replaced atomically; a state older
+    than the TTL is ignored, and one the site rejected is deleted.
+    """
+
+    def __init__(self, root=None, ttl=None):
+        self.root = root or Config.STORAGE_STATE_DIR
+        self.ttl = Config.STORAGE_STATE_TTL if ttl is None else ttl
+        os.makedirs(self.root, exist_ok=True)
+        self._applied = weakref.WeakKeyDictionary()  # context -> {host: whether it got a saved state}
+        self._lock = threading.Lock()
+
+    def _path(self, host):
+        return os.path.join(self.root, re.sub(r"[^\w.-]", "_", host) + ".json")
+
+    def is_fresh(self, url):
+        """Whether a state younger than the TTL is saved for the URL's host"""
+        try:
+            return time.time() - os.path.getmtime(self._path(host_of(url))) < self.ttl
+        except OSError:
+            return False
+
+    def load(self, url):
+        """
+        The saved state of the URL's host
+
+        Returns:
+            dict: Playwright storage state (cookies, origins), or None if there is
+                none or it expired
+        """
+        path = self._path(host_of(url))
+        if not self.is_fresh(url):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.debug("Could not read storage state %s: %s", path, e)
+            return None
+
+    def save(self, url, context):
+        """Save a context's cookies and localStorage for the URL's host"""
+        host = host_of(url)
+        state = context.storage_state()
+        state = {
+            "host": host,
+            "cookies": [cookie for cookie in state.get("cookies", []) if _cookie_matches(cookie, host)],
+            "origins": [origin for origin in state.get("origins", []) if host_of(origin["origin"]) == host],
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")  # created 0600, holds session cookies
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self._path(host))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._applied.setdefault(context, {})[host] = True
+        logger.debug("Saved storage state of %s", host, extra={'cookies': len(state["cookies"])})
+
+    def invalidate(self, url, context=None):
+        """Forget the URL's host state after the site rejected it, and clear it from a context"""
+        host = host_of(url)
+        try:
+            os.remove(self._path(host))
+        except FileNotFoundError:
+            pass
+        if context is not None:
+            context.clear_cookies(domain=host.split(":")[0])
+            with self._lock:
+                self._applied.get(context, {}).pop(host, None)
+        logger.info("Storage state of %s was rejected, logging in again", host)
+
+    def merged_state(self):
+        """
+        Every fresh saved state in one, for creating a context
+
+        Returns:
+            tuple: (storage_state dict, set of hosts it covers)
+        """
+        cookies, origins, hosts = [], [], set()
+        for filename in os.listdir(self.root):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.root, filename)
+            try:
+                if time.time() - os.path.getmtime(path) >= self.ttl:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            cookies += state.get("cookies", [])
+            origins += state.get("origins", [])
+            if state.get("host"):
+                hosts.add(state["host"])
+        return {"cookies": cookies, "origins": origins}, hosts
+
+    def mark_applied(self, context, hosts):
+        """Record that a context was created with these hosts' states"""
+        with self._lock:
+            self._applied.setdefault(context, {}).update(dict.fromkeys(hosts, True))
+
+    def holds_state(self, context, url):
+        """Whether a context got the URL's host state from this cache (so a rejection means it expired)"""
+        with self._lock:
+            return self._applied.get(context, {}).get(host_of(url), False)
+
+    def apply(self, context, url):
+        """Add the URL's host state to a context that does not have it yet (cookies and localStorage)"""
+        host = host_of(url)
+        with self._lock:
+            applied = self._applied.setdefault(context, {})
+            if host in applied:
+                return
+            applied[host] = False
+
+        state = self.load(url)
+        if not state:
+            return
+        with self._lock:
+            applied[host] = True
+        if state["cookies"]:
+            context.add_cookies(state["cookies"])
+        for origin in state["origins"]:
+            # localStorage can only be written from a page of the origin, before its scripts run
+            items = {item["name"]: item["value"] for item in origin.get("localStorage", [])}
+            context.add_init_script(
+                f"if (location.origin === {json.dumps(origin['origin'])}) {{"
+                f" const items = {json.dumps(items)};"
+                " for (const [name, value] of Object.entries(items)) {"
+                " if (localStorage.getItem(name) === null) localStorage.setItem(name, value); } }"
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_storage_state_cache():
+    """Get the process-wide storage state cache, or None when Config.STORAGE_STATE_ENABLED is off"""
+    global _cache
+    if not Config.STORAGE_STATE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = StorageStateCache()
+        return _cache
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+from utils.config import Config
+
+
+class UploadRegistry:
+    """
+    Keeps track of uploaded workbooks per browser session.
+
+    Stored in SQLite so every server worker process sees the same uploads,
+    and so several users (or one user with several workbooks) can run tests
+    at the same time without overwriting each other's selection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS uploads (
+            upload_id TEXT PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            filepath TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_uploads_session
+            ON uploads (session_id, created_at);
+        CREATE TABLE IF NOT EXISTS upload_batches (
+            batch_id TEXT NOT NULL,
+            upload_id TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (batch_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_upload_batches_session
+            ON upload_batches (session_id);
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.UPLOAD_REGISTRY_DB
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def register(self, session_id, filename, filepath, upload_id=None):
+        """
+        Record a new upload
+
+        Args:
+            upload_id (str): ID chosen by the caller, e.g. to name the file after it
+
+        Returns:
+            str: The upload ID (generated if not given)
+        """
+        upload_id = upload_id or uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO uploads (upload_id, session_id, filename, filepath, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (upload_id, session_id, filename, os.path.abspath(filepath), time.time())
+            )
+        return upload_id
+
+    def get(self, upload_id):
+        """Get an upload by ID, or None if it is unknown"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM uploads WHERE upload_id = ?", (upload_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def register_batch(self, session_id, upload_ids, batch_id=None):
+        """
+        Group uploads to be tested together in one run
+
+        Returns:
+            str: The batch ID (generated if not given)
+        """
+        batch_id = batch_id or uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO upload_batches (batch_id, upload_id, session_id, position) VALUES (?, ?, ?, ?)",
+                [(batch_id, upload_id, session_id, position) for position, upload_id in enumerate(upload_ids)]
+            )
+        return batch_id
+
+    def get_batch(self, batch_id):
+        """
+        Get the uploads of a batch in upload order
+
+        A batch is only run whole: it is empty if the batch is unknown or one of
+        its uploads was forgotten.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT uploads.* FROM upload_batches LEFT JOIN uploads USING (upload_id) "
+                "WHERE batch_id = ? ORDER BY position",
+                (batch_id,)
+            ).fetchall()
+        if any(row['filepath'] is None for row in rows):
+            return []
+        return [dict(row) for row in rows]
+
+    def latest(self, session_id):
+        """Get the most recent upload of a session, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM uploads WHERE session_id = ? ORDER BY created_at DESC LIMIT 1",
+                (session_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def remove_session(self, session_id):
+        """
+        Forget every upload of a session
+
+        Returns:
+            list: The removed upload records
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM uploads WHERE session_id = ?", (session_id,)
+            ).fetchall()
+            conn.execute("DELETE FROM uploads WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM upload_batches WHERE session_id = ?", (session_id,))
+        return [dict(row) for row in rows]
+
+    def forget_missing(self):
+        """
+        Forget uploads whose file no longer exists (e.g. removed by the retention sweep)
+
+        The batches they belong to are forgotten in the same transaction, so a
+        batch never runs with some of its workbooks silently left out.
+
+        Returns:
+            int: How many uploads were forgotten
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT upload_id, filepath FROM uploads").fetchall()
+            missing = [(row['upload_id'],) for row in rows if not os.path.exists(row['filepath'])]
+            conn.executemany(
+                "DELETE FROM upload_batches WHERE batch_id IN "
+                "(SELECT batch_id FROM upload_batches WHERE upload_id = ?)",
+                missing
+            )
+            conn.executemany("DELETE FROM uploads WHERE upload_id = ?", missing)
+        return len(missing)
@@ -0,0 +1,140 @@
+"""
+Data checks of an uploaded workbook, run in the app instead of a pytest subprocess.
+
+The workbook is parsed once (every sheet) and each sheet is checked column chunk
+by column chunk with vectorized pandas/numpy operations: per-row hashes and
+emptiness are combined across chunks, so the whole-row checks never build a
+second frame the size of the sheet.
+
+    report = validate_workbook("uploads/my_pack.xlsx")
+    report['valid'], report['errors'], report['warnings'], report['sheets']
+"""
+import os
+
+from utils.config import Config
+
+# Multiplier used to fold the row hashes of each column chunk into one
+_HASH_MULTIPLIER = 1000003
+
+
+def _check_sheet(name, df, chunk_columns):
+    """
+    Run the duplicate, empty-row, header and dtype checks on one sheet
+
+    Returns:
+        dict: The sheet's report, with its own errors and warnings
+    """
+    import numpy as np
+    import pandas as pd
+
+    errors, warnings = [], []
+    row_count, column_count = df.shape
+    if row_count == 0 or column_count == 0:
+        # Workbooks may carry empty sheets (e.g. one filled in by the run); only all-empty is an error
+        warnings.append("Sheet is empty")
+
+    row_hashes = np.zeros(row_count, dtype=np.uint64)
+    empty_rows = np.ones(row_count, dtype=bool)
+    columns = []
+    mixed_columns = []
+
+    for start in range(0, column_count, chunk_columns):
+        chunk = df.iloc[:, start:start + chunk_columns]
+        nulls = chunk.isna()
+
+        # Whole-row checks, folded in chunk by chunk
+        empty_rows &= nulls.all(axis=1).to_numpy()
+        chunk_hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        row_hashes = row_hashes * np.uint64(_HASH_MULTIPLIER) ^ chunk_hashes
+
+        # Per-column checks
+        null_counts = nulls.sum()
+        text_columns = chunk.select_dtypes(include=['object']).columns
+        if len(text_columns):
+            filled = chunk[text_columns].notna().sum()
+            numeric = chunk[text_columns].apply(lambda column: pd.to_numeric(column, errors='coerce').notna().sum())
+            mixed_columns += [str(column) for column in text_columns if 0 < numeric[column] < filled[column]]
+
+        for column, dtype in chunk.dtypes.items():
+            columns.append({
+                'name': str(column),
+                'dtype': str(dtype),
+                'nulls': int(null_counts[column]),
+            })
+
+    # Hashes of equal rows are equal; df.duplicated() semantics without comparing every column again
+    duplicate_rows = int(pd.Series(row_hashes).duplicated().sum()) if row_count else 0
+    empty_row_count = int(empty_rows.sum())
+    if duplicate_rows:
+        warnings.append(f"Found {duplicate_rows} duplicate rows")
+    if empty_row_count:
+        warnings.append(f"Found {empty_row_count} completely empty rows")
+
+    unnamed = [str(column) for column in df.columns if str(column).startswith('Unnamed:')]
+    if unnamed:
+        warnings.append(f"Found unnamed columns: {', '.join(unnamed)}")
+    if column_count and len(unnamed) == column_count:
+        errors.append("No properly named columns found")
+
+    dtype_counts = {
+        'numeric': len(df.select_dtypes(include=['number']).columns),
+        'text': len(df.select_dtypes(include=['object']).columns),
+        'date': len(df.select_dtypes(include=['datetime']).columns),
+    }
+    if column_count and not any(dtype_counts.values()):
+        errors.append("No recognizable data types found")
+    if mixed_columns:
+        warnings.append(f"Numbers mixed with text in columns: {', '.join(mixed_columns)}")
+
+    return {
+        'name': name,
+        'rows': row_count,
+        'columns': column_count,
+        'duplicate_rows': duplicate_rows,
+        'empty_rows': empty_row_count,
+        'unnamed_columns': unnamed,
+        'mixed_columns': mixed_columns,
+        'dtype_counts': dtype_counts,
+        'column_details': columns,
+        'errors': errors,
+        'warnings': warnings,
+    }
+
+
+def validate_workbook(filepath, chunk_columns=None):
+    """
+    Check that a workbook exists, is readable and that every sheet holds usable data
+
+    Args:
+        filepath (str): The workbook to check
+        chunk_columns (int): Columns checked at a time, defaults to Config.VALIDATION_CHUNK_COLUMNS
+
+    Returns:
+        dict: file, valid (no errors), errors and warnings (prefixed with the sheet
+            name) and sheets (one report per sheet, see _check_sheet)
+    """
+    import pandas as pd
+
+    chunk_columns = max(1, chunk_columns or Config.VALIDATION_CHUNK_COLUMNS)
+    report = {'file': os.path.basename(filepath), 'valid': False, 'errors': [], 'warnings': [], 'sheets': []}
+
+    if not os.path.exists(filepath):
+        report['errors'].append(f"Excel file does not exist: {os.path.basename(filepath)}")
+        return report
+    try:
+        # One parse of the whole workbook, shared by every check
+        sheets = pd.read_excel(filepath, sheet_name=None)
+    except Exception as e:
+        report['errors'].append(f"Could not read Excel file: {e}")
+        return report
+
+    for name, df in sheets.items():
+        sheet_report = _check_sheet(name, df, chunk_columns)
+        report['sheets'].append(sheet_report)
+        report['errors'] += [f"{name}: {error}" for error in sheet_report['errors']]
+        report['warnings'] += [f"{name}: {warning}" for warning in sheet_report['warnings']]
+
+    if not any(sheet['rows'] and sheet['columns'] for sheet in report['sheets']):
+        report['errors'].append("Excel file is empty (no data rows)")
+    report['valid'] = not report['errors']
+    return report
@@ -0,0 +1,342 @@
+import atexit
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+from utils.config import Config
+from utils.logger import flush_logs
+
+
+def _failed_result(task, error):
+    return {
+        'task_id': task['task_id'],
+        'state_name': task['state_name'],
+        'mentor_url': task['mentor_url'],
+        'processed': 0,
+        'failed': len(task['questions']),
+        'error': error,
+        'duration': 0,
+        'output': '',
+    }
+
+
+def _run_task(contexts, task):
+    """Process one mentor inside a pool process, on a context leased from the warm browser."""
+    from pages.grading_page import GradingPage
+    from utils.graders import get_grader
+
+    started = time.time()
+    log = io.StringIO()
+    result = {
+        'task_id': task['task_id'],
+        'state_name': task['state_name'],
+        'mentor_url': task['mentor_url'],
+        'processed': 0,
+        'failed': len(task['questions']),
+        'error': None,
+    }
+
+    try:
+        with contextlib.redirect_stdout(log), contexts.lease() as page:
+            try:
+                processed, failed = GradingPage(page).process_mentor_questions(
+                    task['mentor_url'], task['state_name'], task['questions'],
+                    model=get_grader(task['grader']), question_delay=task['question_delay'],
+                    run_id=task['run_id'], changed_only=task['changed_only']
+                )
+            finally:
+                # Log records are written by a background thread, let it catch up
+                # before stdout is restored
+                flush_logs()
+        result['processed'], result['failed'] = processed, failed
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['duration'] = round(time.time() - started, 2)
+    result['output'] = log.getvalue()
+    return result
+
+
+def _worker_main(task_queue, result_queue):
+    """
+    Entry point of a pool process
+
+    Imports the heavy modules and launches Chromium once, then processes tasks
+    until it receives None. Before a task starts the worker reports
+    {'started': task_id, 'pid': pid}, so the pool knows which task a process
+    was running when it dies. Tasks whose run already timed out are skipped.
+    """
+    from playwright.sync_api import sync_playwright
+    import pages.grading_page  # noqa: F401 - warm the import before the first task
+    from utils.browser_pool import ContextPool
+    from utils.graders import GeminiGrader, get_grader
+
+    # The Gemini SDK is loaded lazily, pay for it now rather than in the first task
+    try:
+        default_grader = get_grader()
+        if isinstance(default_grader, GeminiGrader):
+            default_grader.model  # noqa: B018 - creates the model
+    except ValueError:
+        pass  # no API key: only runs that grade with Gemini will fail
+
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(**Config.get_browser_options("chromium"))
+        contexts = ContextPool(browser)
+        contexts.warm_up()
+
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+
+            if task['deadline'] and time.time() > task['deadline']:
+                result_queue.put(_failed_result(task, "Run timed out before the task started"))
+                continue
+            result_queue.put({'started': task['task_id'], 'pid': os.getpid()})
+
+            # Relaunch if Chromium crashed since the last task
+            if not browser.is_connected():
+                browser = playwright.chromium.launch(**Config.get_browser_options("chromium"))
+                contexts = ContextPool(browser)
+
+            try:
+                result = _run_task(contexts, task)
+            except Exception as e:
+                result = _failed_result(task, f"Worker error: {e}")
+            result_queue.put(result)
+
+        contexts.close()
+        browser.close()
+
+
+class WarmWorkerPool:
+    """
+    Long-lived pool of processes that each keep a Chromium browser running.
+
+    Starting a pytest run costs several seconds of imports, xdist worker start-up
+    and browser launches before the first question is sent. The pool pays that
+    once; a run is split into one task per mentor and handed to idle workers.
+
+    The result collector thread also watches the processes: when one dies
+    (Chromium or the interpreter crashed, out of memory) the task it was
+    running fails with an error and a replacement process is started.
+    """
+
+    def __init__(self, size=None):
+        self.size = size or Config.WARM_POOL_SIZE
+        self._mp = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count(1)
+        self._futures = {}
+        self._processes = []
+        self._running = {}  # pid -> task_id it is processing
+        self._stopping = False
+        self._task_queue = None
+        self._result_queue = None
+        self._collector = None
+
+    def start(self):
+        """Start the worker processes (and their browsers) if they are not running"""
+        with self._lock:
+            if self._task_queue is None:
+                self._task_queue = self._mp.Queue()
+                self._result_queue = self._mp.Queue()
+                self._collector = threading.Thread(target=self._collect_results, daemon=True)
+                self._collector.start()
+            self._stopping = False
+            self._replace_dead_workers()
+
+    def _replace_dead_workers(self):
+        """Fail the tasks of processes that died and start replacements (called with the lock held)"""
+        alive = []
+        for process in self._processes:
+            if process.is_alive():
+                alive.append(process)
+                continue
+            task_id = self._running.pop(process.pid, None)
+            future = self._futures.pop(task_id, None)
+            if future is not None:
+                future.set_exception(RuntimeError(
+                    f"Worker process {process.pid} exited with code {process.exitcode} during the task"
+                ))
+        self._processes = alive
+
+        while len(self._processes) < self.size:
+            process = self._mp.Process(
+                target=_worker_main,
+                args=(self._task_queue, self._result_queue),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+    def _collect_results(self):
+        while True:
+            try:
+                result = self._result_queue.get(timeout=Config.WORKER_MONITOR_INTERVAL)
+            except queue.Empty:
+                result = {}
+            if result is None:
+                break
+
+            with self._lock:
+                if 'started' in result:
+                    if any(process.pid == result['pid'] for process in self._processes):
+                        self._running[result['pid']] = result['started']
+                        continue
+                    # The process died and was reaped before this message was read
+                    future = self._futures.pop(result['started'], None)
+                    if future is not None:
+                        future.set_exception(RuntimeError(
+                            f"Worker process {result['pid']} exited during the task"
+                        ))
+                    continue
+                future = None
+                if result:
+                    self._running = {pid: task_id for pid, task_id in self._running.items()
+                                     if task_id != result['task_id']}
+                    future = self._futures.pop(result['task_id'], None)
+                if not self._stopping:
+                    self._replace_dead_workers()
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    def _abandon(self, futures):
+        """
+        Stop waiting for tasks of a run that timed out
+
+        Queued tasks are skipped by the workers (their deadline passed);
+        processes still running one are terminated and replaced, so a hung
+        mentor does not keep a worker from the next run.
+        """
+        with self._lock:
+            task_ids = {task_id for task_id, future in self._futures.items() if future in futures}
+            for task_id in task_ids:
+                self._futures.pop(task_id).cancel()
+            for process in self._processes:
+                if self._running.get(process.pid) in task_ids:
+                    del self._running[process.pid]
+                    process.terminate()
+                    process.join(timeout=5)
+            self._replace_dead_workers()
+
+    def submit(self, state_name, mentor_url, questions, question_delay=None, grader=None, run_id=None,
+               changed_only=False, deadline=None):
+        """
+        Queue one mentor for processing
+
+        Args:
+            deadline (float): time.time() after which a worker skips the task
+                instead of starting it
+
+        Returns:
+            Future: Resolves to the task result dict
+        """
+        self.start()
+        future = Future()
+        task_id = next(self._task_ids)
+        with self._lock:
+            self._futures[task_id] = future
+        self._task_queue.put({
+            'task_id': task_id,
+            'state_name': state_name,
+            'mentor_url': mentor_url,
+            'questions': questions,
+            'question_delay': question_delay,
+            'grader': grader,
+            'run_id': run_id,
+            'changed_only': changed_only,
+            'deadline': deadline,
+        })
+        return future
+
+    def run(self, uat_file, mentor_names=None, question_range=None, question_delay=None, grader=None,
+            timeout=None, run_id=None, changed_only=False):
+        """
+        Process every mentor of a workbook on the pool
+
+        Args:
+            uat_file (str): Workbook with the LLM-Url and Queries sheets
+            mentor_names (list): Only these states
+            question_range (tuple): (first, last) question numbers
+            question_delay (float): Seconds between questions sent to one mentor
+            grader (str): Grading backend name (default Config.GRADER_BACKEND)
+            timeout (float): Seconds to wait for the whole run
+            run_id (str): Run the results are recorded under in the results store
+            changed_only (bool): Reuse stored results of unchanged questions
+
+        Returns:
+            list: One result dict per mentor
+
+        Raises:
+            concurrent.futures.TimeoutError: If the run took longer than timeout;
+                its remaining tasks are cancelled first
+        """
+        from pages.grading_page import GradingPage
+
+        reader = GradingPage(None)
+        mentors = reader.read_mentor_configurations(uat_file, mentor_names, row_limit=Config.MENTOR_ROW_LIMIT)
+        questions = reader.read_questions_from_template(
+            uat_file, question_range, return_hashes=True, row_limit=Config.QUESTION_ROW_LIMIT
+        )
+        if not mentors or not questions:
+            return []
+
+        deadline = time.time() + (timeout or Config.TEST_RUN_TIMEOUT)
+        futures = [
+            self.submit(state_name, mentor_url, questions, question_delay, grader, run_id, changed_only, deadline)
+            for state_name, mentor_url in mentors
+        ]
+
+        results = []
+        try:
+            for (state_name, mentor_url), future in zip(mentors, futures):
+                try:
+                    results.append(future.result(timeout=max(0, deadline - time.time())))
+                except RuntimeError as e:  # the worker process died
+                    results.append(_failed_result({
+                        'task_id': None, 'state_name': state_name, 'mentor_url': mentor_url,
+                        'questions': questions,
+                    }, str(e)))
+        except FuturesTimeoutError:
+            self._abandon(futures)
+            raise
+        return results
+
+    def shutdown(self):
+        """Stop the workers and close their browsers"""
+        with self._lock:
+            if self._task_queue is None:
+                return
+            self._stopping = True
+            for _ in self._processes:
+                self._task_queue.put(None)
+            processes, self._processes = self._processes, []
+
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+        self._result_queue.put(None)
+        self._task_queue = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Get the process-wide pool, creating (but not starting) it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WarmWorkerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,43 @@
+"""
+Production entry point for the UAT Automation Tool.
+
+Linux/macOS (several worker processes, each with a thread pool):
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Windows (single process with a thread pool, used by start_server.bat):
+    python wsgi.py
+
+Worker count, threads and request timeout are read from utils.config.Config,
+which takes them from the UAT_WORKERS, UAT_THREADS and UAT_REQUEST_TIMEOUT
+environment variables.
+"""
+from app import app
+from utils.config import Config
+
+
+def serve():
+    """Serve the app with waitress"""
+    from waitress import serve as waitress_serve
+
+    print("Starting Excel Upload & Test Runner Server (production mode)...")
+    print(f"Server will be available at: http://localhost:{Config.SERVER_PORT}")
+    print(f"Threads: {Config.SERVER_THREADS}, idle connection timeout: {Config.SERVER_TIMEOUT}s")
+    
+    if Config.RUN_MODE == 'warm':
+        from utils.worker_pool import get_worker_pool
+        print(f"Starting {Config.WARM_POOL_SIZE} warm browser workers...")
+        get_worker_pool().start()
+
+    waitress_serve(
+        app,
+        host=Config.SERVER_HOST,
+        port=Config.SERVER_PORT,
+        threads=Config.SERVER_THREADS,
+        # Closes connections idle this long; waitress never aborts a running
+        # request, a run is bounded by Config.TEST_RUN_TIMEOUT instead
+        channel_timeout=Config.SERVER_TIMEOUT,
+    )
+
+
+if __name__ == '__main__':
+    serve()